@@ -0,0 +1,224 @@
+import time
+import numpy as np
+from MILP_Builder import dense_distances
+from Placement_Heuristics import heuristic_p_median, improve_centers, nearest_center_distances
+from Solver_Backend import create_solver, solve
+
+
+# Function to find every node's critical distance for (possibly fractional) open values x: walking the open
+# candidates from nearest to farthest, the distance at which their x values first add up to 1
+# Only the candidates with x > 0 are sorted, so this is O(|support| * n log |support|)
+def critical_distances(distances, x_values, tolerance=1e-6):
+    support = np.nonzero(x_values > tolerance)[0]
+    support_distances = distances[support]
+    order = np.argsort(support_distances, axis=0, kind='stable')
+    reached = np.cumsum(x_values[support][order], axis=0) >= 1 - tolerance
+    reached[-1] = True  # Rounding can leave the total a hair below 1; the farthest open candidate then counts
+    first = np.argmax(reached, axis=0)
+    return support_distances[order[first, np.arange(distances.shape[1])], np.arange(distances.shape[1])]
+
+
+# Function to generate one Benders optimality cut per node for the open values x, in bulk
+# The assignment subproblem of node j is solved in closed form by its critical distance c[j] (see above),
+# and its dual gives the cut  theta[j] + sum_i max(0, c[j] - d[i, j]) * x[i] >= c[j], which is tight at x.
+# Only candidates closer than c[j] get a coefficient; rows of the matrix are scanned in blocks of `block_size`
+# Returns the cuts as (node of every nonzero, candidate of every nonzero, coefficients, right-hand sides)
+def benders_cuts(distances, x_values, block_size=1024):
+    critical = critical_distances(distances, x_values)
+    cut_nodes, cut_candidates, coefficients = [], [], []
+    for start in range(0, len(distances), block_size):
+        slack = critical[None, :] - np.asarray(distances[start:start + block_size], dtype=np.float64)
+        candidates, nodes = np.nonzero(slack > 0)
+        cut_nodes.append(nodes)
+        cut_candidates.append(start + candidates)
+        coefficients.append(slack[candidates, nodes])
+    return np.concatenate(cut_nodes), np.concatenate(cut_candidates), np.concatenate(coefficients), critical
+
+
+# Master problem over the open variables x[i] of every candidate and the cost variables theta[j] of every node,
+# built once and kept in one solver for the whole run: minimize sum_j theta[j] subject to 1 <= sum_i x[i] <= N
+# and a pool of optimality cuts. Only cuts the current master solution violates enter the pool, a cut already in
+# it is never added again, and a cut left slack by `max_slack_rounds` solves in a row is dropped. Dropped rows are
+# cleared and reused, so the master never holds more than `max_cuts` cut rows (the oldest slack cut makes room
+# when the pool is full)
+class BendersMaster:
+    def __init__(self, n, N, solver_settings, max_cuts, max_slack_rounds=5, tolerance=1e-6):
+        self.n = n
+        self.max_cuts = max_cuts
+        self.max_slack_rounds = max_slack_rounds
+        self.tolerance = tolerance
+        self.solver = create_solver(solver_settings)
+        self.x = [self.solver.NumVar(0.0, 1.0, f"x[{i}]") for i in range(n)]
+        self.theta = [self.solver.NumVar(0.0, self.solver.infinity(), f"theta[{j}]") for j in range(n)]
+        count = self.solver.Constraint(1.0, float(N))
+        for variable in self.x:
+            count.SetCoefficient(variable, 1.0)
+        objective = self.solver.Objective()
+        for variable in self.theta:
+            objective.SetCoefficient(variable, 1.0)
+        objective.SetMinimization()
+
+        # Cut pool: one slot per cut row, holding (node, candidates, coefficients, critical distance) or None
+        self.rows, self.cuts, self.slack_rounds, self.free_slots = [], [], [], []
+        self.keys = {}  # (node, critical distance) of every cut in the pool, which fixes all its coefficients
+        self.x_values, self.theta_values = np.zeros(n), np.zeros(n)
+        self.num_added = self.num_dropped = 0
+
+    @property
+    def num_cuts(self):
+        return len(self.keys)
+
+    # Function to switch the open variables between the LP relaxation and the MILP
+    def set_integer(self, integer):
+        for variable in self.x:
+            variable.SetInteger(integer)
+
+    # Function to read the master solution after a solve and age the cuts it leaves slack, dropping stale ones
+    def read_solution(self):
+        self.x_values = np.array([variable.solution_value() for variable in self.x])
+        self.theta_values = np.array([variable.solution_value() for variable in self.theta])
+        for slot, cut in enumerate(self.cuts):
+            if cut is None:
+                continue
+            node, candidates, coefficients, critical = cut
+            slack = self.theta_values[node] + coefficients @ self.x_values[candidates] - critical
+            self.slack_rounds[slot] = self.slack_rounds[slot] + 1 if slack > self.tolerance * max(critical, 1.0) else 0
+            if self.slack_rounds[slot] > self.max_slack_rounds:
+                self.drop(slot)
+
+    # Function to remove a cut: its row is emptied and freed, so it no longer constrains the master
+    def drop(self, slot):
+        node, _, _, critical = self.cuts[slot]
+        self.rows[slot].Clear()
+        self.rows[slot].SetBounds(-self.solver.infinity(), self.solver.infinity())
+        del self.keys[node, critical]
+        self.cuts[slot] = None
+        self.free_slots.append(slot)
+        self.num_dropped += 1
+
+    # Function to add the cuts of a benders_cuts() batch that the current master solution violates
+    # Returns the number of cuts added
+    def add_violated_cuts(self, cut_nodes, cut_candidates, coefficients, critical):
+        activity = self.theta_values + np.bincount(cut_nodes, weights=coefficients * self.x_values[cut_candidates],
+                                                   minlength=self.n)
+        violated = critical - activity > self.tolerance * np.maximum(critical, 1.0)
+        order = np.argsort(cut_nodes, kind='stable')
+        bounds = np.searchsorted(cut_nodes[order], np.arange(self.n + 1))
+
+        added = 0
+        for node in np.nonzero(violated)[0]:
+            key = (int(node), float(critical[node]))
+            if key in self.keys:
+                continue
+            nonzeros = order[bounds[node]:bounds[node + 1]]
+            self.insert(key, cut_candidates[nonzeros], coefficients[nonzeros])
+            added += 1
+        self.num_added += added
+        return added
+
+    # Function to write one cut theta[node] + sum_i coefficients[i] * x[candidates[i]] >= critical into a free row
+    def insert(self, key, candidates, coefficients):
+        if not self.free_slots and len(self.rows) >= self.max_cuts:
+            self.drop(int(np.argmax(self.slack_rounds)))
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            row = self.rows[slot]
+        else:
+            slot = len(self.rows)
+            row = self.solver.Constraint(0.0, self.solver.infinity())
+            self.rows.append(row)
+            self.cuts.append(None)
+            self.slack_rounds.append(0)
+
+        node, critical = key
+        row.SetBounds(critical, self.solver.infinity())
+        row.SetCoefficient(self.theta[node], 1.0)
+        for candidate, coefficient in zip(candidates.tolist(), coefficients.tolist()):
+            row.SetCoefficient(self.x[candidate], coefficient)
+        self.cuts[slot] = (node, candidates, coefficients, critical)
+        self.slack_rounds[slot] = 0
+        self.keys[key] = slot
+
+
+# Function to solve p-median by Benders decomposition
+# The master only holds the n open variables and n cost variables; the n * n assignment variables of the
+# compact model are never built, and each round's cuts come from one vectorized pass over the distance rows.
+# Phase 1 solves the LP relaxation of the master until its bound stalls (cheap cuts for a strong start),
+# phase 2 the MILP master until its bound meets the best placement. Every master solution is also rounded to
+# N centers and polished by medoid moves for the upper bound, and the violated cuts of that placement are added
+# too. The cut pool holds at most `max_cuts` rows (default 10 * n, a tenth of the compact model's n * n rows)
+# Returns a dict with centers (rows), objective, lower_bound, gap, iterations, cuts (in the pool at the end),
+# cuts_added, cuts_dropped and seconds
+def benders_p_median(distances, N, solver_settings, gap_tolerance=1e-4, max_iterations=100, lp_iterations=50,
+                     max_cuts=None, max_slack_rounds=5, log=print):
+    start = time.perf_counter()
+    distances = dense_distances(distances, distances.shape[0])
+    n = len(distances)
+    master = BendersMaster(n, N, solver_settings, max_cuts or 10 * n, max_slack_rounds)
+
+    # Function to add the violated cuts of a placement and return its objective
+    def cut_placement(centers):
+        x_values = np.zeros(n)
+        x_values[centers] = 1.0
+        added = master.add_violated_cuts(*benders_cuts(distances, x_values))
+        return float(nearest_center_distances(distances, centers).sum()), added
+
+    best_centers, _ = heuristic_p_median(distances, N)
+    best_objective, _ = cut_placement(best_centers)
+    lower_bound = 0.0
+
+    # Function to round master values to N centers, improve them and cut the result
+    def round_and_cut(x_values):
+        nonlocal best_centers, best_objective
+        centers = improve_centers(distances, np.argsort(-x_values, kind='stable')[:N].tolist(),
+                                  lambda costs: costs.sum(axis=1))
+        objective, added = cut_placement(centers)
+        if objective < best_objective:
+            best_centers, best_objective = centers, objective
+        return added
+
+    iteration = 0
+    phase = "LP"
+    for iteration in range(1, max_iterations + 1):
+        integer = phase == "MILP"
+        if integer:
+            hint_values = np.zeros(2 * n)
+            hint_values[best_centers] = 1.0
+            hint_values[n:] = distances[best_centers].min(axis=0)
+            master.solver.SetHint(master.x + master.theta, hint_values.tolist())
+        result = solve(master.solver, solver_settings)
+        if not result.has_solution:
+            log(f"Benders master stopped without a solution ({result.status_name})")
+            break
+
+        master.read_solution()
+        previous_bound = lower_bound
+        lower_bound = max(lower_bound, result.bound if integer else result.objective)
+
+        added = master.add_violated_cuts(*benders_cuts(distances, master.x_values))
+        added += round_and_cut(master.x_values)
+
+        gap = max(best_objective - lower_bound, 0.0) / best_objective if best_objective > 0 else 0.0
+        log(f"Benders {phase} round {iteration}: lower bound {lower_bound:.6g}, best placement {best_objective:.6g}, "
+            f"gap {gap:.3%}, {added} cuts added, {master.num_cuts} in the pool")
+        if gap <= gap_tolerance:
+            break
+        if integer and added == 0:
+            log("Benders master solution violates no cut; the gap left is the master solver's own")
+            break
+        if not integer and (added == 0 or iteration >= lp_iterations
+                            or lower_bound - previous_bound <= 1e-6 * best_objective):
+            phase = "MILP"
+            master.set_integer(True)
+
+    return {
+        'centers': [int(center) for center in best_centers],
+        'objective': best_objective,
+        'lower_bound': lower_bound,
+        'gap': max(best_objective - lower_bound, 0.0) / best_objective if best_objective > 0 else 0.0,
+        'iterations': iteration,
+        'cuts': master.num_cuts,
+        'cuts_added': master.num_added,
+        'cuts_dropped': master.num_dropped,
+        'seconds': time.perf_counter() - start,
+    }
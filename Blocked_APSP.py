@@ -0,0 +1,86 @@
+import os
+import json
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+from Distance_Matrix import write_matrix_sidecar
+
+
+# Function to get the path of the file that records which row blocks are already written
+def checkpoint_path(matrix_path):
+    return os.path.splitext(matrix_path)[0] + "_checkpoint.json"
+
+
+# Function to get the path the matrix is written to until every block is done
+# The final name only appears on completion, so a half-written matrix is never picked up as a cached table
+def partial_path(matrix_path):
+    return os.path.splitext(matrix_path)[0] + "_partial.npy"
+
+
+# Function to write the checkpoint atomically, so a kill mid-write cannot corrupt it
+def _write_checkpoint(path, settings, completed_blocks):
+    temporary_path = path + ".tmp"
+    with open(temporary_path, 'w') as f:
+        json.dump({'settings': settings, 'completed_blocks': sorted(completed_blocks)}, f)
+    os.replace(temporary_path, path)
+
+
+# Function to compute the all-pairs distance matrix in row blocks straight into a memory-mapped .npy file
+# Only one block of rows is in RAM at a time. Every finished block is flushed and checkpointed, so a killed
+# run started again with the same arguments resumes at the first unfinished block instead of starting over
+# With `predecessors`, the int32 predecessor matrix (-1 where there is none) is written instead of the distances
+def blocked_all_pairs_dijkstra(indptr, indices, weights, matrix_path, nodes, block_size=1024, dtype=np.float32,
+                               metadata=None, predecessors=False):
+    n = len(nodes)
+    num_blocks = (n + block_size - 1) // block_size
+    if predecessors:
+        dtype = np.int32
+    settings = {'n': n, 'block_size': block_size, 'dtype': np.dtype(dtype).name, 'metadata': metadata or {}}
+
+    checkpoint = checkpoint_path(matrix_path)
+    partial = partial_path(matrix_path)
+
+    completed_blocks = set()
+    if os.path.exists(checkpoint) and os.path.exists(partial):
+        with open(checkpoint, 'r') as f:
+            state = json.load(f)
+        if state['settings'] == settings:
+            completed_blocks = set(state['completed_blocks'])
+            print(f"Resuming from checkpoint: {len(completed_blocks)}/{num_blocks} blocks already written.")
+        else:
+            print("Checkpoint was written with different settings, starting over.")
+
+    if completed_blocks:
+        matrix = np.lib.format.open_memmap(partial, mode='r+')
+    else:
+        matrix = np.lib.format.open_memmap(partial, mode='w+', dtype=dtype, shape=(n, n))
+        _write_checkpoint(checkpoint, settings, completed_blocks)
+
+    adjacency = csr_matrix((weights, indices, indptr), shape=(n, n))
+
+    for block in range(num_blocks):
+        if block in completed_blocks:
+            continue
+
+        start = block * block_size
+        stop = min(start + block_size, n)
+        if predecessors:
+            _, rows = csgraph_dijkstra(adjacency, directed=True, indices=np.arange(start, stop),
+                                       return_predecessors=True)
+            rows[rows < 0] = -1
+            matrix[start:stop] = rows
+        else:
+            matrix[start:stop] = csgraph_dijkstra(adjacency, directed=True, indices=np.arange(start, stop))
+        matrix.flush()
+
+        completed_blocks.add(block)
+        _write_checkpoint(checkpoint, settings, completed_blocks)
+        print(f"Completed block {len(completed_blocks)}/{num_blocks} (rows {start}-{stop - 1}).")
+
+    # Close the memory map before renaming the file (required on Windows)
+    del matrix
+
+    write_matrix_sidecar(matrix_path, nodes, dtype, metadata)
+    os.replace(partial, matrix_path)
+    os.remove(checkpoint)
+    return matrix_path
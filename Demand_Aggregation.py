@@ -0,0 +1,97 @@
+import time
+import numpy as np
+from MILP_Builder import build_placement_model, dense_distances
+from Placement_Heuristics import heuristic_k_center, improve_centers
+from Presolve import presolve_assignments
+from Solver_Backend import solve
+
+
+# Demand points clustered into weighted representatives
+#   representatives - row of every representative node
+#   assignment      - index into representatives for every node
+#   weights         - total demand of every cluster
+#   error           - sum over nodes of demand * distance to the representative (the aggregation error bound)
+#   max_error       - largest distance from a node to its representative
+class DemandAggregation:
+    def __init__(self, representatives, assignment, weights, error, max_error):
+        self.representatives = representatives
+        self.assignment = assignment
+        self.weights = weights
+        self.error = error
+        self.max_error = max_error
+
+    # Function to build the reduced cost matrix: n candidate rows x m representative columns, every column
+    # scaled by its cluster's demand
+    def reduced_distances(self, distances):
+        return distances[:, self.representatives] * self.weights[None, :]
+
+    def report(self):
+        return (f"Aggregated {len(self.assignment)} demand nodes into {len(self.representatives)} representatives: "
+                f"error bound {self.error:.6g}, largest node-to-representative distance {self.max_error:.6g}")
+
+
+# Function to cluster the demand nodes by graph distance into `num_representatives` weighted representatives
+# Farthest-first seeding spreads the representatives out, then every one moves to the demand-weighted medoid
+# of its cluster, which lowers the error bound sum_j w[j] * d(r(j), j)
+def aggregate_demand(distances, num_representatives, demand=None):
+    distances = dense_distances(distances, distances.shape[0])
+    n = len(distances)
+    demand = np.ones(n) if demand is None else np.asarray(demand, dtype=np.float64)
+
+    seeds, _ = heuristic_k_center(distances, num_representatives)
+    weighted = distances * demand[None, :]
+    representatives = np.array(improve_centers(weighted, seeds, lambda costs: costs.sum(axis=1)), dtype=np.int64)
+
+    assignment = np.argmin(distances[representatives], axis=0)
+    to_representative = distances[representatives[assignment], np.arange(n)]
+    weights = np.bincount(assignment, weights=demand, minlength=len(representatives))
+    return DemandAggregation(representatives, assignment, weights, float((demand * to_representative).sum()),
+                             float(to_representative.max()))
+
+
+# Function to solve the p-median on aggregated demand and score the placement on the full graph
+# The reduced MILP has n candidate centers but only m demand columns (m * n assignment variables instead of
+# n * n). With E the aggregation error, every placement's full cost is within E of its reduced cost (triangle
+# inequality), so the full optimum lies in [reduced bound - E, full cost of the placement found]
+# The bound only holds when `distances` is a symmetric metric such as shortest-path distances: pass the plain
+# matrix with the node weights as `demand`, never a matrix already scaled by demand (see Population_Weights.py)
+# Returns a dict with centers (rows), full_objective, reduced_objective, lower_bound, error, guaranteed_gap,
+# status and seconds
+def solve_aggregated(distances, nodes, N, num_representatives, solver_settings, demand=None, presolve=True,
+                     log=print):
+    start = time.perf_counter()
+    distances = dense_distances(distances, len(nodes))
+    demand = np.ones(len(nodes)) if demand is None else np.asarray(demand, dtype=np.float64)
+
+    aggregation = aggregate_demand(distances, num_representatives, demand)
+    log(aggregation.report())
+    reduced = aggregation.reduced_distances(distances)
+
+    assignment_mask = None
+    if presolve:
+        assignment_mask, presolve_report = presolve_assignments(reduced, N, "p_median")
+        log(presolve_report)
+
+    model = build_placement_model(reduced, nodes, N, objective="p_median", assignment_mask=assignment_mask,
+                                  solver_name=solver_settings.name, demand_rows=aggregation.representatives)
+    log(model.report())
+    result = solve(model.solver, solver_settings)
+    if not result.has_solution:
+        raise ValueError(f"The aggregated model has no solution ({result.status_name}).")
+
+    centers = [k for k in range(len(nodes)) if model.x.variables[k].solution_value() > 0.5]
+    full_objective = float((demand * distances[centers].min(axis=0)).sum())
+    lower_bound = max(result.bound - aggregation.error, 0.0)
+    summary = {
+        'centers': centers,
+        'full_objective': full_objective,
+        'reduced_objective': result.objective,
+        'lower_bound': lower_bound,
+        'error': aggregation.error,
+        'guaranteed_gap': (full_objective - lower_bound) / full_objective if full_objective > 0 else 0.0,
+        'status': result.status_name,
+        'seconds': time.perf_counter() - start,
+    }
+    log(f"Aggregated placement: full-graph total {full_objective:.6g} (reduced {result.objective:.6g}), "
+        f"optimum at least {lower_bound:.6g}, so within {summary['guaranteed_gap']:.3%} of optimal")
+    return summary
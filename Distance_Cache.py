@@ -0,0 +1,289 @@
+import os
+import hashlib
+import inspect
+import numpy as np
+from scipy.sparse import csr_matrix
+from Distance_Matrix import (save_distance_matrix, load_distance_matrix, save_predecessor_matrix,
+                             load_predecessor_matrix, read_matrix_metadata, save_sparse_distance_matrix,
+                             load_sparse_distance_matrix)
+from Blocked_APSP import blocked_all_pairs_dijkstra
+from Geo_Utils import add_edge_weights_to_graph
+from Graph_Cache import load_graph
+from Landmark_Oracle import LandmarkOracle, select_landmarks, landmark_distances, approximation_error
+from Latency_Metrics import (ROUTER_PENALTY_MS, FIBER_ROUTE_FACTOR, latency_metric_names,
+                             multi_metric_shortest_paths)
+from Shortest_Paths import graph_to_csr, csgraph_shortest_paths
+
+
+# Folder holding the content-addressed distance tables
+cache_folder_path = "MainFolder/Datasets/ShortestDistances/cache"
+
+
+# Function to identify an edge-weighting function by its name and the source of its module
+# Any edit to the weighting code (e.g. the haversine formula) therefore changes the hash
+def weighting_fingerprint(add_edge_weights):
+    module = inspect.getmodule(add_edge_weights)
+    try:
+        source = inspect.getsource(module) if module is not None else inspect.getsource(add_edge_weights)
+    except (OSError, TypeError):
+        source = ""
+    return f"{add_edge_weights.__module__}.{add_edge_weights.__qualname__}\n{source}"
+
+
+# Function to hash the GML content together with the edge-weighting function
+# The content hash comes from the graph cache, so an unchanged GML is not re-read
+def graph_hash(file_path, add_edge_weights=add_edge_weights_to_graph):
+    digest = hashlib.sha256()
+    digest.update(load_graph(file_path).source_hash.encode('utf-8'))
+    digest.update(weighting_fingerprint(add_edge_weights).encode('utf-8'))
+    return digest.hexdigest()
+
+
+# Function to hash a graph hash together with the latency-model parameters
+def latency_hash(key, router_penalty_ms=ROUTER_PENALTY_MS, fiber_route_factor=FIBER_ROUTE_FACTOR):
+    digest = hashlib.sha256(key.encode('utf-8'))
+    digest.update(f"latency {router_penalty_ms!r} {fiber_route_factor!r}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+# Function to get the cache paths of the distance and predecessor matrices for one graph hash
+# The latency-model metrics share one predecessor matrix (their common minimum-latency routes)
+def cached_matrix_paths(key, dtype=np.float32, cache_folder=cache_folder_path, metric="distance_km"):
+    if metric == "distance_km":
+        distances_path = os.path.join(cache_folder, f"{key}_distances_{np.dtype(dtype).name}.npy")
+        predecessors_path = os.path.join(cache_folder, f"{key}_predecessors.npy")
+    else:
+        distances_path = os.path.join(cache_folder, f"{key}_{metric}_{np.dtype(dtype).name}.npy")
+        predecessors_path = os.path.join(cache_folder, f"{key}_latency_predecessors.npy")
+    return distances_path, predecessors_path
+
+
+# Function to check that a stored matrix was built from this exact GML and weighting function
+# Raises ValueError for a stale or mismatched table instead of letting it be used
+def verify_distance_matrix(matrix_path, file_path, add_edge_weights=add_edge_weights_to_graph):
+    metadata = read_matrix_metadata(matrix_path)
+    key = graph_hash(file_path, add_edge_weights)
+    if metadata.get('graph_hash') != key:
+        raise ValueError(f"Distance table {matrix_path} was not built from {file_path} "
+                         f"(table hash {metadata.get('graph_hash')}, graph hash {key}).")
+
+
+# Function to look up the cached distance matrix of a GML file; returns None on a cache miss
+def lookup_distance_matrix(file_path, add_edge_weights=add_edge_weights_to_graph, dtype=np.float32,
+                           cache_folder=cache_folder_path):
+    key = graph_hash(file_path, add_edge_weights)
+    distances_path, _ = cached_matrix_paths(key, dtype, cache_folder)
+    if not os.path.exists(distances_path):
+        return None
+
+    verify_distance_matrix(distances_path, file_path, add_edge_weights)
+    return load_distance_matrix(distances_path)
+
+
+# Function to store a distance matrix (and optionally its predecessor matrix) under the graph hash
+def store_distance_matrix(file_path, distances, nodes, predecessors=None, add_edge_weights=add_edge_weights_to_graph,
+                          dtype=np.float32, cache_folder=cache_folder_path):
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+
+    key = graph_hash(file_path, add_edge_weights)
+    metadata = {'graph_hash': key, 'source_file': os.path.basename(file_path)}
+    distances_path, predecessors_path = cached_matrix_paths(key, dtype, cache_folder)
+
+    save_distance_matrix(distances_path, distances, nodes, dtype=dtype, metadata=metadata)
+    if predecessors is not None:
+        save_predecessor_matrix(predecessors_path, predecessors, nodes, metadata=metadata)
+    return distances_path
+
+
+# Function to compute only the predecessor matrix of a graph whose distance matrix is already cached, out of
+# core like store_blocked_distance_matrix(): row blocks go straight to the cache file and a killed run resumes
+def store_blocked_predecessor_matrix(file_path, G, nodes, block_size=1024,
+                                     add_edge_weights=add_edge_weights_to_graph, dtype=np.float32,
+                                     cache_folder=cache_folder_path):
+    key = graph_hash(file_path, add_edge_weights)
+    metadata = {'graph_hash': key, 'source_file': os.path.basename(file_path)}
+    _, predecessors_path = cached_matrix_paths(key, dtype, cache_folder)
+
+    indptr, indices, weights = graph_to_csr(G, nodes)
+    return blocked_all_pairs_dijkstra(indptr, indices, weights, predecessors_path, nodes, block_size,
+                                      metadata=metadata, predecessors=True)
+
+
+# Function to compute a distance matrix out of core, block by block, straight into its cache file
+# A killed run resumes from the last checkpointed block when called again for the same GML
+def store_blocked_distance_matrix(file_path, G, nodes, block_size=1024, add_edge_weights=add_edge_weights_to_graph,
+                                  dtype=np.float32, cache_folder=cache_folder_path):
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+
+    key = graph_hash(file_path, add_edge_weights)
+    metadata = {'graph_hash': key, 'source_file': os.path.basename(file_path)}
+    distances_path, _ = cached_matrix_paths(key, dtype, cache_folder)
+
+    indptr, indices, weights = graph_to_csr(G, nodes)
+    return blocked_all_pairs_dijkstra(indptr, indices, weights, distances_path, nodes, block_size, dtype, metadata)
+
+
+# Function to get the matrices of one latency-model metric, computing them only on a cache miss
+# A miss computes and stores every latency-model metric at once, so switching metric later is a cache hit
+def cached_latency_paths(file_path, metric="latency_ms", router_penalty_ms=ROUTER_PENALTY_MS,
+                         fiber_route_factor=FIBER_ROUTE_FACTOR, add_edge_weights=add_edge_weights_to_graph,
+                         dtype=np.float32, cache_folder=cache_folder_path):
+    if metric not in latency_metric_names:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    key = graph_hash(file_path, add_edge_weights)
+    model_key = latency_hash(key, router_penalty_ms, fiber_route_factor)
+    distances_path, predecessors_path = cached_matrix_paths(model_key, dtype, cache_folder, metric)
+
+    if os.path.exists(distances_path) and os.path.exists(predecessors_path):
+        verify_distance_matrix(distances_path, file_path, add_edge_weights)
+        verify_distance_matrix(predecessors_path, file_path, add_edge_weights)
+        print(f"Using cached {metric} table for {file_path}")
+    else:
+        print(f"No cached {metric} table for {file_path}, computing the latency model")
+        if not os.path.exists(cache_folder):
+            os.makedirs(cache_folder)
+
+        G = load_graph(file_path).graph
+        add_edge_weights(G)
+        nodes = list(G.nodes())
+        metrics, predecessors = multi_metric_shortest_paths(*graph_to_csr(G, nodes), router_penalty_ms,
+                                                            fiber_route_factor)
+
+        metadata = {'graph_hash': key, 'source_file': os.path.basename(file_path),
+                    'router_penalty_ms': router_penalty_ms, 'fiber_route_factor': fiber_route_factor}
+        for name in latency_metric_names:
+            metric_path, _ = cached_matrix_paths(model_key, dtype, cache_folder, name)
+            save_distance_matrix(metric_path, metrics[name], nodes, dtype=dtype, metadata=dict(metadata, metric=name))
+        save_predecessor_matrix(predecessors_path, predecessors, nodes, metadata=metadata)
+
+    distances, nodes, node_index = load_distance_matrix(distances_path)
+    predecessors, _, _ = load_predecessor_matrix(predecessors_path)
+    return distances, predecessors, nodes, node_index
+
+
+# Function to get the distance and predecessor matrices of a GML file, computing them only on a cache miss
+# `metric` is "distance_km" (shortest haversine km) or one of the latency-model metrics in Latency_Metrics.py
+# Returns (distances, predecessors, nodes, node_index) with both matrices memory-mapped
+def cached_shortest_paths(file_path, add_edge_weights=add_edge_weights_to_graph, dtype=np.float32,
+                          cache_folder=cache_folder_path, metric="distance_km"):
+    if metric != "distance_km":
+        return cached_latency_paths(file_path, metric, add_edge_weights=add_edge_weights, dtype=dtype,
+                                    cache_folder=cache_folder)
+
+    key = graph_hash(file_path, add_edge_weights)
+    distances_path, predecessors_path = cached_matrix_paths(key, dtype, cache_folder)
+
+    if os.path.exists(distances_path) and os.path.exists(predecessors_path):
+        verify_distance_matrix(distances_path, file_path, add_edge_weights)
+        verify_distance_matrix(predecessors_path, file_path, add_edge_weights)
+        print(f"Using cached distance table for {file_path}")
+    elif os.path.exists(distances_path):
+        # Tables precomputed without paths (e.g. by the blocked or parallel backends of
+        # Make_Tables_dijkstra_distances.py): keep the cached distances and compute only the predecessors,
+        # block by block into their cache file, so no dense all-pairs result is ever held in RAM
+        verify_distance_matrix(distances_path, file_path, add_edge_weights)
+        print(f"Using cached distance table for {file_path}, computing its missing predecessor matrix")
+        _, nodes, _ = load_distance_matrix(distances_path)
+        G = load_graph(file_path).graph
+        add_edge_weights(G)
+        store_blocked_predecessor_matrix(file_path, G, nodes, add_edge_weights=add_edge_weights, dtype=dtype,
+                                         cache_folder=cache_folder)
+    else:
+        print(f"No cached distance table for {file_path}, computing it")
+        G = load_graph(file_path).graph
+        add_edge_weights(G)
+        nodes = list(G.nodes())
+        distances, predecessors = csgraph_shortest_paths(*graph_to_csr(G, nodes))
+        store_distance_matrix(file_path, distances, nodes, predecessors, add_edge_weights, dtype, cache_folder)
+
+    distances, nodes, node_index = load_distance_matrix(distances_path)
+    predecessors, _, _ = load_predecessor_matrix(predecessors_path)
+    return distances, predecessors, nodes, node_index
+
+
+# Function to get the cache path of a sparse (k-nearest and/or radius) distance table for one graph hash
+def sparse_matrix_path(key, k=None, radius=None, cache_folder=cache_folder_path):
+    parts = [key, "sparse"]
+    if k is not None:
+        parts.append(f"k{k}")
+    if radius is not None:
+        parts.append(f"r{radius:g}")
+    return os.path.join(cache_folder, "_".join(parts) + ".npz")
+
+
+# Function to look up the cached sparse distance table of a GML file; returns None on a cache miss
+# Returns (table, nodes, node_index, metadata) on a hit
+def lookup_sparse_distance_matrix(file_path, k=None, radius=None, add_edge_weights=add_edge_weights_to_graph,
+                                  cache_folder=cache_folder_path):
+    key = graph_hash(file_path, add_edge_weights)
+    matrix_path = sparse_matrix_path(key, k, radius, cache_folder)
+    if not os.path.exists(matrix_path):
+        return None
+
+    verify_distance_matrix(matrix_path, file_path, add_edge_weights)
+    return load_sparse_distance_matrix(matrix_path)
+
+
+# Function to store a sparse distance table under the graph hash
+def store_sparse_distance_matrix(file_path, table, nodes, k=None, radius=None,
+                                 add_edge_weights=add_edge_weights_to_graph, cache_folder=cache_folder_path):
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+
+    key = graph_hash(file_path, add_edge_weights)
+    metadata = {'graph_hash': key, 'source_file': os.path.basename(file_path), 'k': k, 'radius': radius}
+    matrix_path = sparse_matrix_path(key, k, radius, cache_folder)
+    save_sparse_distance_matrix(matrix_path, table, nodes, metadata=metadata)
+    return matrix_path
+
+
+# Function to get the cache path of the landmark tables for one graph hash
+def landmark_table_path(key, num_landmarks, seed, cache_folder=cache_folder_path):
+    return os.path.join(cache_folder, f"{key}_landmarks_L{num_landmarks}_s{seed}.npz")
+
+
+# Function to get a landmark distance oracle of a GML file, computing its L x n tables only on a cache miss
+# Returns (oracle, predecessors, nodes, node_index) so it drops in for cached_shortest_paths(); the
+# predecessors are computed per source on demand. With `report_pairs` > 0, also prints the approximation error
+# on that many random pairs (off by default: it runs exact Dijkstra searches, costly on the graphs the oracle is for)
+def cached_landmark_oracle(file_path, num_landmarks=16, mode="lower", seed=0, report_pairs=0,
+                           add_edge_weights=add_edge_weights_to_graph, cache_folder=cache_folder_path):
+    key = graph_hash(file_path, add_edge_weights)
+    table_path = landmark_table_path(key, num_landmarks, seed, cache_folder)
+
+    G = load_graph(file_path).graph
+    add_edge_weights(G)
+    nodes = list(G.nodes())
+    indptr, indices, weights = graph_to_csr(G, nodes)
+
+    if os.path.exists(table_path):
+        with np.load(table_path) as cached:
+            if str(cached['graph_hash']) != key:
+                raise ValueError(f"Landmark table {table_path} was not built from {file_path}.")
+            landmarks, from_landmarks, to_landmarks = (cached['landmarks'], cached['from_landmarks'],
+                                                       cached['to_landmarks'])
+        print(f"Using cached landmark table for {file_path}")
+    else:
+        print(f"No cached landmark table for {file_path}, computing {num_landmarks} landmarks")
+        if not os.path.exists(cache_folder):
+            os.makedirs(cache_folder)
+
+        adjacency = csr_matrix((weights, indices, indptr), shape=(len(nodes), len(nodes)))
+        landmarks = select_landmarks(adjacency, num_landmarks, seed)
+        from_landmarks, to_landmarks = landmark_distances(adjacency, landmarks)
+        np.savez(table_path, landmarks=landmarks, from_landmarks=from_landmarks, to_landmarks=to_landmarks,
+                 graph_hash=np.array(key))
+
+    oracle = LandmarkOracle(indptr, indices, weights, landmarks, from_landmarks, to_landmarks, mode)
+    if report_pairs:
+        error = approximation_error(oracle, num_pairs=report_pairs, seed=seed)
+        print(f"Landmark oracle ({len(landmarks)} landmarks, mode {mode}) on {error['pairs']} sampled pairs: "
+              f"lower bound error mean {error['lower_mean_error']:.2%} / max {error['lower_max_error']:.2%}, "
+              f"upper bound error mean {error['upper_mean_error']:.2%} / max {error['upper_max_error']:.2%}, "
+              f"A* max difference {error['astar_max_difference']:.3g}")
+
+    node_index = {node: k for k, node in enumerate(nodes)}
+    return oracle, oracle.predecessors, nodes, node_index
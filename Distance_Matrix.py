@@ -0,0 +1,109 @@
+import os
+import json
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+# Function to get the path of the node-index sidecar stored next to a distance matrix
+def node_index_path(matrix_path):
+    return os.path.splitext(matrix_path)[0] + "_nodes.json"
+
+
+# Function to store a dense distance matrix as .npy plus a small node-index sidecar
+# Row/column k of the matrix belongs to nodes[k]; use float64 if full precision is needed
+# `metadata` (e.g. the graph hash from Distance_Cache) is stored in the sidecar as well
+def save_distance_matrix(matrix_path, distances, nodes, dtype=np.float32, metadata=None):
+    distances = np.asarray(distances, dtype=dtype)
+    if distances.shape != (len(nodes), len(nodes)):
+        raise ValueError(f"Matrix shape {distances.shape} does not match {len(nodes)} nodes.")
+
+    np.save(matrix_path, distances)
+    write_matrix_sidecar(matrix_path, nodes, distances.dtype, metadata)
+
+
+# Function to write the node-index sidecar of a matrix (node list, dtype and any extra metadata)
+def write_matrix_sidecar(matrix_path, nodes, dtype, metadata=None):
+    sidecar = dict(metadata or {})
+    sidecar.update({'nodes': list(nodes), 'dtype': np.dtype(dtype).name})
+
+    with open(node_index_path(matrix_path), 'w') as f:
+        json.dump(sidecar, f)
+
+
+# Function to open a stored distance matrix as a read-only memory map
+# Loading is O(1); rows are only read from disk when they are indexed
+def load_distance_matrix(matrix_path):
+    distances = np.load(matrix_path, mmap_mode='r')
+    with open(node_index_path(matrix_path), 'r') as f:
+        nodes = json.load(f)['nodes']
+
+    if distances.shape != (len(nodes), len(nodes)):
+        raise ValueError(f"Matrix {matrix_path} does not match its node-index sidecar.")
+
+    node_index = {node: k for k, node in enumerate(nodes)}
+    return distances, nodes, node_index
+
+
+# Function to read the sidecar of a stored matrix (node list, dtype and any extra metadata)
+def read_matrix_metadata(matrix_path):
+    with open(node_index_path(matrix_path), 'r') as f:
+        return json.load(f)
+
+
+# Function to convert an old all_shortest_distances*.json table into the binary format
+# Works for both the plain table and the "with_nodes" table that also holds paths
+def convert_json_to_matrix(json_file_path, matrix_path, dtype=np.float32):
+    with open(json_file_path, 'r') as f:
+        precomputed_data = json.load(f)
+
+    keys = list(precomputed_data)
+    nodes = [int(key) if key.lstrip('-').isdigit() else key for key in keys]
+    key_index = {key: k for k, key in enumerate(keys)}
+
+    distances = np.full((len(keys), len(keys)), np.inf, dtype=dtype)
+    for key, row in precomputed_data.items():
+        if 'distances' in row:
+            row = row['distances']
+        for target, distance in row.items():
+            distances[key_index[key], key_index[target]] = distance
+
+    save_distance_matrix(matrix_path, distances, nodes, dtype=dtype)
+    return matrix_path
+
+
+# Function to store an n x n predecessor matrix (int32, -1 where there is no predecessor)
+# predecessors[s, t] is the row of the node before t on the shortest path from s
+def save_predecessor_matrix(matrix_path, predecessors, nodes, metadata=None):
+    save_distance_matrix(matrix_path, predecessors, nodes, dtype=np.int32, metadata=metadata)
+
+
+# Function to open a stored predecessor matrix as a read-only memory map
+def load_predecessor_matrix(matrix_path):
+    return load_distance_matrix(matrix_path)
+
+
+# Function to store a sparse (CSR) distance table as .npz plus a node-index sidecar
+# Only the stored pairs are kept; see Sparse_Distances.py for how missing pairs are answered
+def save_sparse_distance_matrix(matrix_path, table, nodes, metadata=None):
+    if table.shape != (len(nodes), len(nodes)):
+        raise ValueError(f"Table shape {table.shape} does not match {len(nodes)} nodes.")
+
+    sidecar = dict(metadata or {})
+    sidecar.update({'nodes': list(nodes), 'dtype': table.dtype.name, 'format': 'csr'})
+
+    np.savez(matrix_path, indptr=table.indptr, indices=table.indices, data=table.data)
+    with open(node_index_path(matrix_path), 'w') as f:
+        json.dump(sidecar, f)
+
+
+# Function to load a sparse (CSR) distance table; returns (table, nodes, node_index, metadata)
+def load_sparse_distance_matrix(matrix_path):
+    with open(node_index_path(matrix_path), 'r') as f:
+        metadata = json.load(f)
+    nodes = metadata['nodes']
+
+    with np.load(matrix_path) as arrays:
+        table = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=(len(nodes), len(nodes)))
+
+    node_index = {node: k for k, node in enumerate(nodes)}
+    return table, nodes, node_index, metadata
@@ -0,0 +1,117 @@
+import numpy as np
+from Shortest_Paths import graph_to_csr, csgraph_shortest_paths
+
+
+# A change set is a list of tuples, applied in order:
+#   ("add_edge", u, v, weight)      insert a new link
+#   ("remove_edge", u, v)           delete a link
+#   ("set_weight", u, v, weight)    change the weight of an existing link
+#   ("remove_node", u)              delete a node and all its links
+
+
+# Function to lower D/P after the weight of edge a-b dropped to `weight` (or the edge was inserted)
+# Only rows that can reach b cheaper through a, and columns reachable cheaper from b, are touched
+def _relax_edge(distances, predecessors, a, b, weight):
+    for s_side, t_side in ((a, b), (b, a)):
+        rows = np.nonzero(distances[:, s_side] + weight < distances[:, t_side])[0]
+        cols = np.nonzero(weight + distances[t_side, :] < distances[s_side, :])[0]
+        if len(rows) == 0 or len(cols) == 0:
+            continue
+
+        via_edge = distances[rows, s_side][:, None] + weight + distances[t_side, cols][None, :]
+        block = np.ix_(rows, cols)
+        improved = via_edge < distances[block]
+
+        # The predecessor of t on the new path is its predecessor on the t_side -> t path
+        pred_from_edge = predecessors[t_side, cols].copy()
+        pred_from_edge[cols == t_side] = s_side
+
+        distances[block] = np.where(improved, via_edge, distances[block])
+        predecessors[block] = np.where(improved, pred_from_edge[None, :], predecessors[block])
+
+
+# Function to find the source rows whose shortest-path tree uses the edge a-b
+def _rows_using_edge(predecessors, a, b):
+    return np.nonzero((predecessors[:, b] == a) | (predecessors[:, a] == b))[0]
+
+
+# Function to apply a change set to the graph and update the distance and predecessor matrices in place
+# Increases/deletions recompute only the affected rows; decreases/insertions relax the matrices directly
+# Returns (distances, predecessors, nodes, recomputed_rows); removed nodes are dropped from the matrices
+def apply_changes(G, nodes, distances, predecessors, changes):
+    node_index = {node: k for k, node in enumerate(nodes)}
+    distances = np.array(distances, dtype=np.float64)
+    predecessors = np.array(predecessors, dtype=np.int32)
+
+    affected_rows = set()
+    decreases = []
+    removed_nodes = []
+
+    # Phase 1: apply every change to the graph; record which rows become invalid
+    for change in changes:
+        kind = change[0]
+        if kind == "remove_node":
+            node = change[1]
+            x = node_index[node]
+            affected_rows.update(np.nonzero((predecessors == x).any(axis=1))[0].tolist())
+            G.remove_edges_from(list(G.edges(node)))
+            removed_nodes.append(node)
+            continue
+
+        u, v = change[1], change[2]
+        a, b = node_index[u], node_index[v]
+        old_weight = G[u][v]['weight'] if G.has_edge(u, v) else float('inf')
+
+        if kind == "remove_edge":
+            if not G.has_edge(u, v):
+                raise ValueError(f"Edge {u}-{v} does not exist.")
+            G.remove_edge(u, v)
+            affected_rows.update(_rows_using_edge(predecessors, a, b).tolist())
+        elif kind in ("add_edge", "set_weight"):
+            new_weight = float(change[3])
+            if kind == "set_weight" and not G.has_edge(u, v):
+                raise ValueError(f"Edge {u}-{v} does not exist.")
+            G.add_edge(u, v, weight=new_weight)
+            if new_weight > old_weight:
+                affected_rows.update(_rows_using_edge(predecessors, a, b).tolist())
+            elif new_weight < old_weight:
+                decreases.append((u, v))
+        else:
+            raise ValueError(f"Unknown change type: {kind}")
+
+    # Removed nodes also need their own row cleared
+    for node in removed_nodes:
+        affected_rows.add(node_index[node])
+
+    # Phase 2: recompute the invalidated rows against the graph without the pending decreases
+    pending = {(u, v): G[u][v]['weight'] for u, v in decreases if G.has_edge(u, v)}
+    for (u, v) in pending:
+        G.remove_edge(u, v)
+
+    recomputed_rows = np.array(sorted(affected_rows), dtype=np.int64)
+    if len(recomputed_rows):
+        indptr, indices, weights = graph_to_csr(G, nodes)
+        row_distances, row_predecessors = csgraph_shortest_paths(indptr, indices, weights, sources=recomputed_rows)
+        distances[recomputed_rows] = row_distances
+        predecessors[recomputed_rows] = row_predecessors
+        # The graph is undirected, so the matching columns change the same way
+        # (rows outside the set keep a valid tree, since it never used a changed edge)
+        distances[:, recomputed_rows] = row_distances.T
+
+    # Phase 3: re-insert the decreased edges one at a time with the vectorized relaxation
+    for (u, v), weight in pending.items():
+        G.add_edge(u, v, weight=weight)
+        _relax_edge(distances, predecessors, node_index[u], node_index[v], weight)
+
+    # Drop removed nodes from the matrices and remap the predecessor indices
+    if removed_nodes:
+        keep = np.ones(len(nodes), dtype=bool)
+        keep[[node_index[node] for node in removed_nodes]] = False
+        remap = np.full(len(nodes) + 1, -1, dtype=np.int32)
+        remap[:-1][keep] = np.arange(keep.sum(), dtype=np.int32)
+        distances = distances[np.ix_(keep, keep)]
+        predecessors = remap[predecessors[np.ix_(keep, keep)]]
+        nodes = [node for node, kept in zip(nodes, keep) if kept]
+        G.remove_nodes_from(removed_nodes)
+
+    return distances, predecessors, nodes, recomputed_rows
@@ -0,0 +1,261 @@
+import os
+import copy
+import json
+import time
+import datetime
+import itertools
+import numpy as np
+from collections import deque
+from multiprocessing import Pool, shared_memory
+from Distance_Cache import cached_shortest_paths
+from MILP_Builder import build_placement_model, dense_distances
+from Placement_Heuristics import grasp_placement, nearest_center_distances, seed_placement
+from Presolve import presolve_assignments
+from Solver_Backend import solve
+
+
+# Placement methods the runner can compare
+#   "milp_p_median"  - exact p-median MILP (Optimization04.py)
+#   "milp_k_center"  - exact k-center MILP, centers never serving each other (Optimization05.py)
+#   "brute_force"    - enumeration of every N-subset for the p-median (OPtimization_brute_force.py)
+#   "grasp_k_center" - GRASP minimizing the maximum distance (Methahuristics.py with objective "k_center")
+#   "grasp_p_median" - GRASP minimizing the total distance (Methahuristics.py with objective "p_median")
+experiment_methods = ("milp_p_median", "milp_k_center", "brute_force", "grasp_k_center", "grasp_p_median")
+
+
+# Function to list the cells of an experiment grid, one per (graph, CDN count, method)
+def experiment_cells(graphs, counts, methods, metric="distance_km"):
+    for method in methods:
+        if method not in experiment_methods:
+            raise ValueError(f"Unknown method: {method}")
+    return [{'graph': graph, 'metric': metric, 'N': int(N), 'method': method}
+            for graph in graphs for N in counts for method in methods]
+
+
+# Function to get the key that identifies a cell in the completion log
+def cell_key(cell):
+    return f"{cell['graph']}|{cell['metric']}|{cell['N']}|{cell['method']}"
+
+
+# Function to read the completion log (one JSON record per line) and keep the latest record of every cell
+# A line cut short by an interruption is skipped, so the cell is simply run again
+def read_completion_log(completion_log_path):
+    records = {}
+    if not os.path.exists(completion_log_path):
+        return records
+    with open(completion_log_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[cell_key(record)] = record
+    return records
+
+
+# Function to append one record to the completion log and flush it to disk, so a finished cell survives a crash
+def append_completion_log(completion_log_path, record):
+    with open(completion_log_path, 'a') as f:
+        f.write(json.dumps(record, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# Function to find the best p-median (or k-center) placement by enumerating every N-subset of the nodes
+# The subsets are scored in blocks of about `block_elements` distances with one NumPy reduction per block.
+# Stops after `time_limit_seconds` with the best subset so far. Returns (centers as rows, objective, complete)
+def brute_force_placement(distances, N, objective="p_median", time_limit_seconds=None, block_elements=1 << 22):
+    start = time.perf_counter()
+    n = len(distances)
+    combinations = itertools.combinations(range(n), min(N, n))
+    block_size = max(1, block_elements // (max(N, 1) * n))
+
+    best_centers, best_objective = None, float('inf')
+    while True:
+        block = np.array(list(itertools.islice(combinations, block_size)), dtype=np.int64)
+        if len(block) == 0:
+            return best_centers, best_objective, True
+        nearest = distances[block].min(axis=1)
+        values = nearest.max(axis=1) if objective == "k_center" else nearest.sum(axis=1)
+        k = int(np.argmin(values))
+        if values[k] < best_objective:
+            best_centers, best_objective = block[k].tolist(), float(values[k])
+        if time_limit_seconds is not None and time.perf_counter() - start > time_limit_seconds:
+            return best_centers, best_objective, False
+
+
+# Function to solve the p-median or k-center MILP within the cell's time limit, warm-started from the greedy
+# placement and presolved against it; the k-center model adds the no-mutual-service rows of Optimization05.py
+# Returns (centers as rows, status, bound)
+def milp_placement(distances, N, objective, solver_settings):
+    seed_centers, seed_objective = seed_placement(distances, N, objective)
+    assignment_mask, _ = presolve_assignments(distances, N, objective, known_objective=seed_objective)
+    model = build_placement_model(distances, list(range(len(distances))), N, objective=objective,
+                                  no_mutual_service=objective == "k_center", assignment_mask=assignment_mask,
+                                  solver_name=solver_settings.name)
+    model.set_hint(distances, seed_centers)
+    result = solve(model.solver, solver_settings)
+    if not result.has_solution:
+        return [], "no_solution", None
+    centers = [k for k in range(len(distances)) if model.x.variables[k].solution_value() > 0.5]
+    return centers, "ok" if result.optimal else "time_limit", result.bound
+
+
+# Function to run one placement method on a distance matrix
+# Every method stops by itself after `time_limit_seconds` and keeps its best placement
+# Returns a dict with status ("ok", "time_limit" or "no_solution"), centers (rows), total, average,
+# max_distance and bound (the solver's bound on its own objective, None for the heuristics)
+def run_method(distances, N, method, solver_settings, time_limit_seconds=None, seed=None):
+    bound = None
+    if method in ("milp_p_median", "milp_k_center"):
+        settings = copy.copy(solver_settings)
+        if time_limit_seconds is not None:
+            settings.time_limit_seconds = min(settings.time_limit_seconds or time_limit_seconds, time_limit_seconds)
+        objective = "k_center" if method == "milp_k_center" else "p_median"
+        centers, status, bound = milp_placement(distances, N, objective, settings)
+    elif method == "brute_force":
+        centers, _, complete = brute_force_placement(distances, N, time_limit_seconds=time_limit_seconds)
+        status = "ok" if complete else "time_limit"
+    elif method in ("grasp_k_center", "grasp_p_median"):
+        objective = "k_center" if method == "grasp_k_center" else "p_median"
+        centers, _ = grasp_placement(distances, N, objective, seed=seed, time_limit_seconds=time_limit_seconds)
+        status = "ok"
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+    outcome = {'status': status, 'centers': centers, 'total': None, 'average': None, 'max_distance': None,
+               'bound': bound}
+    if centers:
+        nearest = nearest_center_distances(distances, centers)
+        outcome.update(total=float(nearest.sum()), average=float(nearest.mean()), max_distance=float(nearest.max()))
+    return outcome
+
+
+# Worker state, set once per process by _init_worker
+_worker_shm = None
+_worker_distances = None
+_worker_problem = None
+
+
+# Function to attach a worker process to the shared distance matrix of the graph being run
+def _init_worker(shm_name, shape, solver_settings, time_limit_seconds, seed):
+    global _worker_shm, _worker_distances, _worker_problem
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_distances = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+    _worker_problem = (solver_settings, time_limit_seconds, seed)
+
+
+# Function to run one cell inside a worker
+def _run_cell(cell):
+    solver_settings, time_limit_seconds, seed = _worker_problem
+    start = time.perf_counter()
+    outcome = run_method(_worker_distances, cell['N'], cell['method'], solver_settings, time_limit_seconds, seed)
+    outcome['seconds'] = time.perf_counter() - start
+    return outcome
+
+
+# Function to run the cells of one graph in a process pool that reads its distance matrix from shared memory
+# Each cell has `time_limit_seconds` to stop by itself, but a solver can overrun its limit (CBC does not check
+# it during the root LP). A worker still busy `grace_seconds` later is treated as hung: the pool is restarted, the other running cells are resubmitted, and the hung cell counts as failed.
+# Failed cells (an exception or a hang) are retried up to `retries` times. Every finished cell is appended to
+# the completion log at once
+def _run_graph_cells(distances, nodes, cells, completion_log_path, solver_settings, time_limit_seconds, retries,
+                     grace_seconds, num_workers, seed, poll_seconds, log):
+    shm = shared_memory.SharedMemory(create=True, size=max(1, distances.nbytes))
+    pool = None
+    try:
+        shared = np.ndarray(distances.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = distances
+        initargs = (shm.name, distances.shape, solver_settings, time_limit_seconds, seed)
+        hang_seconds = None if time_limit_seconds is None else time_limit_seconds + grace_seconds
+
+        pending = deque(cells)
+        attempts = {cell_key(cell): 0 for cell in cells}
+        running = {}
+
+        # Function to record a finished cell, or put a failed one back in the queue while it has retries left
+        def finish(cell, outcome=None, error=None):
+            key = cell_key(cell)
+            if outcome is None and attempts[key] <= retries:
+                log(f"{key}: attempt {attempts[key]} failed ({error}), retrying")
+                pending.append(cell)
+                return
+            if outcome is None:
+                outcome = {'status': "failed", 'centers': [], 'total': None, 'average': None, 'max_distance': None,
+                           'bound': None, 'seconds': None, 'error': error}
+            record = dict(cell, attempts=attempts[key], finished=datetime.datetime.now().isoformat(), **outcome)
+            record['centers'] = [nodes[k] for k in record['centers']]
+            append_completion_log(completion_log_path, record)
+            log(f"{key}: {record['status']}, total {record['total']}, maximum {record['max_distance']}, "
+                f"{record['seconds'] or 0.0:.2f} s")
+
+        while pending or running:
+            if pool is None:
+                pool = Pool(num_workers, initializer=_init_worker, initargs=initargs)
+            while pending and len(running) < num_workers:
+                cell = pending.popleft()
+                attempts[cell_key(cell)] += 1
+                running[cell_key(cell)] = (cell, pool.apply_async(_run_cell, (cell,)), time.perf_counter())
+
+            time.sleep(poll_seconds)
+            hung = []
+            for key, (cell, result, started) in list(running.items()):
+                if result.ready():
+                    del running[key]
+                    try:
+                        outcome = result.get()
+                    except Exception as error:
+                        finish(cell, error=repr(error))
+                    else:
+                        finish(cell, outcome)
+                elif hang_seconds is not None and time.perf_counter() - started > hang_seconds:
+                    hung.append(key)
+
+            if hung:
+                pool.terminate()
+                pool.join()
+                pool = None
+                for key, (cell, _, _) in running.items():
+                    if key in hung:
+                        finish(cell, error=f"no result after {hang_seconds:.0f} s")
+                    else:
+                        attempts[key] -= 1  # Interrupted by the restart, not by its own fault
+                        pending.appendleft(cell)
+                running.clear()
+        del shared
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        shm.close()
+        shm.unlink()
+
+
+# Function to run an experiment grid of graphs x CDN counts x methods in parallel worker processes
+# Cells already finished in the completion log (a JSONL file, one record per cell) are skipped, so an
+# interrupted sweep resumes where it stopped; cells that failed are tried again. The graphs are run one after
+# another, each one's distance matrix loaded once from the cache and shared with the workers
+# Returns the latest record of every cell of the grid
+def run_experiments(graphs, counts, methods, completion_log_path, solver_settings, metric="distance_km",
+                    time_limit_seconds=600, retries=1, grace_seconds=60, num_workers=None, seed=0,
+                    poll_seconds=0.5, log=print):
+    num_workers = num_workers or os.cpu_count()
+    cells = experiment_cells(graphs, counts, methods, metric)
+    completed = read_completion_log(completion_log_path)
+    remaining = [cell for cell in cells
+                 if completed.get(cell_key(cell), {}).get('status') not in ("ok", "time_limit", "no_solution")]
+    log(f"{len(cells)} cells, {len(cells) - len(remaining)} already in {completion_log_path}, "
+        f"{len(remaining)} to run with {num_workers} workers")
+
+    for graph in graphs:
+        graph_cells = [cell for cell in remaining if cell['graph'] == graph]
+        if not graph_cells:
+            continue
+        distances, _, nodes, _ = cached_shortest_paths(graph, metric=metric)
+        distances = dense_distances(distances, len(nodes))
+        log(f"{graph}: {len(nodes)} nodes, {len(graph_cells)} cells")
+        _run_graph_cells(distances, nodes, graph_cells, completion_log_path, solver_settings, time_limit_seconds,
+                         retries, grace_seconds, min(num_workers, len(graph_cells)), seed, poll_seconds, log)
+
+    completed = read_completion_log(completion_log_path)
+    return [completed[cell_key(cell)] for cell in cells if cell_key(cell) in completed]
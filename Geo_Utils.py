@@ -0,0 +1,80 @@
+import numpy as np
+import networkx as nx
+from math import radians, sin, cos, sqrt, atan2
+
+
+# Earth radius in kilometers
+EARTH_RADIUS_KM = 6371
+
+
+# Function to calculate haversine distance between two coordinates
+def haversine_distance(coord1, coord2):
+    R = EARTH_RADIUS_KM
+    lat1, lon1 = coord1
+    lat2, lon2 = coord2
+
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+
+    distance = R * c
+    return distance
+
+
+# Function to calculate haversine distances element-wise for arrays of coordinates (degrees in, km out)
+# Inputs broadcast against each other, so the same kernel serves edge arrays and point-to-many queries
+def haversine_distances(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lon1, lat2, lon2))
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+# Function to calculate the many-to-many haversine distance matrix between two point sets
+# Returns an array of shape (len(lats_a), len(lats_b)) in km
+def haversine_matrix(lats_a, lons_a, lats_b, lons_b):
+    lats_a = np.asarray(lats_a, dtype=np.float64)[:, None]
+    lons_a = np.asarray(lons_a, dtype=np.float64)[:, None]
+    lats_b = np.asarray(lats_b, dtype=np.float64)[None, :]
+    lons_b = np.asarray(lons_b, dtype=np.float64)[None, :]
+    return haversine_distances(lats_a, lons_a, lats_b, lons_b)
+
+
+# Function to convert a great-circle distance in km to the central angle in degrees
+def km_to_arc_degrees(distance_km):
+    return np.degrees(np.asarray(distance_km, dtype=np.float64) / EARTH_RADIUS_KM)
+
+
+# Function to read the Latitude/Longitude node attributes into arrays once (row k belongs to nodes[k])
+def node_coordinates(G, nodes):
+    latitudes = np.fromiter((G.nodes[node]['Latitude'] for node in nodes), dtype=np.float64, count=len(nodes))
+    longitudes = np.fromiter((G.nodes[node]['Longitude'] for node in nodes), dtype=np.float64, count=len(nodes))
+    return latitudes, longitudes
+
+
+# Function to calculate the haversine length of every edge in one vectorized call
+# Returns the edge list and a matching array of lengths in km
+def edge_lengths(G):
+    nodes = list(G.nodes())
+    node_index = {node: k for k, node in enumerate(nodes)}
+    latitudes, longitudes = node_coordinates(G, nodes)
+
+    edges = list(G.edges())
+    sources = np.fromiter((node_index[i] for i, j in edges), dtype=np.int64, count=len(edges))
+    targets = np.fromiter((node_index[j] for i, j in edges), dtype=np.int64, count=len(edges))
+
+    lengths = haversine_distances(latitudes[sources], longitudes[sources], latitudes[targets], longitudes[targets])
+    return edges, lengths
+
+
+# Function to add weights to the edges in the graph
+def add_edge_weights_to_graph(G):
+    edges, lengths = edge_lengths(G)
+    nx.set_edge_attributes(G, dict(zip(edges, lengths.tolist())), 'weight')  # Add as an attribute to the edge
@@ -2,7 +2,6 @@ from sklearn.neighbors import KDTree
 import pandas as pd
 import numpy as np
 from sklearn.impute import KNNImputer
-from math import log, exp
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib
@@ -10,6 +9,7 @@ matplotlib.use('Agg')
 import requests
 import json
 import time
+from Geo_Utils import haversine_distances, km_to_arc_degrees
 
 # Function to fetch population data from an online source
 def fetch_city_population(city_name):
@@ -34,6 +34,32 @@ def fetch_city_population(city_name):
         print(f"An unexpected error occurred: {e}")
 
 
+# Function to estimate the population around each point from its k nearest GeoNames places
+# Distances are great-circle arcs (in degrees) from the shared haversine kernel, computed for all points at once
+def estimate_populations(tree, place_latitudes, place_longitudes, place_populations, latitudes, longitudes, k):
+    _, indices = tree.query(np.column_stack([latitudes, longitudes]), k=k)
+    dist = km_to_arc_degrees(haversine_distances(latitudes[:, None], longitudes[:, None],
+                                                 place_latitudes[indices], place_longitudes[indices]))
+
+    pop = place_populations[indices]
+    log_pop = np.log(pop + 1)
+
+    # Variable distance threshold based on log of population
+    distance_threshold = np.log(pop + 1)
+
+    population_weight = 0.7  # Between 0 and 1
+    weight = (1 / (dist + 1e-5)) ** 2
+    weight = np.where(dist > distance_threshold, 0, weight)
+
+    weighted_population = (log_pop * weight * population_weight + weight * (1 - population_weight)).sum(axis=1)
+    total_weight = weight.sum(axis=1)
+
+    estimates = np.full(len(latitudes), np.nan)
+    has_weight = total_weight > 0
+    estimates[has_weight] = np.exp(weighted_population[has_weight] / total_weight[has_weight])
+    return estimates
+
+
 # Define columns
 columns = [
     'geonameid', 'name', 'asciiname', 'alternatenames', 'latitude', 'longitude',
@@ -56,81 +82,37 @@ tree = KDTree(geonames_df[['latitude', 'longitude']].values, leaf_size=100)
 # Load your dataset
 your_data_df = pd.read_csv('MainFolder/Datasets/Final_Corrected_Enriched_dataset_v4.csv')
 
+# Coordinates and populations of the GeoNames places as arrays, indexed like the KDTree
+place_latitudes = geonames_df['latitude'].to_numpy(dtype=np.float64)
+place_longitudes = geonames_df['longitude'].to_numpy(dtype=np.float64)
+place_populations = geonames_df['population'].to_numpy(dtype=np.float64)
+
 # Placeholder list to store results for k-tuning
 tuning_results = []
 
 # K-Tuning Section
 for k in range(1, 11):
-    avg_population = 0
     sample_data = your_data_df.sample(frac=0.1)
 
-    for i, row in sample_data.iterrows():
-        lat, lon = row['Latitude'], row['Longitude']
-        distances, indices = tree.query([[lat, lon]], k=k)
-
-        weighted_population = 0
-        total_weight = 0
-
-        for dist_list, idx_list in zip(distances, indices):
-            for dist, idx in zip(dist_list, idx_list):
-                pop = geonames_df.iloc[idx]['population']
-                log_pop = log(pop + 1)
-                distance_threshold = log(pop + 1)
-
-                if dist > distance_threshold:
-                    continue
+    estimates = estimate_populations(tree, place_latitudes, place_longitudes, place_populations,
+                                     sample_data['Latitude'].to_numpy(dtype=np.float64),
+                                     sample_data['Longitude'].to_numpy(dtype=np.float64), k)
 
-                population_weight = 0.7
-                weight = (1 / (dist + 1e-5)) ** 2
-                weighted_population += log_pop * weight * population_weight + weight * (1 - population_weight)
-                total_weight += weight
-
-        if total_weight > 0:
-            avg_population += exp(weighted_population / total_weight)
-
-    avg_population /= len(sample_data)
+    # Points without any place in range count as zero, as before
+    avg_population = np.nansum(estimates) / len(sample_data)
     tuning_results.append((k, avg_population))
 
 # Convert to DataFrame for easier handling
 tuning_df = pd.DataFrame(tuning_results, columns=['k', 'AvgPopulation'])
 
 # Determine the best k
-best_k = tuning_df.loc[tuning_df['AvgPopulation'].idxmax(), 'k']
-
-# Initialize array for storing closest populations
-closest_populations = np.empty(len(your_data_df))
-closest_populations.fill(np.nan)
-
-# Process results
-for i, row in enumerate(your_data_df.itertuples()):
-    lat, lon = row.Latitude, row.Longitude
-    distances, indices = tree.query([[lat, lon]], k=best_k)
-
-    weighted_population = 0
-    total_weight = 0
-
-    for dist_list, idx_list in zip(distances, indices):
-        for dist, idx in zip(dist_list, idx_list):
-            pop = geonames_df.iloc[idx]['population']
-            log_pop = log(pop + 1)
-
-            # Variable distance threshold based on log of population
-            distance_threshold = log(pop + 1)
-
-            if dist > distance_threshold:
-                continue
-
-            population_weight = 0.7  # Between 0 and 1
-            weight = (1 / (dist + 1e-5)) ** 2
-            weighted_population += log_pop * weight * population_weight + weight * (1 - population_weight)
-            total_weight += weight
-
-    if total_weight > 0:
-        # Rounding the population to the nearest integer
-        closest_populations[i] = np.round(exp(weighted_population / total_weight))
+best_k = int(tuning_df.loc[tuning_df['AvgPopulation'].idxmax(), 'k'])
 
-    if i % 1000 == 0:
-        print(f"Processed {i + 1} rows.")
+# Process results: all rows in one batched KDTree query and one haversine call
+closest_populations = np.round(estimate_populations(tree, place_latitudes, place_longitudes, place_populations,
+                                                    your_data_df['Latitude'].to_numpy(dtype=np.float64),
+                                                    your_data_df['Longitude'].to_numpy(dtype=np.float64), best_k))
+print(f"Processed {len(your_data_df)} rows.")
 
 # Add closest populations to your DataFrame
 your_data_df['Closest_Population'] = closest_populations
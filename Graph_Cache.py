@@ -0,0 +1,114 @@
+import os
+import hashlib
+import numpy as np
+import networkx as nx
+from Geo_Utils import haversine_distances
+
+
+# Folder holding the parsed-graph cache files
+graph_cache_folder_path = "MainFolder/Datasets/GraphCache"
+
+
+# Function to hash the raw bytes of a GML file
+def file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Function to get the cache path of a GML file (one cache file per source path)
+def graph_cache_path(file_path, cache_folder=graph_cache_folder_path):
+    path_digest = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:12]
+    name = os.path.basename(file_path).replace('.gml', '')
+    return os.path.join(cache_folder, f"{name}_{path_digest}.npz")
+
+
+# Parsed topology held as flat arrays; the NetworkX graph is only built when `.graph` is first used
+class CachedGraph:
+    def __init__(self, arrays):
+        self.nodes = arrays['nodes'].tolist()
+        self.node_index = {node: k for k, node in enumerate(self.nodes)}
+        self.latitudes = arrays['latitudes']
+        self.longitudes = arrays['longitudes']
+        self.labels = arrays['labels'].tolist()
+        self.edge_sources = arrays['edge_sources']
+        self.edge_targets = arrays['edge_targets']
+        self.directed = bool(arrays['directed'])
+        self.multigraph = bool(arrays['multigraph'])
+        self.source_hash = str(arrays['source_hash'])
+        self._graph = None
+
+    # Haversine length (km) of every edge, in edge-array order
+    def edge_weights(self):
+        return haversine_distances(self.latitudes[self.edge_sources], self.longitudes[self.edge_sources],
+                                   self.latitudes[self.edge_targets], self.longitudes[self.edge_targets])
+
+    # NetworkX graph with the Latitude/Longitude/label node attributes, rebuilt on first use
+    @property
+    def graph(self):
+        if self._graph is None:
+            if self.multigraph:
+                G = nx.MultiDiGraph() if self.directed else nx.MultiGraph()
+            else:
+                G = nx.DiGraph() if self.directed else nx.Graph()
+            for node, latitude, longitude, label in zip(self.nodes, self.latitudes.tolist(),
+                                                        self.longitudes.tolist(), self.labels):
+                G.add_node(node, Latitude=latitude, Longitude=longitude, label=label)
+            G.add_edges_from(zip([self.nodes[k] for k in self.edge_sources.tolist()],
+                                 [self.nodes[k] for k in self.edge_targets.tolist()]))
+            self._graph = G
+        return self._graph
+
+
+# Function to parse a GML file with NetworkX and flatten it into arrays
+def _parse_gml(file_path, source_hash):
+    G = nx.read_gml(file_path, label="id")
+    nodes = list(G.nodes())
+    node_index = {node: k for k, node in enumerate(nodes)}
+    edges = list(G.edges())
+
+    return {
+        'nodes': np.array(nodes),
+        'latitudes': np.array([G.nodes[node]['Latitude'] for node in nodes], dtype=np.float64),
+        'longitudes': np.array([G.nodes[node]['Longitude'] for node in nodes], dtype=np.float64),
+        'labels': np.array([str(G.nodes[node].get('label', node)) for node in nodes]),
+        'edge_sources': np.array([node_index[i] for i, j in edges], dtype=np.int32),
+        'edge_targets': np.array([node_index[j] for i, j in edges], dtype=np.int32),
+        'directed': np.array(G.is_directed()),
+        'multigraph': np.array(G.is_multigraph()),
+        'source_hash': np.array(source_hash),
+    }
+
+
+# Function to load a GML file through the binary cache
+# The cache is trusted while the file's size and modification time are unchanged; otherwise the file is
+# re-hashed, and only re-parsed if its content really changed
+def load_graph(file_path, cache_folder=graph_cache_folder_path):
+    cache_path = graph_cache_path(file_path, cache_folder)
+    stat = os.stat(file_path)
+    file_stamp = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            arrays = {name: cached[name] for name in cached.files}
+        if np.array_equal(arrays['file_stamp'], file_stamp):
+            return CachedGraph(arrays)
+
+        source_hash = file_hash(file_path)
+        if str(arrays['source_hash']) == source_hash:
+            arrays['file_stamp'] = file_stamp
+            np.savez(cache_path, **arrays)
+            return CachedGraph(arrays)
+    else:
+        source_hash = file_hash(file_path)
+
+    print(f"Parsing {file_path} (no valid graph cache)")
+    arrays = _parse_gml(file_path, source_hash)
+    arrays['file_stamp'] = file_stamp
+
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+    np.savez(cache_path, **arrays)
+    return CachedGraph(arrays)
@@ -0,0 +1,127 @@
+import time
+import numpy as np
+from scipy.sparse import csr_matrix
+from ortools.linear_solver import pywraplp
+from ortools.linear_solver.python import model_builder
+from MILP_Builder import dense_distances
+from Placement_Heuristics import heuristic_k_center
+
+
+# Number of set bits in every byte value, for popcounts over packed bitsets
+BYTE_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.int64)
+
+
+# Function to build the coverage bitsets for one radius: bit j of row i is set when d[i, j] <= radius
+def coverage_bitsets(distances, radius):
+    return np.packbits(distances <= radius, axis=1)
+
+
+# Function to count the set bits of every row of a packed bitset array
+def popcounts(bitsets):
+    return BYTE_POPCOUNT[bitsets].sum(axis=-1)
+
+
+# Function to cover the nodes greedily, always taking the center that covers the most uncovered nodes
+# Returns (centers, whether they cover every node); a full cover with <= N centers proves feasibility
+def greedy_cover(coverage, n, N):
+    uncovered = np.packbits(np.ones(n, dtype=bool))
+    centers = []
+    while len(centers) < N:
+        gains = popcounts(coverage & uncovered)
+        best = int(np.argmax(gains))
+        if gains[best] == 0:
+            break
+        centers.append(best)
+        uncovered &= ~coverage[best]
+    return centers, popcounts(uncovered) == 0
+
+
+# Function to decide exactly whether at most N centers can cover every node, with a small set-cover MILP
+# (one row per node, one binary column per candidate center, built in bulk from the bitsets)
+def milp_cover(coverage, n, N, solver_name='CBC'):
+    covers = np.unpackbits(coverage, axis=1, count=n).astype(bool)
+    candidates, covered = np.nonzero(covers)
+
+    constraint_matrix = csr_matrix((np.ones(len(candidates) + n),
+                                    (np.concatenate([covered, np.full(n, n)]),
+                                     np.concatenate([candidates, np.arange(n)]))), shape=(n + 1, n))
+    lower = np.concatenate([np.ones(n), [-np.inf]])
+    upper = np.concatenate([np.full(n, np.inf), [float(N)]])
+
+    model = model_builder.Model()
+    model.helper.fill_model_from_sparse_data(np.zeros(n), np.ones(n), np.ones(n), lower, upper, constraint_matrix)
+    for column in range(n):
+        model.helper.set_var_integrality(column, True)
+
+    solver = pywraplp.Solver.CreateSolver(solver_name)
+    error = solver.LoadModelFromProto(model.export_to_proto())
+    if error:
+        raise ValueError(f"Could not load the set-cover model: {error}")
+
+    status = solver.Solve()
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return [], False
+    return [k for k, variable in enumerate(solver.variables()) if variable.solution_value() > 0.5], True
+
+
+# Function to check whether N centers can serve every node within `radius`
+# The greedy cover settles most feasible probes; only the rest go to the set-cover MILP
+# Returns (feasible, centers, method)
+def cover_feasible(distances, radius, N, solver_name='CBC'):
+    n = len(distances)
+    coverage = coverage_bitsets(distances, radius)
+
+    # A node nobody covers (not even itself, e.g. radius < 0) makes the probe infeasible right away
+    if popcounts(np.bitwise_or.reduce(coverage, axis=0)) < n:
+        return False, [], "coverage"
+
+    centers, covered = greedy_cover(coverage, n, N)
+    if covered:
+        return True, centers, "greedy"
+
+    centers, feasible = milp_cover(coverage, n, N, solver_name)
+    return feasible, centers, "set-cover MILP"
+
+
+# Function to solve k-center exactly by binary search over the sorted distinct distances
+# The optimum is one of the pairwise distances, and feasibility only grows with the radius, so the smallest
+# feasible radius between 0 and the heuristic bound is optimal. Every probe is logged through `log`
+# Returns (optimal radius, centers as rows, probe log)
+def exact_k_center(distances, N, solver_name='CBC', log=print):
+    start = time.perf_counter()
+    distances = dense_distances(distances, distances.shape[0])
+    centers, upper_bound = heuristic_k_center(distances, N)
+
+    radii = np.unique(distances[np.isfinite(distances)])
+    radii = radii[radii <= upper_bound]
+    probes = []
+
+    low, high = 0, len(radii) - 1
+    if not np.isfinite(upper_bound):
+        # Disconnected topology: the heuristic left some node unserved, so check the largest radius first
+        feasible, probe_centers, method = cover_feasible(distances, radii[-1], N, solver_name)
+        if not feasible:
+            log(f"No {N} centers reach every node; the optimal radius is infinite")
+            return float('inf'), centers, probes
+        centers = probe_centers
+
+    log(f"Binary search over {len(radii)} distinct distances up to the heuristic bound {upper_bound:.6g}")
+    while low < high:
+        middle = (low + high) // 2
+        probe_start = time.perf_counter()
+        feasible, probe_centers, method = cover_feasible(distances, radii[middle], N, solver_name)
+        seconds = time.perf_counter() - probe_start
+
+        probes.append({'radius': float(radii[middle]), 'feasible': feasible, 'method': method, 'seconds': seconds})
+        log(f"Probe {len(probes)}: radius {radii[middle]:.6g} -> {'feasible' if feasible else 'infeasible'} "
+            f"({method}, {seconds:.3f} s)")
+
+        if feasible:
+            high = middle
+            centers = probe_centers
+        else:
+            low = middle + 1
+
+    log(f"Optimal radius {radii[high]:.6g} after {len(probes)} probes in {time.perf_counter() - start:.3f} s")
+    return float(radii[high]), centers, probes
+
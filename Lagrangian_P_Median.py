@@ -0,0 +1,94 @@
+import time
+import numpy as np
+from MILP_Builder import dense_distances
+from Placement_Heuristics import nearest_center_distances, improve_centers, heuristic_p_median
+
+
+# Function to solve the Lagrangian subproblem of p-median for multipliers lambda[j]
+# Relaxing "every node served once" leaves, for each candidate i, rho[i] = sum_j min(0, d[i, j] - lambda[j]);
+# opening the N most negative rho gives L = sum(lambda) + their sum, a lower bound on the p-median total
+# Returns (L, open rows, reduced costs d[i, j] - lambda[j], rho)
+def lagrangian_subproblem(distances, multipliers, N):
+    reduced = distances - multipliers[None, :]
+    rho = np.minimum(reduced, 0.0).sum(axis=1)
+    open_rows = np.argsort(rho, kind='stable')[:N]
+    return multipliers.sum() + rho[open_rows].sum(), open_rows, reduced, rho
+
+
+# Function to run subgradient optimization on the Lagrangian dual of p-median
+# Every iteration is one vectorized pass over the distance matrix. The open set of every dual solution is
+# repaired into a feasible placement (nodes go to their nearest open center, and improving dual solutions are
+# polished by medoid moves), so the search returns a provable lower bound and a placement together.
+# With `track_pair_bounds`, also returns for every pair a lower bound on any solution that assigns j to i
+# (reduced-cost bounds, see Presolve.py). Returns a dict with lower_bound, objective, centers (rows), gap,
+# iterations, seconds and pair_bounds
+def lagrangian_p_median(distances, N, iterations=300, gap_tolerance=1e-4, track_pair_bounds=False, log=None,
+                        log_every=25):
+    start = time.perf_counter()
+    distances = dense_distances(distances, distances.shape[0])
+    n = len(distances)
+    N = min(N, n)
+
+    centers, objective = heuristic_p_median(distances, N)
+    if not np.isfinite(objective):
+        raise ValueError(f"{N} centers cannot reach every node, so the p-median total is infinite.")
+
+    # Start every node at its distance to the closest other candidate (the second smallest in its column)
+    multipliers = np.partition(distances, 1, axis=0)[1] if n > 1 else np.zeros(distances.shape[1])
+    multipliers[~np.isfinite(multipliers)] = 0.0
+
+    pair_bounds = np.full(distances.shape, -np.inf) if track_pair_bounds else None
+    lower_bound = -np.inf
+    step_scale = 2.0
+    rounds_without_improvement = 0
+    iteration = 0
+
+    for iteration in range(1, iterations + 1):
+        bound, open_rows, reduced, rho = lagrangian_subproblem(distances, multipliers, N)
+
+        if track_pair_bounds:
+            # Forcing y[i, j] = 1 adds max(0, reduced cost) and, for a closed i, the cost of swapping it in
+            opening_cost = np.maximum(rho - rho[open_rows].max(), 0.0)
+            opening_cost[open_rows] = 0.0
+            np.maximum(pair_bounds, bound + np.maximum(reduced, 0.0) + opening_cost[:, None], out=pair_bounds)
+
+        if bound > lower_bound:
+            lower_bound = bound
+            rounds_without_improvement = 0
+        else:
+            rounds_without_improvement += 1
+            if rounds_without_improvement >= 5:
+                step_scale /= 2
+                rounds_without_improvement = 0
+
+        # Primal repair of the dual solution
+        candidate_objective = float(nearest_center_distances(distances, open_rows).sum())
+        if candidate_objective < objective:
+            candidate = improve_centers(distances, open_rows.tolist(), lambda costs: costs.sum(axis=1))
+            candidate_objective = float(nearest_center_distances(distances, candidate).sum())
+            if candidate_objective < objective:
+                centers, objective = candidate, candidate_objective
+
+        gap = (objective - lower_bound) / objective if objective > 0 else 0.0
+        if log is not None and (iteration % log_every == 0 or gap <= gap_tolerance):
+            log(f"Iteration {iteration}: lower bound {lower_bound:.6g}, best placement {objective:.6g}, "
+                f"gap {gap:.3%}")
+        if gap <= gap_tolerance:
+            break
+
+        # Nodes served by no open center want a larger multiplier, nodes served twice a smaller one
+        subgradient = 1 - (reduced[open_rows] < 0).sum(axis=0)
+        norm = float((subgradient ** 2).sum())
+        if norm == 0:
+            break
+        multipliers = multipliers + step_scale * (objective - bound) / norm * subgradient
+
+    return {
+        'lower_bound': float(lower_bound),
+        'objective': objective,
+        'centers': [int(center) for center in centers],
+        'gap': (objective - lower_bound) / objective if objective > 0 else 0.0,
+        'iterations': iteration,
+        'seconds': time.perf_counter() - start,
+        'pair_bounds': pair_bounds,
+    }
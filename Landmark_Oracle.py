@@ -0,0 +1,176 @@
+import heapq
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+
+# Function to pick landmarks by farthest-point selection: every new landmark is the node farthest from all
+# landmarks chosen so far (nodes no landmark reaches come first, so every component gets one)
+def select_landmarks(adjacency, num_landmarks, seed=None):
+    n = adjacency.shape[0]
+    rng = np.random.default_rng(seed)
+    landmarks = [int(rng.integers(n))]
+    nearest = csgraph_dijkstra(adjacency, directed=True, indices=landmarks[0])
+
+    while len(landmarks) < min(num_landmarks, n):
+        candidate = int(np.argmax(nearest))
+        if candidate in landmarks:
+            break
+        landmarks.append(candidate)
+        nearest = np.minimum(nearest, csgraph_dijkstra(adjacency, directed=True, indices=candidate))
+    return np.array(landmarks, dtype=np.int64)
+
+
+# Function to compute the landmark tables: d(landmark, v) and d(v, landmark) for every node, L x n each
+def landmark_distances(adjacency, landmarks):
+    from_landmarks = csgraph_dijkstra(adjacency, directed=True, indices=landmarks)
+    if (adjacency != adjacency.T).nnz == 0:
+        return from_landmarks, from_landmarks
+    to_landmarks = csgraph_dijkstra(adjacency.T.tocsr(), directed=True, indices=landmarks)
+    return from_landmarks, to_landmarks
+
+
+# Predecessor rows computed on demand, one single-source Dijkstra per requested source
+# Stands in for the predecessor matrix in reconstruct_path() when no all-pairs table exists
+class PredecessorRows:
+    def __init__(self, adjacency, max_cached_rows=64):
+        self.adjacency = adjacency
+        self.max_cached_rows = max_cached_rows
+        self._rows = {}
+
+    def __getitem__(self, source):
+        source = int(source)
+        if source not in self._rows:
+            if len(self._rows) >= self.max_cached_rows:
+                self._rows.pop(next(iter(self._rows)))
+            _, row = csgraph_dijkstra(self.adjacency, directed=True, indices=source, return_predecessors=True)
+            self._rows[source] = row
+        return self._rows[source]
+
+
+# Distance oracle that keeps only the L x n landmark tables instead of the n x n matrix
+# Indexing with [row, column] works like the dense matrix, answering by `mode`:
+#   "upper" - shortest detour through a landmark, d(s, l) + d(l, t) (a real path length, never too short)
+#   "lower" - the ALT triangle-inequality bound (never too long)
+#   "exact" - A* search guided by the landmark lower bounds
+class LandmarkOracle:
+    def __init__(self, indptr, indices, weights, landmarks, from_landmarks, to_landmarks, mode="lower",
+                 max_cached_targets=64):
+        n = len(indptr) - 1
+        self.adjacency = csr_matrix((weights, indices, indptr), shape=(n, n))
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.from_landmarks = np.asarray(from_landmarks, dtype=np.float64)
+        self.to_landmarks = np.asarray(to_landmarks, dtype=np.float64)
+        self.mode = mode
+        self.shape = (n, n)
+        self.predecessors = PredecessorRows(self.adjacency)
+        self._graph_lists = (indptr.tolist(), indices.tolist(), weights.tolist())
+        self.max_cached_targets = max_cached_targets
+        self._heuristics = {}
+
+    # Lower bounds for (source, target) pairs: max over landmarks of d(l,t) - d(l,s) and d(s,l) - d(t,l)
+    def lower_bounds(self, sources, targets):
+        with np.errstate(invalid='ignore'):
+            forward = self.from_landmarks[:, targets] - self.from_landmarks[:, sources]
+            backward = self.to_landmarks[:, sources] - self.to_landmarks[:, targets]
+        # inf - inf (both nodes unreachable for a landmark) carries no information
+        forward[np.isnan(forward)] = -np.inf
+        backward[np.isnan(backward)] = -np.inf
+        return np.maximum(np.maximum(forward.max(axis=0), backward.max(axis=0)), 0.0)
+
+    # Upper bounds for (source, target) pairs: the best route through a single landmark
+    def upper_bounds(self, sources, targets):
+        bounds = np.min(self.to_landmarks[:, sources] + self.from_landmarks[:, targets], axis=0)
+        bounds[sources == targets] = 0.0
+        return bounds
+
+    # Function to get the A* heuristic toward one target: the landmark lower bound of every node, computed in
+    # one O(n * L) pass and kept for the last `max_cached_targets` targets, so queries to a target reuse it
+    def target_heuristic(self, target):
+        if target not in self._heuristics:
+            if len(self._heuristics) >= self.max_cached_targets:
+                self._heuristics.pop(next(iter(self._heuristics)))
+            self._heuristics[target] = self.lower_bounds(np.arange(self.shape[0]),
+                                                         np.full(self.shape[0], target)).tolist()
+        return self._heuristics[target]
+
+    # Exact distance of one pair by A*; the landmark lower bounds are a consistent heuristic
+    def exact_distance(self, source, target):
+        if source == target:
+            return 0.0
+        indptr, indices, weights = self._graph_lists
+        heuristic = self.target_heuristic(target)
+        if heuristic[source] == float('inf'):
+            return float('inf')
+
+        distances = {source: 0.0}
+        settled = set()
+        queue = [(heuristic[source], source)]
+
+        while queue:
+            _, current_node = heapq.heappop(queue)
+            if current_node == target:
+                return distances[target]
+            if current_node in settled:
+                continue
+            settled.add(current_node)
+
+            for position in range(indptr[current_node], indptr[current_node + 1]):
+                neighbor = indices[position]
+                distance = distances[current_node] + weights[position]
+                if distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = distance
+                    heapq.heappush(queue, (distance + heuristic[neighbor], neighbor))
+
+        return float('inf')
+
+    # Function to answer a batch of (source, target) row pairs in the oracle's mode
+    def distances(self, sources, targets):
+        sources = np.atleast_1d(np.asarray(sources, dtype=np.int64))
+        targets = np.atleast_1d(np.asarray(targets, dtype=np.int64))
+        if self.mode == "upper":
+            return self.upper_bounds(sources, targets)
+        if self.mode == "lower":
+            return self.lower_bounds(sources, targets)
+        if self.mode == "exact":
+            return np.array([self.exact_distance(int(s), int(t)) for s, t in zip(sources, targets)])
+        raise ValueError(f"Unknown mode: {self.mode}")
+
+    def __getitem__(self, key):
+        sources, targets = key
+        result = self.distances(sources, targets)
+        return result[0] if np.ndim(sources) == 0 and np.ndim(targets) == 0 else result
+
+
+# Function to measure the oracle's approximation error against exact Dijkstra on random pairs
+# Exact rows come from `num_sources` random sources; errors are relative to the exact distance
+def approximation_error(oracle, num_pairs=1000, num_sources=32, num_exact_checks=20, seed=None):
+    n = oracle.shape[0]
+    rng = np.random.default_rng(seed)
+    sample_sources = rng.choice(n, size=min(num_sources, n), replace=False)
+    exact_rows = csgraph_dijkstra(oracle.adjacency, directed=True, indices=sample_sources)
+
+    pair_rows = rng.integers(len(sample_sources), size=num_pairs)
+    sources = sample_sources[pair_rows]
+    targets = rng.integers(n, size=num_pairs)
+    exact = exact_rows[pair_rows, targets]
+
+    # Only pairs with a finite, non-zero exact distance have a relative error
+    valid = np.isfinite(exact) & (exact > 0)
+    lower = oracle.lower_bounds(sources[valid], targets[valid])
+    upper = oracle.upper_bounds(sources[valid], targets[valid])
+    lower_error = (exact[valid] - lower) / exact[valid]
+    upper_error = (upper - exact[valid]) / exact[valid]
+
+    checks = min(num_exact_checks, int(valid.sum()))
+    astar = np.array([oracle.exact_distance(int(s), int(t))
+                      for s, t in zip(sources[valid][:checks], targets[valid][:checks])])
+
+    return {
+        'pairs': int(valid.sum()),
+        'lower_mean_error': float(lower_error.mean()) if len(lower_error) else 0.0,
+        'lower_max_error': float(lower_error.max(initial=0)),
+        'upper_mean_error': float(upper_error.mean()) if len(upper_error) else 0.0,
+        'upper_max_error': float(upper_error.max(initial=0)),
+        'astar_max_difference': float(np.abs(astar - exact[valid][:checks]).max(initial=0)),
+    }
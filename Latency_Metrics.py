@@ -0,0 +1,97 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+from Sparse_Distances import lookup_distances
+
+
+# Speed of light in optical fiber (refractive index ~1.468), in km per millisecond
+FIBER_SPEED_KM_PER_MS = 299792.458 / 1.468 / 1000
+
+# Default latency model: fiber runs along the haversine edge length, each hop adds a router delay
+FIBER_ROUTE_FACTOR = 1.0
+ROUTER_PENALTY_MS = 0.1
+
+# Metrics produced by the latency model; routes are chosen by "latency_ms" and the others are measured
+# along those same routes
+latency_metric_names = ("latency_ms", "propagation_ms", "hops", "route_km")
+
+# Unit printed next to every metric the optimizers can use ("distance_km" is the plain shortest-km table)
+metric_units = {"distance_km": "km", "latency_ms": "ms", "propagation_ms": "ms", "hops": "hops", "route_km": "km"}
+
+
+# Function to calculate every per-edge metric from the edge lengths in km
+# Returns a dict of arrays aligned with the CSR weights
+def edge_metric_weights(km_weights, router_penalty_ms=ROUTER_PENALTY_MS, fiber_route_factor=FIBER_ROUTE_FACTOR):
+    km_weights = np.asarray(km_weights, dtype=np.float64)
+    propagation = km_weights * fiber_route_factor / FIBER_SPEED_KM_PER_MS
+    return {
+        "latency_ms": propagation + router_penalty_ms,
+        "propagation_ms": propagation,
+        "hops": np.ones(len(km_weights)),
+        "route_km": km_weights * fiber_route_factor,
+    }
+
+
+# Function to sum per-edge values along the shortest-path trees of a block of sources
+# Uses pointer jumping on the predecessor rows: after step i every node points 2^i hops up its tree and
+# holds the sum over those hops, so a tree of depth d takes log2(d) vectorized passes instead of d
+def accumulate_along_tree(predecessors, sources, edge_tables):
+    b, n = predecessors.shape
+    columns = np.broadcast_to(np.arange(n), (b, n))
+    has_parent = predecessors >= 0
+
+    # Sources and unreachable nodes point to themselves and add nothing
+    ancestor = np.where(has_parent, predecessors, columns)
+    values = {}
+    for name, table in edge_tables.items():
+        value = np.zeros((b, n))
+        value[has_parent] = lookup_distances(table, predecessors[has_parent], columns[has_parent])
+        values[name] = value
+
+    while True:
+        next_ancestor = np.take_along_axis(ancestor, ancestor, axis=1)
+        if np.array_equal(next_ancestor, ancestor):
+            break
+        for name in values:
+            values[name] = values[name] + np.take_along_axis(values[name], ancestor, axis=1)
+        ancestor = next_ancestor
+
+    reachable = has_parent.copy()
+    reachable[np.arange(b), sources] = True
+    for name in values:
+        values[name][~reachable] = np.inf
+    return values
+
+
+# Function to compute every latency-model matrix with a single Dijkstra pass per source
+# Routes are the minimum-latency paths; propagation delay, hop count and fiber km are accumulated along
+# those routes instead of running a separate all-pairs search per metric
+# Returns ({metric name: n x n matrix}, predecessor matrix of the routes)
+def multi_metric_shortest_paths(indptr, indices, km_weights, router_penalty_ms=ROUTER_PENALTY_MS,
+                                fiber_route_factor=FIBER_ROUTE_FACTOR, block_size=1024):
+    n = len(indptr) - 1
+    weights = edge_metric_weights(km_weights, router_penalty_ms, fiber_route_factor)
+
+    # One table per metric with the CSR layout of the graph, sorted for lookup_distances
+    edge_tables = {}
+    for name in latency_metric_names[1:]:
+        table = csr_matrix((weights[name], indices, indptr), shape=(n, n))
+        table.sort_indices()
+        edge_tables[name] = table
+
+    latency_adjacency = csr_matrix((weights["latency_ms"], indices, indptr), shape=(n, n))
+    metrics = {name: np.empty((n, n)) for name in latency_metric_names}
+    predecessors = np.empty((n, n), dtype=np.int32)
+
+    for start in range(0, n, block_size):
+        sources = np.arange(start, min(start + block_size, n))
+        latency, block_predecessors = csgraph_dijkstra(latency_adjacency, directed=True, indices=sources,
+                                                       return_predecessors=True)
+        block_predecessors = np.where(block_predecessors < 0, -1, block_predecessors)
+
+        metrics["latency_ms"][sources] = latency
+        predecessors[sources] = block_predecessors
+        for name, value in accumulate_along_tree(block_predecessors, sources, edge_tables).items():
+            metrics[name][sources] = value
+
+    return metrics, predecessors
@@ -0,0 +1,225 @@
+import time
+import numpy as np
+from scipy.sparse import csr_matrix
+from ortools.linear_solver import pywraplp
+from ortools.linear_solver.python import model_builder
+
+
+# Stand-in for an assignment variable that was left out of the model (unreachable or pruned pair)
+class PrunedVariable:
+    def solution_value(self):
+        return 0.0
+
+
+# {node: variable} view over the x columns of the solver, in node order
+class VariableMap:
+    def __init__(self, variables, node_index):
+        self.variables = variables
+        self.node_index = node_index
+
+    def __getitem__(self, node):
+        return self.variables[self.node_index[node]]
+
+
+# {(i, j): variable} view over the y columns; pairs without a column answer with a PrunedVariable
+class VariableGrid:
+    def __init__(self, variables, node_index, columns):
+        self.variables = variables
+        self.node_index = node_index
+        self.columns = columns
+
+    def __getitem__(self, key):
+        i, j = key
+        column = self.columns[self.node_index[i], self.node_index[j]]
+        return self.variables[column] if column >= 0 else PrunedVariable()
+
+
+# Built model: the pywraplp solver, the x / y / Z views, the row of the CDN limit and the size and build time
+# of the model
+class PlacementModel:
+    def __init__(self, solver, x, y, Z, cdn_limit_row, build_seconds, num_assignments, num_constraints,
+                 num_nonzeros):
+        self.solver = solver
+        self.x = x
+        self.y = y
+        self.Z = Z
+        self.cdn_limit_row = cdn_limit_row
+        self.build_seconds = build_seconds
+        self.num_assignments = num_assignments
+        self.num_constraints = num_constraints
+        self.num_nonzeros = num_nonzeros
+
+    # Function to pass a placement to the solver as a complete solution hint (solvers such as SCIP ignore
+    # mostly partial hints): x for the centers, y for every node's nearest center, 0 for every other column,
+    # and Z for k-center
+    def set_hint(self, distances, centers):
+        distances = dense_distances(distances, distances.shape[0])
+        centers = np.asarray(centers, dtype=np.int64)
+        demands = np.arange(distances.shape[1])
+        serving = centers[np.argmin(distances[centers], axis=0)]
+        columns = self.y.columns[serving, demands]
+
+        hint_values = np.zeros(len(self.y.variables))
+        hint_values[centers] = 1.0
+        hint_values[columns[columns >= 0]] = 1.0
+        if self.Z is not None:
+            hint_values[-1] = float(distances[serving, demands].max())
+        self.solver.SetHint(self.y.variables, hint_values.tolist())
+
+    # Function to change the CDN limit in place: only the right-hand side of the "at most N centers" row moves,
+    # so the model can be re-solved for another N without rebuilding it
+    def set_cdn_limit(self, N):
+        self.solver.constraints()[self.cdn_limit_row].SetUb(float(N))
+
+    # Function to restrict the model to the pairs in `mask` without rebuilding it: assignment columns outside
+    # the mask are fixed to 0 and the others released (the diagonal always stays available)
+    def set_assignment_mask(self, mask):
+        kept = mask | np.eye(len(mask), dtype=bool)
+        has_column = self.y.columns >= 0
+        for column, keep in zip(self.y.columns[has_column].tolist(), kept[has_column].tolist()):
+            self.y.variables[column].SetUb(1.0 if keep else 0.0)
+
+    def report(self):
+        return (f"Model built in {self.build_seconds:.3f} s: {self.solver.NumVariables()} variables "
+                f"({self.num_assignments} assignment variables), {self.num_constraints} constraints, "
+                f"{self.num_nonzeros} nonzeros")
+
+
+# Function to read a dense distance source (matrix or memory map) as a float64 n x n array
+# A landmark oracle is refused rather than densified: n row queries would build the very n x n table it exists
+# to avoid, and in its default mode every entry would be a lower bound rather than a distance
+def dense_distances(distances, n):
+    if isinstance(distances, np.ndarray):
+        return np.asarray(distances, dtype=np.float64)
+    raise ValueError(f"{type(distances).__name__} only answers (source, target) pairs; the optimizers need the "
+                     f"all-pairs table of the {n} nodes (distance_source = \"matrix\").")
+
+
+# Function to build an assignment mask that only lets the given centers serve nodes within `radius`
+# Handing it to build_placement_model() reduces the MILP to recovering the assignment of a known placement
+def center_assignment_mask(distances, centers, radius=np.inf):
+    distances = dense_distances(distances, distances.shape[0])
+    mask = np.zeros(distances.shape, dtype=bool)
+    mask[centers] = distances[centers] <= radius
+    return mask
+
+
+# Function to build a CDN placement MILP from the distance matrix in bulk
+# The constraint matrix is assembled as NumPy index arrays and handed to OR-Tools as one sparse matrix,
+# instead of one IntVar / Add call per pair. Columns: x[i] for every node, y[i, j] for every kept pair
+# (row-major), then Z for "k_center". Formulations match Optimization04/05/06:
+#   "p_median" - minimize sum d[i, j] * y[i, j] (divided by n when `average` is set)
+#   "k_center" - minimize Z with Z >= d[i, j] * y[i, j]
+# `no_mutual_service` adds y[i, j] + y[j, i] <= 2 - (x[i] + x[j]) once per unordered pair, or
+# y[i, j] <= 2 - (x[i] + x[j]) when only one direction has a column
+# Pairs with an infinite distance, or outside `assignment_mask`, get no y column at all
+# `objective_cutoff` (in objective units, e.g. a known placement's value) bounds the objective from above,
+# so branch-and-bound can discard every node that cannot beat it. For "k_center" it is just the upper bound
+# of Z; for "p_median" it is one extra row holding every assignment column, a dense row that can slow each
+# LP solve, so warm starts usually leave it out and rely on the hint's incumbent (see PlacementModel.set_hint)
+# The matrix may also be rectangular, n candidate nodes x m demand points (e.g. aggregated demand, see
+# Demand_Aggregation.py); `demand_rows` then gives the candidate row of every demand point
+def build_placement_model(distances, nodes, N, objective="p_median", average=False, no_mutual_service=False,
+                          assignment_mask=None, objective_cutoff=None, solver_name='CBC', demand_rows=None):
+    start = time.perf_counter()
+    n = len(nodes)
+    node_index = {node: k for k, node in enumerate(nodes)}
+    distances = dense_distances(distances, n)
+    num_demands = distances.shape[1]
+    if demand_rows is None:
+        demand_rows = np.arange(n)
+
+    keep = np.isfinite(distances)
+    if assignment_mask is not None:
+        keep &= assignment_mask
+    keep[demand_rows, np.arange(num_demands)] = True  # A center can always serve itself, so the model is feasible
+
+    serving, served = np.nonzero(keep)
+    num_assignments = len(serving)
+    y_columns = np.full((n, num_demands), -1, dtype=np.int64)
+    y_columns[serving, served] = n + np.arange(num_assignments)
+    y_range = n + np.arange(num_assignments)
+    k_center = objective == "k_center"
+    num_columns = n + num_assignments + (1 if k_center else 0)
+
+    rows, columns, values, lower, upper = [], [], [], [], []
+
+    # Function to append a group of constraint rows given per-nonzero (row offset, column, value)
+    def add_rows(row_offsets, row_columns, row_values, num_rows, row_lower, row_upper):
+        first_row = sum(len(bounds) for bounds in lower)
+        rows.append(first_row + row_offsets)
+        columns.append(row_columns)
+        values.append(row_values)
+        lower.append(np.full(num_rows, row_lower, dtype=np.float64))
+        upper.append(np.full(num_rows, row_upper, dtype=np.float64))
+
+    # y[i, j] <= x[i]
+    linking = np.arange(num_assignments)
+    add_rows(np.concatenate([linking, linking]), np.concatenate([y_range, serving]),
+             np.concatenate([np.ones(num_assignments), -np.ones(num_assignments)]),
+             num_assignments, -np.inf, 0.0)
+
+    # Every node is served exactly once: sum_i y[i, j] == 1
+    add_rows(served, y_range, np.ones(num_assignments), num_demands, 1.0, 1.0)
+
+    # At most N centers
+    cdn_limit_row = num_assignments + num_demands
+    add_rows(np.zeros(n, dtype=np.int64), np.arange(n), np.ones(n), 1, -np.inf, float(N))
+
+    if no_mutual_service:
+        # Pairs i < j where both directions have a column: y[i, j] + y[j, i] + x[i] + x[j] <= 2
+        first, second = np.nonzero(np.triu(keep, k=1) & keep.T)
+        pairs = np.arange(len(first))
+        add_rows(np.repeat(pairs, 4),
+                 np.column_stack([y_columns[first, second], y_columns[second, first], first, second]).ravel(),
+                 np.ones(4 * len(first)), len(first), -np.inf, 2.0)
+
+        # Pairs where only y[i, j] has a column (e.g. the other direction was pruned by the mask): the linking
+        # row y[i, j] <= x[i] still lets an open center j be served by i, so add y[i, j] + x[i] + x[j] <= 2
+        one_sided = keep & ~keep.T
+        np.fill_diagonal(one_sided, False)
+        first, second = np.nonzero(one_sided)
+        pairs = np.arange(len(first))
+        add_rows(np.repeat(pairs, 3), np.column_stack([y_columns[first, second], first, second]).ravel(),
+                 np.ones(3 * len(first)), len(first), -np.inf, 2.0)
+
+    objective_coefficients = np.zeros(num_columns)
+    if k_center:
+        # d[i, j] * y[i, j] - Z <= 0
+        bounds = np.arange(num_assignments)
+        add_rows(np.concatenate([bounds, bounds]),
+                 np.concatenate([y_range, np.full(num_assignments, num_columns - 1)]),
+                 np.concatenate([distances[serving, served], -np.ones(num_assignments)]),
+                 num_assignments, -np.inf, 0.0)
+        objective_coefficients[-1] = 1.0
+    else:
+        objective_coefficients[y_range] = distances[serving, served] / (num_demands if average else 1)
+        if objective_cutoff is not None:
+            add_rows(np.zeros(num_assignments, dtype=np.int64), y_range, objective_coefficients[y_range], 1,
+                     -np.inf, objective_cutoff * (1 + 1e-9) + 1e-9)
+
+    lower = np.concatenate(lower)
+    upper = np.concatenate(upper)
+    constraint_matrix = csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+                                   shape=(len(lower), num_columns))
+
+    variable_upper = np.ones(num_columns)
+    if k_center:
+        variable_upper[-1] = np.inf if objective_cutoff is None else objective_cutoff * (1 + 1e-9) + 1e-9
+
+    model = model_builder.Model()
+    model.helper.fill_model_from_sparse_data(np.zeros(num_columns), variable_upper, objective_coefficients,
+                                             lower, upper, constraint_matrix)
+    for column in range(n + num_assignments):
+        model.helper.set_var_integrality(column, True)
+
+    solver = pywraplp.Solver.CreateSolver(solver_name)
+    error = solver.LoadModelFromProto(model.export_to_proto())
+    if error:
+        raise ValueError(f"Could not load the placement model: {error}")
+
+    variables = solver.variables()
+    build_seconds = time.perf_counter() - start
+    return PlacementModel(solver, VariableMap(variables, node_index), VariableGrid(variables, node_index, y_columns),
+                          variables[-1] if k_center else None, cdn_limit_row, build_seconds, num_assignments,
+                          len(lower), constraint_matrix.nnz)
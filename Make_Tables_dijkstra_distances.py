@@ -1,33 +1,13 @@
 import os
-import json
 import heapq
-import networkx as nx
-from math import radians, sin, cos, sqrt, atan2
-
-
-# Function to calculate haversine distance between two coordinates
-def haversine_distance(coord1, coord2):
-    R = 6371  # Earth radius in kilometers
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-
-    distance = R * c
-    return distance
-
-
-# Function to add weights to the edges in the graph
-def add_edge_weights_to_graph(G):
-    for i, j, data in G.edges(data=True):
-        coord_i = (G.nodes[i]['Latitude'], G.nodes[i]['Longitude'])
-        coord_j = (G.nodes[j]['Latitude'], G.nodes[j]['Longitude'])
-        distance = haversine_distance(coord_i, coord_j)
-        G[i][j]['weight'] = distance  # Add as an attribute to the edge
+import numpy as np
+from Distance_Cache import (lookup_distance_matrix, store_distance_matrix, lookup_sparse_distance_matrix,
+                            store_sparse_distance_matrix, store_blocked_distance_matrix, cached_latency_paths,
+                            cache_folder_path)
+from Geo_Utils import add_edge_weights_to_graph
+from Graph_Cache import load_graph
+from Shortest_Paths import parallel_all_pairs_dijkstra, graph_to_csr, csgraph_shortest_paths
+from Sparse_Distances import sparse_distance_table
 
 
 # Function to calculate shortest distances using Dijkstra's algorithm
@@ -54,26 +34,94 @@ def dijkstra_distances(G, source):
 
 # Read the GML file
 file_path = "MainFolder/Datasets/interconnect_Cleaned.gml"  # Adjust the path as needed
-G = nx.read_gml(file_path, label="id")
-
-# Add weights to the graph edges
-add_edge_weights_to_graph(G)
-
-# Create folder for JSON files if it doesn't exist
-json_folder_path = "MainFolder/Datasets/ShortestDistances"
-if not os.path.exists(json_folder_path):
-    os.makedirs(json_folder_path)
-
-# Initialize an empty dictionary to hold all shortest distances
-all_shortest_distances = {}
-
-# Precompute shortest distances
-for i in G.nodes():
-    shortest_distances = dijkstra_distances(G, i)
-    all_shortest_distances[str(i)] = shortest_distances
-
-# Store all shortest distances in a single JSON file
-json_file_path = os.path.join(json_folder_path, "all_shortest_distances.json")
 
-with open(json_file_path, 'w') as f:
-    json.dump(all_shortest_distances, f, indent=4)
+# Shortest-path backend: "csgraph" (SciPy's C-backed Dijkstra on a CSR adjacency),
+# "parallel" (pure-Python Dijkstra sharded over num_workers processes),
+# "blocked" (csgraph in row blocks written to a memory-mapped file, checkpointed after every block,
+# for matrices that do not fit in RAM; a killed run resumes where it stopped)
+# or "reference" (the original single-process Dijkstra, kept to check results against)
+backend = "csgraph"
+
+# Number of rows computed and written per block by the "blocked" backend
+block_size = 1024
+
+# Number of worker processes for the "parallel" backend
+num_workers = os.cpu_count()
+
+# Precision of the stored matrix: np.float32 halves the file size, np.float64 keeps full precision
+matrix_dtype = np.float32
+
+# Table layout: "dense" keeps every pair; "sparse" keeps, per node, only its sparse_k nearest nodes
+# and/or the nodes within sparse_radius km, in CSR form (for topologies too large for a dense table)
+table_mode = "dense"
+sparse_k = 50
+sparse_radius = None
+
+# Also precompute the latency-model tables (latency_ms, propagation_ms, hops and route_km, see Latency_Metrics.py).
+# All of them come out of one Dijkstra pass per source and are cached together
+latency_model = False
+
+
+# The guard keeps worker processes from re-running the script when they start
+if __name__ == "__main__":
+    # Tables are cached under a hash of the GML content and the edge-weighting function,
+    # so re-runs on the same topology skip the precompute
+    if table_mode == "sparse":
+        if lookup_sparse_distance_matrix(file_path, sparse_k, sparse_radius) is not None:
+            print(f"Sparse distance table for {file_path} is already cached in {cache_folder_path}")
+        else:
+            G = load_graph(file_path).graph
+            add_edge_weights_to_graph(G)
+            nodes = list(G.nodes())
+
+            # Early-terminating Dijkstra per source; see Sparse_Distances.py for the fallback on missing pairs
+            table = sparse_distance_table(*graph_to_csr(G, nodes), k=sparse_k, radius=sparse_radius,
+                                          dtype=matrix_dtype)
+            matrix_file_path = store_sparse_distance_matrix(file_path, table, nodes, sparse_k, sparse_radius)
+            print(f"Stored sparse distance table ({table.nnz} pairs) in {matrix_file_path}")
+    elif lookup_distance_matrix(file_path, dtype=matrix_dtype) is not None:
+        print(f"Distance table for {file_path} is already cached in {cache_folder_path}")
+    else:
+        G = load_graph(file_path).graph
+
+        # Add weights to the graph edges
+        add_edge_weights_to_graph(G)
+
+        # Row/column k of the matrix belongs to nodes[k]
+        nodes = list(G.nodes())
+        node_index = {node: k for k, node in enumerate(nodes)}
+
+        # Precompute shortest distances (only the csgraph backend also returns predecessors)
+        all_predecessors = None
+        if backend == "blocked":
+            # The matrix never lives in RAM: blocks go straight to the cache file
+            matrix_file_path = store_blocked_distance_matrix(file_path, G, nodes, block_size, dtype=matrix_dtype)
+            print(f"Stored distance table in {matrix_file_path}")
+        elif backend == "csgraph":
+            # Build the CSR adjacency once and solve every source in a single C-backed call
+            indptr, indices, weights = graph_to_csr(G, nodes)
+            all_shortest_distances, all_predecessors = csgraph_shortest_paths(indptr, indices, weights)
+            all_shortest_distances = all_shortest_distances.astype(matrix_dtype)
+        elif backend == "parallel":
+            # Sources are sharded across worker processes that write rows into shared memory
+            all_shortest_distances = parallel_all_pairs_dijkstra(G, nodes, num_workers=num_workers, dtype=matrix_dtype)
+        else:
+            # Initialize a dense matrix to hold all shortest distances (unreachable pairs stay inf)
+            all_shortest_distances = np.full((len(nodes), len(nodes)), np.inf, dtype=matrix_dtype)
+
+            for i in nodes:
+                shortest_distances = dijkstra_distances(G, i)
+                row = all_shortest_distances[node_index[i]]
+                for j, distance in shortest_distances.items():
+                    row[node_index[j]] = distance
+
+        # Store all shortest distances as a binary .npy matrix plus a node-index sidecar holding the graph hash,
+        # with the predecessor matrix when the backend produced one (the optimizers need both for a cache hit;
+        # for the other backends cached_shortest_paths() computes the predecessors on first use)
+        if backend != "blocked":
+            matrix_file_path = store_distance_matrix(file_path, all_shortest_distances, nodes,
+                                                     predecessors=all_predecessors, dtype=matrix_dtype)
+            print(f"Stored distance table in {matrix_file_path}")
+
+    if latency_model:
+        cached_latency_paths(file_path, dtype=matrix_dtype)
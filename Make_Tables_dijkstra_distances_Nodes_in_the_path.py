@@ -1,95 +1,35 @@
-import os
-import json
-import heapq
-import networkx as nx
-from math import radians, sin, cos, sqrt, atan2
-
-
-# Function to calculate haversine distance between two coordinates
-def haversine_distance(coord1, coord2):
-    R = 6371  # Earth radius in kilometers
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-
-    distance = R * c
-    return distance
-
-
-# Function to add weights to the edges in the graph
-def add_edge_weights_to_graph(G):
-    for i, j, data in G.edges(data=True):
-        coord_i = (G.nodes[i]['Latitude'], G.nodes[i]['Longitude'])
-        coord_j = (G.nodes[j]['Latitude'], G.nodes[j]['Longitude'])
-        distance = haversine_distance(coord_i, coord_j)
-        G[i][j]['weight'] = distance  # Add as an attribute to the edge
-
-
-# Function to calculate shortest distances and paths using Dijkstra's algorithm
-def dijkstra_distances_and_paths(G, source):
-    distances = {node: float('inf') for node in G.nodes()}
-    distances[source] = 0
-    predecessors = {node: None for node in G.nodes()}
-    queue = [(0, source)]
-
-    while queue:
-        current_distance, current_node = heapq.heappop(queue)
-
-        if current_distance > distances[current_node]:
-            continue
-
-        for neighbor, data in G[current_node].items():
-            distance = current_distance + G[current_node][neighbor]['weight']
-
-            if distance < distances[neighbor]:
-                distances[neighbor] = distance
-                predecessors[neighbor] = current_node
-                heapq.heappush(queue, (distance, neighbor))
-
-    # Reconstruct paths
-    paths = {}
-    for node in G.nodes():
-        if predecessors[node] is None:
-            paths[node] = []
-        else:
-            path = []
-            current = node
-            while current is not None:
-                path.insert(0, current)
-                current = predecessors[current]
-            paths[node] = path
-
-    return distances, paths
+import numpy as np
+from Distance_Cache import store_distance_matrix
+from Geo_Utils import add_edge_weights_to_graph
+from Graph_Cache import load_graph
+from Shortest_Paths import graph_to_csr, csgraph_shortest_paths, reference_shortest_paths
 
 
 # Read the GML file
 file_path = "MainFolder/Datasets/interconnect_Cleaned.gml"  # condensed_west_europe_Cleaned or interconnect_Cleaned
-G = nx.read_gml(file_path, label="id")
 
-# Add weights to the graph edges
-add_edge_weights_to_graph(G)
+# Shortest-path backend: "csgraph" (SciPy's C-backed Dijkstra) or "reference" (pure-Python Dijkstra)
+backend = "csgraph"
 
-# Create folder for JSON files if it doesn't exist
-json_folder_path = "MainFolder/Datasets/ShortestDistances"
-if not os.path.exists(json_folder_path):
-    os.makedirs(json_folder_path)
+# Precision of the stored distance matrix: np.float32 or np.float64
+matrix_dtype = np.float32
 
-# Initialize an empty dictionary to hold all shortest distances
-all_shortest_distances = {}
+G = load_graph(file_path).graph
 
-# Precompute shortest distances and paths
-for i in G.nodes():
-    shortest_distances, paths = dijkstra_distances_and_paths(G, i)
-    all_shortest_distances[str(i)] = {'distances': shortest_distances, 'paths': paths}
+# Add weights to the graph edges
+add_edge_weights_to_graph(G)
 
+# Row/column k of both matrices belongs to nodes[k]
+nodes = list(G.nodes())
 
-# Store all shortest distances in a single JSON file
-json_file_path = os.path.join(json_folder_path, "all_shortest_distances_with_nodes.json")
+# Precompute shortest distances and predecessors
+# Paths are not stored: reconstruct_path()/reconstruct_paths() rebuild them from the predecessor matrix
+if backend == "csgraph":
+    indptr, indices, weights = graph_to_csr(G, nodes)
+    all_shortest_distances, all_predecessors = csgraph_shortest_paths(indptr, indices, weights)
+else:
+    all_shortest_distances, all_predecessors = reference_shortest_paths(G, nodes)
 
-with open(json_file_path, 'w') as f:
-    json.dump(all_shortest_distances, f, indent=4)
+# Store the distance matrix and the int32 predecessor matrix in the cache, keyed by the graph hash
+matrix_file_path = store_distance_matrix(file_path, all_shortest_distances, nodes, all_predecessors, dtype=matrix_dtype)
+print(f"Stored distance and predecessor tables next to {matrix_file_path}")
@@ -1,129 +1,65 @@
-from ortools.linear_solver import pywraplp
-import networkx as nx
 import folium
 import random
 import webbrowser
 import os
-import json
 import datetime
-
-
-def create_RCL(G, centers, alpha):
-    # Calculate the distances from each node to its closest center
-    closest_distances = {}
-    for node in G.nodes():
-        closest_distance = min(
-            [precomputed_distances[str(node)][str(center)] for center in centers]) if centers else float('inf')
-        closest_distances[node] = closest_distance
-
-    # Sort the nodes by their closest distances in ascending order
-    sorted_nodes = sorted(G.nodes(), key=lambda x: closest_distances[x])
-
-    # Select the top-alpha percent nodes to form the RCL
-    rcl_size = int(alpha * len(G.nodes()))
-    RCL = sorted_nodes[:rcl_size]
-
-    return RCL
-
-
-
-def calculate_delta(G, old_center, new_center, centers):
-    delta = 0
-    for node in G.nodes():
-        # Skip the centers; they are not affected
-        if node in centers:
-            continue
-
-        old_distance = precomputed_distances[str(node)][str(old_center)]
-        new_distance = precomputed_distances[str(node)][str(new_center)]
-
-        # Calculate the closest distance to the existing centers for this node
-        closest_distance = min([precomputed_distances[str(node)][str(center)] for center in centers if center != old_center])
-
-        # Check how this swap would affect the maximum distance
-        if old_distance == closest_distance:
-            # The old center was contributing to the maximum distance.
-            # So, consider the new center and the second closest distance.
-            delta += max(0, max(new_distance, closest_distance) - old_distance)
-
-        elif new_distance < closest_distance:
-            # The new center offers a shorter distance than any existing center.
-            delta += new_distance - closest_distance
-
-    return delta
-
-
-
-
-# One common approach to local search in the k-center problem is to explore
-def local_search_optimized(G, centers):
-    best_centers = centers.copy()
-    best_objective_value = calculate_objective_value(G, best_centers)
-
-    improved = True
-    while improved:
-        improved = False
-        for i in range(len(best_centers)):
-            for node in set(G.nodes()) - set(best_centers):
-                # Swap and calculate only the affected distances
-                old_center = best_centers[i]
-                best_centers[i] = node
-                delta = calculate_delta(G, old_center, node, best_centers)
-
-                # Update if improvement found
-                if delta < 0:
-                    best_objective_value += delta
-                    improved = True
-                    break
-                else:
-                    best_centers[i] = old_center  # Revert the change
-
-            if improved:
-                break
-
-    return best_centers
-
-
-
-
-def calculate_objective_value(G, centers):
-    # Calculate the maximum distance from any node to its closest center
-    max_distance = 0
-    for node in G.nodes():
-        closest_distance = min([precomputed_distances[str(node)][str(center)] for center in centers])
-        max_distance = max(max_distance, closest_distance)
-
-    return max_distance
-
-
+import numpy as np
+from Distance_Cache import cached_shortest_paths
+from Geo_Utils import add_edge_weights_to_graph
+from Graph_Cache import load_graph
+from Latency_Metrics import metric_units
+from MILP_Builder import dense_distances
+from Placement_Evaluator import nearest_centers, path_from_nearest_center
+from Placement_Heuristics import grasp_placement
+from Population_Weights import demand_weights, node_populations, weighted_distances
+from Shortest_Paths import reconstruct_path, load_graph_csr
 
 
 
 
 # Main Code
-# Load precomputed shortest distances
-json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_with_nodes_for_condensed_graph.json"
-with open(json_file_path, 'r') as f:
-    precomputed_data = json.load(f)
-precomputed_distances = {i: precomputed_data[i]['distances'] for i in precomputed_data}
-
-
-
-
-
 # Read the GML file
 file_path = "MainFolder/Datasets/condensed_west_europe_Cleaned.gml"
-G = nx.read_gml(file_path, label="id")
-
-# GRASP parameters
+G = load_graph(file_path).graph
+
+# Metric to optimize: "distance_km" (shortest haversine km) or a latency-model metric
+# ("latency_ms", "propagation_ms", "hops" or "route_km", see Latency_Metrics.py)
+metric = "distance_km"
+unit = metric_units[metric]
+
+# Placement evaluator for the placement GRASP returns: "table" (nearest centers looked up in the distance table)
+# or "multi_source" (the placement rescored by one multi-source Dijkstra on the CSR graph, with the paths from its
+# predecessors; scores "distance_km" only, see Placement_Evaluator.py). The search itself always reads the table:
+# every construction step scores all candidates, which without the table would be an all-pairs Dijkstra per step
+evaluator = "table"
+
+# Look up the distance and predecessor matrices for this exact GML in the content-addressed cache
+# (computed on the first run; a table built from a different topology is never used)
+precomputed_distances, predecessors, matrix_nodes, node_index = cached_shortest_paths(file_path, metric=metric)
+distances = dense_distances(precomputed_distances, len(matrix_nodes))
+
+# Demand weighting: None (every node counts once) or "population" (each node's distance counts in proportion to its
+# Closest_Population_Imputed in the enriched CSV, so the objective is the population-weighted average distance;
+# see Population_Weights.py). The weighted matrix drives the optimization, the plain one the reported distances
+demand_weighting = None
+objective_distances = distances
+if demand_weighting == "population":
+    objective_distances = weighted_distances(distances, demand_weights(node_populations(G, matrix_nodes)))
+
+if evaluator == "multi_source":
+    if metric != "distance_km":
+        raise ValueError(f"The multi_source evaluator scores distance_km only, not {metric}.")
+    # Same node order as the table (both list the nodes of the cached graph)
+    csr_indptr, csr_indices, csr_weights, _ = load_graph_csr(file_path, add_edge_weights_to_graph)
+
+# GRASP parameters (the search itself is grasp_placement in Placement_Heuristics.py, shared with the MILP
+# warm starts): objective "k_center" (minimize the maximum distance) or "p_median" (minimize the total)
+objective = "k_center"
 alpha = 0.2
 iterations = 100
-N = 10
-
-best_solution = []
-best_objective_value = float('inf')
 early_stopping_rounds = 10
-rounds_without_improvement = 0
+seed = None
+N = 10
 
 
 
@@ -131,42 +67,27 @@ rounds_without_improvement = 0
 start_time = datetime.datetime.now()
 print("Start Time: ", start_time)
 
-
-for _ in range(iterations):
-    # Greedy Randomized Phase
-    centers = []
-    while len(centers) < N:
-        RCL = create_RCL(G, centers, alpha)
-        new_center = random.choice(RCL)
-        centers.append(new_center)
-
-    # Local Search
-    centers = local_search_optimized(G, centers)  # Note the corrected function name
-
-    # Calculate objective value
-    objective_value = calculate_objective_value(G, centers)
-
-    if objective_value < best_objective_value:
-        best_solution = centers
-        best_objective_value = objective_value
-        rounds_without_improvement = 0  # Reset the counter
-    else:
-        rounds_without_improvement += 1
-
-    if rounds_without_improvement >= early_stopping_rounds:
-        print("Stopped early.")
-        break
+center_rows, best_objective_value = grasp_placement(objective_distances, N, objective, alpha=alpha,
+                                                    iterations=iterations, early_stopping_rounds=early_stopping_rounds,
+                                                    seed=seed)
+best_solution = [matrix_nodes[k] for k in center_rows]
 
 print("Best CDN centers:", best_solution)
 print("Best objective value:", best_objective_value)
 
-
+# Row of the nearest center of every node and its distance
+if evaluator == "multi_source":
+    serving, served_distances, nearest_predecessors = nearest_centers(csr_indptr, csr_indices, csr_weights,
+                                                                      center_rows)
+else:
+    serving = np.asarray(center_rows)[np.argmin(distances[center_rows], axis=0)]
+    served_distances = distances[center_rows].min(axis=0)
 
 
 
 
 # Generate a unique name for the map and text files based on parameters
-file_suffix = f"{len(G.nodes())}_Nodes_{N}_CDNs_'k_center'_{os.path.basename(file_path).replace('.gml', '')}"
+file_suffix = f"{len(G.nodes())}_Nodes_{N}_CDNs_'{objective}'_{os.path.basename(file_path).replace('.gml', '')}"
 map_file_name = f"MainFolder/Map/map_{file_suffix}.html"
 text_file_name = f"MainFolder/Map/results_{file_suffix}.txt"
 
@@ -190,9 +111,11 @@ with open(text_file_name, 'w') as text_file:
     text_file.write(f"Total Time: {duration}\n")
     # write the number of CDNs in the text file
     text_file.write(f"Number of CDNs: {N}\n")
+    print("Demand weighting: ", demand_weighting)
+    text_file.write(f"Demand weighting: {demand_weighting}\n")
 
-    print('Optimal solution found')
-    text_file.write("Optimal solution found\n")
+    print(f"GRASP ({objective}) best objective value: {best_objective_value}")
+    text_file.write(f"GRASP ({objective}) best objective value: {best_objective_value}\n")
 
 
     # Create Folium map for visualization
@@ -206,20 +129,10 @@ with open(text_file_name, 'w') as text_file:
 
     color_map = {}  # Map from CDN centers to their unique colors
 
-    # Create a dictionary to store the shortest distance from each node to its corresponding CDN
-    shortest_distances = {}
-
-     # First, determine the shortest distance for each node to its CDN center
-    for i, data in G.nodes(data=True):
-        for j, data_j in G.nodes(data=True):
-            if y[i, j].solution_value() == 1:
-                distance = precomputed_distances[str(i)].get(str(j), float('inf'))
-                shortest_distances[j] = distance
-
     # Then, add all served nodes with blue markers with tooltips
     for i, data in G.nodes(data=True):
-        if x[i].solution_value() == 0:  # Only add if it's not a CDN center
-            distance = shortest_distances.get(i, 'Unknown')
+        if i not in best_solution:  # Only add if it's not a CDN center
+            distance = float(served_distances[node_index[i]])
             folium.CircleMarker(
                 location=[data['Latitude'], data['Longitude']],
                 radius=4,
@@ -227,30 +140,31 @@ with open(text_file_name, 'w') as text_file:
                 fill=True,
                 fill_color='blue',
                 fill_opacity=0.7,
-                tooltip=f"Node: {data['label']}, Shortest Distance to CDN: {distance} km"
+                tooltip=f"Node: {data['label']}, Shortest Distance to CDN: {round(distance, 1)} {unit}"
             ).add_to(m)
 
     # Then, add CDN centers and nodes they serve with red markers
-    for i, data in G.nodes(data=True):
-        if x[i].solution_value() == 1:
-            random_color = "#{:02x}{:02x}{:02x}".format(random.randint(0, 128),
-                                                        random.randint(0, 128),
-                                                        random.randint(0, 128))
-            color_map[i] = random_color
+    for k, i in enumerate(best_solution):
+        data = G.nodes[i]
+        random_color = "#{:02x}{:02x}{:02x}".format(random.randint(0, 128),
+                                                    random.randint(0, 128),
+                                                    random.randint(0, 128))
+        color_map[i] = random_color
 
-            print(f"CDN center at node {i}, Location: {data['label']}")
-            folium.Marker([data['Latitude'], data['Longitude']], icon=folium.Icon(color='red'),
-                          tooltip=f"CDN Center: {data['label']}").add_to(m)
+        print(f"CDN center at node {i}, Location: {data['label']}")
+        folium.Marker([data['Latitude'], data['Longitude']], icon=folium.Icon(color='red'),
+                      tooltip=f"CDN Center: {data['label']}").add_to(m)
 
-        for j, data_j in G.nodes(data=True):
-            if y[i, j].solution_value() == 1:
-                path = nx.shortest_path(G, source=i, target=j, weight='weight')
-                coordinates = [(G.nodes[node]['Latitude'], G.nodes[node]['Longitude']) for node in path]
-                distance = precomputed_distances[str(i)].get(str(j), float('inf'))  # Update here
-                text_line = f"Node {j} is served by {i}, Distance: {round(distance, 1)} km"
-                print(text_line)
-                text_file.write(text_line + "\n")
-                folium.PolyLine(coordinates, color=color_map.get(i, 'black'), weight=2.5).add_to(m)
+        for j in np.nonzero(serving == center_rows[k])[0]:
+            if evaluator == "multi_source":
+                path = path_from_nearest_center(serving, nearest_predecessors, j, matrix_nodes)
+            else:
+                path = reconstruct_path(predecessors, node_index[i], j, matrix_nodes)
+            coordinates = [(G.nodes[node]['Latitude'], G.nodes[node]['Longitude']) for node in path]
+            text_line = f"Node {matrix_nodes[j]} is served by {i}, Distance: {round(float(served_distances[j]), 1)} {unit}"
+            print(text_line)
+            text_file.write(text_line + "\n")
+            folium.PolyLine(coordinates, color=color_map.get(i, 'black'), weight=2.5).add_to(m)
 
 
 
@@ -262,4 +176,3 @@ m.save(full_map_file_path)
 # Open the map in Google Chrome
 chrome_path = 'C:/Program Files/Google/Chrome/Application/chrome.exe %s'  # Windows
 webbrowser.get(chrome_path).open(f'file://{full_map_file_path}', new=2)
-
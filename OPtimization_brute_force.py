@@ -1,23 +1,27 @@
-import networkx as nx
-import json
 import itertools
 import folium
 import random
 import webbrowser
 import os
 import datetime
+from Distance_Cache import cached_shortest_paths, cached_landmark_oracle
+from Geo_Utils import add_edge_weights_to_graph
+from Graph_Cache import load_graph
+from Latency_Metrics import metric_units
+from Placement_Evaluator import evaluate_placement, nearest_centers
+from Population_Weights import demand_weights, node_populations, weighted_distances
+from Shortest_Paths import load_graph_csr
 
 # Function to calculate the objective value for a given set of CDN centers
-def calculate_objective_value(cdn_centers, precomputed_distances, G):
+def calculate_objective_value(cdn_centers, precomputed_distances, node_index, G):
     total_distance = 0
     for j in G.nodes():
         min_distance = float('inf')
         for i in cdn_centers:
-            if nx.has_path(G, i, j):
-                distance = precomputed_distances[str(i)].get(str(j), float('inf'))
-                min_distance = min(min_distance, distance)
-            else:
+            distance = float(precomputed_distances[node_index[i], node_index[j]])
+            if distance == float('inf'):  # Unreachable pairs are stored as inf in the matrix
                 print(f"No path exists between {i} and {j} in the GML file.")
+            min_distance = min(min_distance, distance)
         if min_distance == float('inf'):
             return float('inf')  # If no path exists, return infinity
         total_distance += min_distance
@@ -27,13 +31,57 @@ def calculate_objective_value(cdn_centers, precomputed_distances, G):
 
 # Read the GML file
 file_path = "MainFolder/Datasets/italy_network.gml"
-G = nx.read_gml(file_path, label="id")
-
-# Load precomputed shortest distances and paths from JSON file
-json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_with_nodes_for_condensed_graph.json"
-with open(json_file_path, 'r') as f:
-    precomputed_data = json.load(f)
-precomputed_distances = {i: precomputed_data[i]['distances'] for i in precomputed_data if i in map(str, G.nodes())}
+G = load_graph(file_path).graph
+
+# Metric to optimize: "distance_km" (shortest haversine km) or a latency-model metric
+# ("latency_ms", "propagation_ms", "hops" or "route_km", see Latency_Metrics.py)
+metric = "distance_km"
+unit = metric_units[metric]
+
+# Distance source: "matrix" (all-pairs table) or "landmarks" (landmark oracle with O(n * L) memory for graphs
+# too large for the table; answers "distance_km" only, see Landmark_Oracle.py). Brute force only asks for the
+# center x node pairs of each placement, so the oracle is never densified
+distance_source = "matrix"
+
+# Landmark oracle mode: "exact" (one A* search per pair, true distances), "upper" or "lower" (ALT bounds; the
+# placements are then ranked by the bounds, and the objective and distances reported are labelled as bounds)
+landmark_mode = "exact"
+
+# Placement evaluator: "table" (lookups in the distances of the distance source) or "multi_source" (one
+# Dijkstra seeded from all centers per placement on the CSR graph, so no all-pairs table or distance source is
+# loaded at all; scores "distance_km" only, see Placement_Evaluator.py)
+evaluator = "table"
+
+if evaluator == "multi_source":
+    if metric != "distance_km":
+        raise ValueError(f"The multi_source evaluator scores distance_km only, not {metric}.")
+    csr_indptr, csr_indices, csr_weights, csr_nodes = load_graph_csr(file_path, add_edge_weights_to_graph)
+    csr_index = {node: k for k, node in enumerate(csr_nodes)}
+elif distance_source == "landmarks":
+    precomputed_distances, predecessors, matrix_nodes, node_index = cached_landmark_oracle(file_path,
+                                                                                          mode=landmark_mode)
+else:
+    # Look up the distance matrix for this exact GML in the content-addressed cache
+    # (computed on the first run; a table built from a different topology is never used)
+    precomputed_distances, predecessors, matrix_nodes, node_index = cached_shortest_paths(file_path,
+                                                                                         metric=metric)
+
+# Label of the reported values: landmark bounds are not distances
+value_note = ""
+if evaluator != "multi_source" and distance_source == "landmarks" and landmark_mode != "exact":
+    value_note = f" (landmark {landmark_mode} bound)"
+
+# Demand weighting: None (every node counts once) or "population" (each node's distance counts in proportion to its
+# Closest_Population_Imputed in the enriched CSV, so the objective is the population-weighted average distance;
+# see Population_Weights.py). The weighted matrix (with the multi_source evaluator, the weighted nearest-center
+# distances) drives the search, the plain one the reported distances
+demand_weighting = None
+demand = None
+if demand_weighting == "population":
+    demand = demand_weights(node_populations(G, csr_nodes if evaluator == "multi_source" else matrix_nodes))
+if evaluator != "multi_source":
+    objective_distances = (precomputed_distances if demand is None
+                           else weighted_distances(precomputed_distances, demand))
 
 # Maximum number of CDN centers
 N = 2
@@ -53,7 +101,15 @@ print("Start Time: ", start_time)
 
 # Brute-force approach
 for cdn_centers in all_possible_combinations:
-    objective_value = calculate_objective_value(cdn_centers, precomputed_distances, G)
+    if evaluator == "multi_source" and demand is None:
+        objective_value, _ = evaluate_placement(csr_indptr, csr_indices, csr_weights,
+                                                [csr_index[i] for i in cdn_centers])
+    elif evaluator == "multi_source":
+        _, served_distances, _ = nearest_centers(csr_indptr, csr_indices, csr_weights,
+                                                 [csr_index[i] for i in cdn_centers])
+        objective_value = float((served_distances * demand).sum())
+    else:
+        objective_value = calculate_objective_value(cdn_centers, objective_distances, node_index, G)
     if objective_value < best_objective_value:
         best_objective_value = objective_value
         best_cdn_centers = cdn_centers
@@ -70,7 +126,8 @@ print("Total Time: ", duration)
 # print the selected CDN centers
 print("Best CDN centers: ", best_cdn_centers)
 # print the objective value
-print("Best objective value: ", best_objective_value)
+print(f"Best objective value{value_note}: ", best_objective_value)
+print("Demand weighting: ", demand_weighting)
 
 # Generate a unique name for the map and text files based on parameters
 file_suffix = f"{len(G.nodes())}_Nodes_{N}_CDNs_'BruteForce'_{os.path.basename(file_path).replace('.gml', '')}"
@@ -84,7 +141,8 @@ with open(text_file_name, 'w') as text_file:
     text_file.write(f"Total Time: {duration}\n")
     text_file.write(f"Number of CDNs: {N}\n")
     text_file.write(f"Best CDN centers: {best_cdn_centers}\n")
-    text_file.write(f"Best objective value: {best_objective_value}\n")
+    text_file.write(f"Best objective value{value_note}: {best_objective_value}\n")
+    text_file.write(f"Demand weighting: {demand_weighting}\n")
 
     # Create Folium map for visualization
     m = folium.Map(location=[47.36667, 8.55], zoom_start=5)
@@ -117,15 +175,24 @@ with open(text_file_name, 'w') as text_file:
         shortest_distances = {}
 
         # First, determine the shortest distance for each node to its CDN center
-        for j in G.nodes():
-            min_distance = float('inf')
-            serving_cdn = None
-            for i in best_cdn_centers:
-                distance = precomputed_distances[str(i)].get(str(j), float('inf'))
-                if distance < min_distance:
-                    min_distance = distance
-                    serving_cdn = i
-            shortest_distances[j] = (min_distance, serving_cdn)
+        if evaluator == "multi_source":
+            # One multi-source Dijkstra gives every node's nearest center and distance
+            nearest, nearest_distances, _ = nearest_centers(csr_indptr, csr_indices, csr_weights,
+                                                            [csr_index[i] for i in best_cdn_centers])
+            for j in G.nodes():
+                k = csr_index[j]
+                serving_cdn = csr_nodes[nearest[k]] if nearest[k] >= 0 else None
+                shortest_distances[j] = (float(nearest_distances[k]), serving_cdn)
+        else:
+            for j in G.nodes():
+                min_distance = float('inf')
+                serving_cdn = None
+                for i in best_cdn_centers:
+                    distance = float(precomputed_distances[node_index[i], node_index[j]])
+                    if distance < min_distance:
+                        min_distance = distance
+                        serving_cdn = i
+                shortest_distances[j] = (min_distance, serving_cdn)
 
         color_map = {}  # Map from CDN centers to their unique colors
 
@@ -135,7 +202,7 @@ with open(text_file_name, 'w') as text_file:
             data_i = G.nodes[serving_cdn]
 
             # Print to console and write to text file
-            text_line = f"Node {j} is served by CDN {serving_cdn}, Distance: {round(min_distance, 1)} km"
+            text_line = f"Node {j} is served by CDN {serving_cdn}, Distance: {round(min_distance, 1)} {unit}{value_note}"
             print(text_line)
             text_file.write(text_line + "\n")
 
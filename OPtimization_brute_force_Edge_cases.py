@@ -6,6 +6,7 @@ import random
 import webbrowser
 import os
 import datetime
+from Graph_Cache import load_graph
 
 # Modified version of calculate_objective_value to handle edge cases
 def calculate_objective_value_with_fallback(cdn_centers, precomputed_distances, G):
@@ -65,7 +66,7 @@ print("Brute Force:", result_3)
 
 # Read the GML file
 file_path = "MainFolder/Datasets/italy_network.gml"
-G = nx.read_gml(file_path, label="id")
+G = load_graph(file_path).graph
 
 # Load precomputed shortest distances and paths from JSON file
 json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_with_nodes_for_condensed_graph.json"
@@ -1,11 +1,22 @@
-from ortools.linear_solver import pywraplp
-import networkx as nx
 import folium
 import random
 import webbrowser
 import os
-import json
+import sys
 import datetime
+from Distance_Cache import cached_shortest_paths
+from Benders_P_Median import benders_p_median
+from Demand_Aggregation import solve_aggregated
+from Graph_Cache import load_graph
+from Lagrangian_P_Median import lagrangian_p_median
+from Latency_Metrics import metric_units
+from MILP_Builder import build_placement_model, center_assignment_mask
+from Parametric_Sweep import sweep_cdn_counts, write_sweep_curve
+from Placement_Heuristics import seed_placement
+from Population_Weights import demand_weights, node_populations, weighted_distances
+from Presolve import presolve_assignments
+from Shortest_Paths import reconstruct_path
+from Solver_Backend import SolverSettings, solve
 
 
 
@@ -17,26 +28,6 @@ N = 2 # Max number of CDN centers
 
 
 
-# Load precomputed shortest distances from JSON file
-
-# all_shortest_distances_for_interconnect_graph
-# json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_with_nodes_for_interconnect_graph.json"
-
-# all_shortest_distances_for_condensed_graph
-json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_with_nodes_for_condensed_graph.json"
-
-
-
-# Load precomputed shortest distances and paths from JSON file
-with open(json_file_path, 'r') as f:
-    precomputed_data = json.load(f)
-
-# Extract just the distances
-precomputed_distances = {i: precomputed_data[i]['distances'] for i in precomputed_data}
-
-
-
-
 # Read the GML file
 
 # condensed_west_europe_Cleaned
@@ -44,67 +35,116 @@ file_path = "MainFolder/Datasets/italy_network.gml"
 
 # interconnect_Cleaned
 # file_path = "MainFolder/Datasets/interconnect_Cleaned.gml"
-G = nx.read_gml(file_path, label="id")
-
-
-
-
-
-# Initialize the solver
-solver = pywraplp.Solver.CreateSolver('SCIP')
+G = load_graph(file_path).graph
+
+# Metric to optimize: "distance_km" (shortest haversine km) or a latency-model metric
+# ("latency_ms", "propagation_ms", "hops" or "route_km", see Latency_Metrics.py)
+metric = "distance_km"
+unit = metric_units[metric]
+
+# Look up the distance and predecessor matrices for this exact GML in the content-addressed cache
+# (computed on the first run; a table built from a different topology is never used)
+precomputed_distances, predecessors, matrix_nodes, node_index = cached_shortest_paths(file_path, metric=metric)
+
+
+
+
+
+# Demand weighting: None (every node counts once) or "population" (each node's distance counts in proportion to its
+# Closest_Population_Imputed in the enriched CSV, so the objective is the population-weighted average distance;
+# see Population_Weights.py). The weighted matrix drives the optimization, the plain one the reported distances
+demand_weighting = None
+demand = None
+objective_distances = precomputed_distances
+if demand_weighting == "population":
+    demand = demand_weights(node_populations(G, matrix_nodes))
+    objective_distances = weighted_distances(precomputed_distances, demand)
+
+# Solver backend and limits (see Solver_Backend.py): time limit in seconds, relative MIP gap and thread count
+# (None keeps the solver default); progress is streamed with timestamps, and when a limit stops the search the
+# best placement found so far is reported with its gap
+solver_settings = SolverSettings('SCIP', time_limit_seconds=None, relative_gap=None, threads=None, log_file=None)
+
+# Presolve: leave out the assignments a quick heuristic proves can never be optimal (see Presolve.py)
+presolve = True
+
+# Sweep mode: set to the CDN counts to plan for (e.g. range(1, 11)) to build the model once, re-solve it for every
+# N by changing only the right-hand side of the CDN-limit row (each solve warm-started from the previous
+# optimum) and write the cost-vs-N curve instead of a single placement (see Parametric_Sweep.py)
+sweep_counts = None
+if sweep_counts is not None:
+    curve = sweep_cdn_counts(objective_distances, matrix_nodes, sweep_counts, solver_settings, presolve=presolve)
+    curve_file_name = (f"MainFolder/Map/cost_vs_N_{len(G.nodes())}_Nodes_"
+                       f"{os.path.basename(file_path).replace('.gml', '')}.csv")
+    write_sweep_curve(curve, curve_file_name)
+    print(f"Cost-vs-N curve written to {curve_file_name}")
+    sys.exit()
+
+# Solve mode: "milp" (the full p-median model below), "lagrangian" (subgradient search on the Lagrangian dual
+# for a provable lower bound and a near-optimal placement, see Lagrangian_P_Median.py), "aggregated" (demand
+# clustered into num_representatives weighted points, solved with m * n instead of n * n assignment variables
+# and scored on the full graph with a bound on the aggregation error, see Demand_Aggregation.py) or "benders"
+# (exact Benders decomposition whose master only holds the open variables, for instances whose compact model
+# does not fit in memory, see Benders_P_Median.py); in the last three modes the model below only recovers the
+# assignment to the centers found
+solve_mode = "milp"
+num_representatives = 60
+
+assignment_mask = None
+if solve_mode == "lagrangian":
+    dual = lagrangian_p_median(objective_distances, N, log=print)
+    print(f"Lagrangian relaxation: lower bound {dual['lower_bound']:.6g}, placement {dual['objective']:.6g}, "
+          f"gap {dual['gap']:.3%} after {dual['iterations']} iterations in {dual['seconds']:.3f} s")
+    assignment_mask = center_assignment_mask(objective_distances, dual['centers'])
+elif solve_mode == "benders":
+    benders = benders_p_median(objective_distances, N, solver_settings)
+    print(f"Benders decomposition: lower bound {benders['lower_bound']:.6g}, placement {benders['objective']:.6g}, "
+          f"gap {benders['gap']:.3%} after {benders['iterations']} rounds ({benders['cuts_added']} cuts added, "
+          f"{benders['cuts_dropped']} dropped, {benders['cuts']} in the pool) in {benders['seconds']:.3f} s")
+    assignment_mask = center_assignment_mask(objective_distances, benders['centers'])
+elif solve_mode == "aggregated":
+    # Clustering needs the plain (symmetric) distances; the demand weights are summed per cluster instead
+    aggregated = solve_aggregated(precomputed_distances, matrix_nodes, N, num_representatives, solver_settings,
+                                  demand=demand, presolve=presolve)
+    assignment_mask = center_assignment_mask(objective_distances, aggregated['centers'])
+elif presolve:
+    assignment_mask, presolve_report = presolve_assignments(objective_distances, N, "p_median")
+    print(presolve_report)
+
+# Warm start: None (cold start), "greedy" or "grasp" (a seed placement from Placement_Heuristics.py, passed to
+# the solver as solution hints so branch-and-bound starts from a strong incumbent; the incumbent already prunes
+# like an objective cutoff, which for p-median would cost a dense row over every assignment, see MILP_Builder.py)
+warm_start = None
+if warm_start is not None:
+    seed_centers, seed_objective = seed_placement(objective_distances, N, "p_median", warm_start)
+    print(f"Warm start ({warm_start}): seed objective {seed_objective:.6g}")
+
+# Build the p-median model in bulk from the distance matrix (see MILP_Builder.py):
+# x[i] = 1 if node i is a CDN center, y[i, j] = 1 if node j is served by center i,
+# every node served once, at most N centers, minimize the total distance
+# (set no_mutual_service=True to prevent two CDN centers from serving each other)
+model = build_placement_model(objective_distances, matrix_nodes, N, objective="p_median",
+                              assignment_mask=assignment_mask, solver_name=solver_settings.name)
+solver, x, y = model.solver, model.x, model.y
+print(model.report())
+
+if warm_start is not None:
+    model.set_hint(objective_distances, seed_centers)
 
-# Variables
-x = {}  # x[i] = 1 if node i is a CDN center, 0 otherwise
-y = {}  # y[i][j] = 1 if node j is served by center i, 0 otherwise
-
-
-
-# Create variables and constraints
-for i in G.nodes():
-    x[i] = solver.IntVar(0, 1, f'x_{i}')
-    for j in G.nodes():
-        y[i, j] = solver.IntVar(0, 1, f'y_{i}_{j}')
-        solver.Add(y[i, j] <= x[i])
-
-# # New Constraint: Prevent two CDN centers from serving each other
-# for i in G.nodes():
-#     for j in G.nodes():
-#         if i != j:
-#             solver.Add(y[i, j] + y[j, i] <= 2 - (x[i] + x[j]))
-
-
-
-
-# Single Serving Constraint
-for j in G.nodes():
-    solver.Add(solver.Sum([y[i, j] for i in G.nodes()]) == 1)
-
-
-# CDN Limit Constraint
-solver.Add(solver.Sum([x[i] for i in G.nodes()]) <= N)
-
-
-# Objective Function
 num_nodes = len(G.nodes())
 
-# Minimize the average distance objective function
-objective_terms = []
-for i in G.nodes():
-    for j in G.nodes():
-        distance = precomputed_distances[str(i)][str(j)]  # Assuming your JSON is indexed by strings
-        objective_terms.append(distance * y[i, j])
-solver.Minimize(solver.Sum(objective_terms))
-
 
 # Capture the start time and write to file
 start_time = datetime.datetime.now()
 print("Start Time: ", start_time)
 
 # Solve the problem
-status = solver.Solve()
+solve_result = solve(solver, solver_settings)
 
 # Generate a unique name for the map and text files based on parameters
 file_suffix = f"{len(G.nodes())}_Nodes_{N}_CDNs_'k_means'_{os.path.basename(file_path).replace('.gml', '')}"
+if warm_start is not None:
+    file_suffix += f"_warm_{warm_start}"
 map_file_name = f"MainFolder/Map/map_{file_suffix}.html"
 text_file_name = f"MainFolder/Map/results_{file_suffix}.txt"
 
@@ -114,9 +154,11 @@ with open(text_file_name, 'w') as text_file:
 
     print("MILP Approach")
     text_file.write(f"Start Time: {start_time}\n")
+    text_file.write(f"Warm start: {warm_start}\n")
+    text_file.write(f"Demand weighting: {demand_weighting}\n")
 
     # Output results
-    if status == pywraplp.Solver.OPTIMAL:
+    if solve_result.has_solution:
         # Capture the end time and write to file
         end_time = datetime.datetime.now()
         print("End Time: ", end_time)
@@ -134,8 +176,10 @@ with open(text_file_name, 'w') as text_file:
         # write the number of CDNs in the text file
         text_file.write(f"Number of CDNs: {N}\n")
 
-        print('Optimal solution found')
-        text_file.write("Optimal solution found\n")
+        # A time or gap limit keeps the best placement found so far; the gap is written in every case
+        solution_text = solve_result.solution_text()
+        print(solution_text)
+        text_file.write(solution_text + "\n")
 
         average_objective_value = solver.Objective().Value() / num_nodes
         print(f"Average Distance = {average_objective_value}")
@@ -162,7 +206,7 @@ with open(text_file_name, 'w') as text_file:
         for i, data in G.nodes(data=True):
             for j, data_j in G.nodes(data=True):
                 if y[i, j].solution_value() == 1:
-                    distance = precomputed_distances[str(i)].get(str(j), float('inf'))
+                    distance = float(precomputed_distances[node_index[i], node_index[j]])
                     shortest_distances[j] = distance
 
         # Then, add all served nodes with blue markers with tooltips
@@ -176,7 +220,7 @@ with open(text_file_name, 'w') as text_file:
                     fill=True,
                     fill_color='blue',
                     fill_opacity=0.7,
-                    tooltip=f"Node: {data['label']}, Shortest Distance to CDN: {distance} km"
+                    tooltip=f"Node: {data['label']}, Shortest Distance to CDN: {distance} {unit}"
                 ).add_to(m)
 
         # Then, add CDN centers and nodes they serve with red markers
@@ -193,17 +237,18 @@ with open(text_file_name, 'w') as text_file:
 
             for j, data_j in G.nodes(data=True):
                 if y[i, j].solution_value() == 1:
-                    path = nx.shortest_path(G, source=i, target=j, weight='weight')
+                    path = reconstruct_path(predecessors, node_index[i], node_index[j], matrix_nodes)
                     coordinates = [(G.nodes[node]['Latitude'], G.nodes[node]['Longitude']) for node in path]
-                    distance = precomputed_distances[str(i)].get(str(j), float('inf'))  # Update here
-                    text_line = f"Node {j} is served by {i}, Distance: {round(distance, 1)} km"
+                    distance = float(precomputed_distances[node_index[i], node_index[j]])  # Update here
+                    text_line = f"Node {j} is served by {i}, Distance: {round(distance, 1)} {unit}"
                     print(text_line)
                     text_file.write(text_line + "\n")
                     folium.PolyLine(coordinates, color=color_map.get(i, 'black'), weight=2.5).add_to(m)
 
 
     else:
-        print('Solver ran to completion but did not find an optimal solution')
+        print(f'Solver did not find a solution ({solve_result.status_name})')
+        text_file.write(f"Solver did not find a solution ({solve_result.status_name})\n")
 
 
 
@@ -1,11 +1,17 @@
-from ortools.linear_solver import pywraplp
-import networkx as nx
 import folium
 import random
 import webbrowser
 import os
-import json
 import datetime
+from Distance_Cache import cached_shortest_paths
+from Graph_Cache import load_graph
+from K_Center_Exact import exact_k_center
+from Latency_Metrics import metric_units
+from MILP_Builder import build_placement_model, center_assignment_mask
+from Placement_Heuristics import seed_placement
+from Presolve import presolve_assignments
+from Shortest_Paths import reconstruct_path
+from Solver_Backend import SolverSettings, solve
 
 
 
@@ -17,26 +23,6 @@ N = 10 # Max number of CDN centers
 
 
 
-# Load precomputed shortest distances from JSON file
-
-# all_shortest_distances_for_interconnect_graph
-# json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_with_nodes_for_interconnect_graph.json"
-
-# all_shortest_distances_for_condensed_graph
-json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_with_nodes_for_condensed_graph.json"
-
-
-
-# Load precomputed shortest distances and paths from JSON file
-with open(json_file_path, 'r') as f:
-    precomputed_data = json.load(f)
-
-# Extract just the distances
-precomputed_distances = {i: precomputed_data[i]['distances'] for i in precomputed_data}
-
-
-
-
 # Read the GML file
 
 # condensed_west_europe_Cleaned
@@ -44,47 +30,58 @@ file_path = "MainFolder/Datasets/condensed_west_europe_Cleaned.gml"
 
 # interconnect_Cleaned
 # file_path = "MainFolder/Datasets/interconnect_Cleaned.gml"
-G = nx.read_gml(file_path, label="id")
-
-
-# Initialize the solver
-solver = pywraplp.Solver.CreateSolver('CBC')
-
-# Variables
-x = {}  # x[i] = 1 if node i is a CDN center, 0 otherwise
-y = {}  # y[i][j] = 1 if node j is served by center i, 0 otherwise
-Z = solver.NumVar(0, solver.infinity(), 'Z')  # Auxiliary variable to capture the maximum distance
-
-# Create variables and constraints
-for i in G.nodes():
-    x[i] = solver.IntVar(0, 1, f'x_{i}')
-    for j in G.nodes():
-        y[i, j] = solver.IntVar(0, 1, f'y_{i}_{j}')
-        solver.Add(y[i, j] <= x[i])
-
-# Prevent two CDN centers from serving each other
-for i in G.nodes():
-    for j in G.nodes():
-        if i != j:
-            solver.Add(y[i, j] + y[j, i] <= 2 - (x[i] + x[j]))
-
-# Single Serving Constraint
-for j in G.nodes():
-    solver.Add(solver.Sum([y[i, j] for i in G.nodes()]) == 1)
-
-# CDN Limit Constraint
-solver.Add(solver.Sum([x[i] for i in G.nodes()]) <= N)
-
-
-
-# Add constraints to ensure Z is greater than or equal to any distance where y_ij = 1
-for i in G.nodes():
-    for j in G.nodes():
-        distance = precomputed_distances[str(i)][str(j)]
-        solver.Add(Z >= distance * y[i, j])
-
-# Objective function: Minimize Z
-solver.Minimize(Z)
+G = load_graph(file_path).graph
+
+# Metric to optimize: "distance_km" (shortest haversine km) or a latency-model metric
+# ("latency_ms", "propagation_ms", "hops" or "route_km", see Latency_Metrics.py)
+metric = "distance_km"
+unit = metric_units[metric]
+
+# Look up the distance and predecessor matrices for this exact GML in the content-addressed cache
+# (computed on the first run; a table built from a different topology is never used)
+precomputed_distances, predecessors, matrix_nodes, node_index = cached_shortest_paths(file_path, metric=metric)
+
+
+# Solve mode: "milp" (the full k-center model below) or "binary_search" (exact optimal radius by binary search
+# over the distinct distances with a set-cover check per probe, see K_Center_Exact.py; the model below then
+# only recovers the assignment to the proven centers)
+solve_mode = "milp"
+
+# Presolve: leave out the assignments a quick heuristic proves can never be optimal (see Presolve.py)
+presolve = True
+assignment_mask = None
+if solve_mode == "binary_search":
+    optimal_radius, optimal_centers, probes = exact_k_center(precomputed_distances, N)
+    assignment_mask = center_assignment_mask(precomputed_distances, optimal_centers, optimal_radius)
+elif presolve:
+    assignment_mask, presolve_report = presolve_assignments(precomputed_distances, N, "k_center")
+    print(presolve_report)
+
+# Warm start: None (cold start), "greedy" or "grasp" (a seed placement from Placement_Heuristics.py, passed to
+# the solver as solution hints plus an objective cutoff so branch-and-bound starts from a strong incumbent)
+warm_start = None
+objective_cutoff = None
+if warm_start is not None:
+    seed_centers, seed_objective = seed_placement(precomputed_distances, N, "k_center", warm_start)
+    objective_cutoff = seed_objective
+    print(f"Warm start ({warm_start}): seed objective {seed_objective:.6g}")
+
+# Solver backend and limits (see Solver_Backend.py): time limit in seconds, relative MIP gap and thread count
+# (None keeps the solver default); progress is streamed with timestamps, and when a limit stops the search the
+# best placement found so far is reported with its gap
+solver_settings = SolverSettings('CBC', time_limit_seconds=None, relative_gap=None, threads=None, log_file=None)
+
+# Build the k-center model in bulk from the distance matrix (see MILP_Builder.py):
+# x[i] = 1 if node i is a CDN center, y[i, j] = 1 if node j is served by center i,
+# two CDN centers never serve each other, every node served once, at most N centers,
+# Z >= d[i, j] * y[i, j] for every pair, minimize Z
+model = build_placement_model(precomputed_distances, matrix_nodes, N, objective="k_center", no_mutual_service=True,
+                              assignment_mask=assignment_mask, objective_cutoff=objective_cutoff, solver_name=solver_settings.name)
+solver, x, y, Z = model.solver, model.x, model.y, model.Z
+print(model.report())
+
+if warm_start is not None:
+    model.set_hint(precomputed_distances, seed_centers)
 
 
 
@@ -94,10 +91,12 @@ start_time = datetime.datetime.now()
 print("Start Time: ", start_time)
 
 # Solve the problem
-status = solver.Solve()
+solve_result = solve(solver, solver_settings)
 
 # Generate a unique name for the map and text files based on parameters
 file_suffix = f"{len(G.nodes())}_Nodes_{N}_CDNs_'k_means'_{os.path.basename(file_path).replace('.gml', '')}"
+if warm_start is not None:
+    file_suffix += f"_warm_{warm_start}"
 map_file_name = f"MainFolder/Map/map_{file_suffix}.html"
 text_file_name = f"MainFolder/Map/results_{file_suffix}.txt"
 
@@ -106,9 +105,10 @@ with open(text_file_name, 'w') as text_file:
 
 
     text_file.write(f"Start Time: {start_time}\n")
+    text_file.write(f"Warm start: {warm_start}\n")
 
     # Output results
-    if status == pywraplp.Solver.OPTIMAL:
+    if solve_result.has_solution:
         # Capture the end time and write to file
         end_time = datetime.datetime.now()
         print("End Time: ", end_time)
@@ -121,8 +121,10 @@ with open(text_file_name, 'w') as text_file:
         # write the number of CDNs in the text file
         text_file.write(f"Number of CDNs: {N}\n")
 
-        print('Optimal solution found')
-        text_file.write("Optimal solution found\n")
+        # A time or gap limit keeps the best placement found so far; the gap is written in every case
+        solution_text = solve_result.solution_text()
+        print(solution_text)
+        text_file.write(solution_text + "\n")
 
         average_objective_value = solver.Objective().Value()
         print(f"Average Distance = {average_objective_value}")
@@ -149,7 +151,7 @@ with open(text_file_name, 'w') as text_file:
         for i, data in G.nodes(data=True):
             for j, data_j in G.nodes(data=True):
                 if y[i, j].solution_value() == 1:
-                    distance = precomputed_distances[str(i)].get(str(j), float('inf'))
+                    distance = float(precomputed_distances[node_index[i], node_index[j]])
                     shortest_distances[j] = distance
 
         # Then, add all served nodes with blue markers with tooltips
@@ -163,7 +165,7 @@ with open(text_file_name, 'w') as text_file:
                     fill=True,
                     fill_color='blue',
                     fill_opacity=0.7,
-                    tooltip=f"Node: {data['label']}, Shortest Distance to CDN: {distance} km"
+                    tooltip=f"Node: {data['label']}, Shortest Distance to CDN: {distance} {unit}"
                 ).add_to(m)
 
         # Then, add CDN centers and nodes they serve with red markers
@@ -180,17 +182,18 @@ with open(text_file_name, 'w') as text_file:
 
             for j, data_j in G.nodes(data=True):
                 if y[i, j].solution_value() == 1:
-                    path = nx.shortest_path(G, source=i, target=j, weight='weight')
+                    path = reconstruct_path(predecessors, node_index[i], node_index[j], matrix_nodes)
                     coordinates = [(G.nodes[node]['Latitude'], G.nodes[node]['Longitude']) for node in path]
-                    distance = precomputed_distances[str(i)].get(str(j), float('inf'))  # Update here
-                    text_line = f"Node {j} is served by {i}, Distance: {round(distance, 1)} km"
+                    distance = float(precomputed_distances[node_index[i], node_index[j]])  # Update here
+                    text_line = f"Node {j} is served by {i}, Distance: {round(distance, 1)} {unit}"
                     print(text_line)
                     text_file.write(text_line + "\n")
                     folium.PolyLine(coordinates, color=color_map.get(i, 'black'), weight=2.5).add_to(m)
 
 
     else:
-        print('Solver ran to completion but did not find an optimal solution')
+        print(f'Solver did not find a solution ({solve_result.status_name})')
+        text_file.write(f"Solver did not find a solution ({solve_result.status_name})\n")
 
 
 
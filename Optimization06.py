@@ -1,11 +1,18 @@
-from ortools.linear_solver import pywraplp
-import networkx as nx
 import folium
 import random
 import webbrowser
 import os
-import json
 import datetime
+from Distance_Cache import cached_shortest_paths
+from Graph_Cache import load_graph
+from Lagrangian_P_Median import lagrangian_p_median
+from Latency_Metrics import metric_units
+from MILP_Builder import build_placement_model, center_assignment_mask
+from Placement_Heuristics import seed_placement
+from Population_Weights import demand_weights, node_populations, weighted_distances
+from Presolve import presolve_assignments
+from Shortest_Paths import reconstruct_path
+from Solver_Backend import SolverSettings, create_solver, solve
 
 
 
@@ -15,21 +22,6 @@ N = 10  # Max number of CDN centers
 
 
 
-# Load precomputed shortest distances from JSON file
-
-# all_shortest_distances_for_interconnect_graph
-# json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_for_interconnect_graph.json"
-
-# all_shortest_distances_for_condensed_graph
-json_file_path = "MainFolder/Datasets/ShortestDistances/all_shortest_distances_for_condensed_graph.json"
-
-
-
-with open(json_file_path, 'r') as f:
-    precomputed_distances = json.load(f)
-
-
-
 # Read the GML file
 
 # condensed_west_europe_Cleaned
@@ -37,53 +29,69 @@ file_path = "MainFolder/Datasets/condensed_west_europe_Cleaned.gml"
 
 # interconnect_Cleaned
 # file_path = "MainFolder/Datasets/interconnect_Cleaned.gml"
-G = nx.read_gml(file_path, label="id")
-
-
-# Initialize the solver
-solver = pywraplp.Solver.CreateSolver('CBC')
-
-# Variables
-x = {}  # x[i] = 1 if node i is a CDN center, 0 otherwise
-y = {}  # y[i][j] = 1 if node j is served by center i, 0 otherwise
-
-# Create variables and constraints
-for i in G.nodes():
-    x[i] = solver.IntVar(0, 1, f'x_{i}')
-    for j in G.nodes():
-        y[i, j] = solver.IntVar(0, 1, f'y_{i}_{j}')
-        solver.Add(y[i, j] <= x[i])
-
-# New Constraint: Prevent two CDN centers from serving each other
-for i in G.nodes():
-    for j in G.nodes():
-        if i != j:
-            solver.Add(y[i, j] + y[j, i] <= 2 - (x[i] + x[j]))
-
-
-
-
-# Single Serving Constraint
-for j in G.nodes():
-    solver.Add(solver.Sum([y[i, j] for i in G.nodes()]) == 1)
-
-
-# CDN Limit Constraint
-solver.Add(solver.Sum([x[i] for i in G.nodes()]) <= N)
-
-
-
-# Objective function
-
-# Objective: Minimize average sum of distances
-total_nodes = len(G.nodes())
-solver.Minimize(
-    (1 / total_nodes) * solver.Sum(
-        precomputed_distances[str(i)].get(str(j), float('inf')) * y[i, j]
-        for i in G.nodes()
-        for j in G.nodes()
-    )
-)
+G = load_graph(file_path).graph
+
+# Metric to optimize: "distance_km" (shortest haversine km) or a latency-model metric
+# ("latency_ms", "propagation_ms", "hops" or "route_km", see Latency_Metrics.py)
+metric = "distance_km"
+unit = metric_units[metric]
+
+# Look up the distance and predecessor matrices for this exact GML in the content-addressed cache
+# (computed on the first run; a table built from a different topology is never used)
+precomputed_distances, predecessors, matrix_nodes, node_index = cached_shortest_paths(file_path, metric=metric)
+
+
+# Demand weighting: None (every node counts once) or "population" (each node's distance counts in proportion to its
+# Closest_Population_Imputed in the enriched CSV, so the objective is the population-weighted average distance;
+# see Population_Weights.py). The weighted matrix drives the optimization, the plain one the reported distances
+demand_weighting = None
+objective_distances = precomputed_distances
+if demand_weighting == "population":
+    objective_distances = weighted_distances(precomputed_distances,
+                                             demand_weights(node_populations(G, matrix_nodes)))
+
+# Solve mode: "milp" (the full p-median model below) or "lagrangian" (subgradient search on the Lagrangian dual
+# for a provable lower bound and a near-optimal placement, see Lagrangian_P_Median.py; the model below then
+# only recovers the assignment to its centers)
+solve_mode = "milp"
+
+# Presolve: leave out the assignments a quick heuristic proves can never be optimal (see Presolve.py)
+presolve = True
+assignment_mask = None
+if solve_mode == "lagrangian":
+    dual = lagrangian_p_median(objective_distances, N, log=print)
+    print(f"Lagrangian relaxation: lower bound {dual['lower_bound']:.6g}, placement {dual['objective']:.6g}, "
+          f"gap {dual['gap']:.3%} after {dual['iterations']} iterations in {dual['seconds']:.3f} s")
+    assignment_mask = center_assignment_mask(objective_distances, dual['centers'])
+elif presolve:
+    assignment_mask, presolve_report = presolve_assignments(objective_distances, N, "p_median")
+    print(presolve_report)
+
+# Warm start: None (cold start), "greedy" or "grasp" (a seed placement from Placement_Heuristics.py, passed to
+# the solver as solution hints so branch-and-bound starts from a strong incumbent; the incumbent already prunes
+# like an objective cutoff, which for p-median would cost a dense row over every assignment, see MILP_Builder.py)
+warm_start = None
+if warm_start is not None:
+    seed_centers, seed_objective = seed_placement(objective_distances, N, "p_median", warm_start)
+    print(f"Warm start ({warm_start}): seed objective {seed_objective:.6g}")
+
+# Solver backend and limits (see Solver_Backend.py): time limit in seconds, relative MIP gap and thread count
+# (None keeps the solver default); progress is streamed with timestamps, and when a limit stops the search the
+# best placement found so far is reported with its gap
+solver_settings = SolverSettings('CBC', time_limit_seconds=None, relative_gap=None, threads=None, log_file=None)
+
+# Build the step 1 model in bulk from the distance matrix (see MILP_Builder.py):
+# x[i] = 1 if node i is a CDN center, y[i, j] = 1 if node j is served by center i,
+# two CDN centers never serve each other, every node served once, at most N centers,
+# minimize the average distance
+model = build_placement_model(objective_distances, matrix_nodes, N, objective="p_median", average=True,
+                              no_mutual_service=True, assignment_mask=assignment_mask,
+                              solver_name=solver_settings.name)
+solver, x, y = model.solver, model.x, model.y
+print(model.report())
+
+if warm_start is not None:
+    model.set_hint(objective_distances, seed_centers)
 
 # print start time
 start_time = datetime.datetime.now()
@@ -91,21 +99,23 @@ print("Start Time: ", start_time)
 
 
 # Solve the problem
-status = solver.Solve()
+solve_result = solve(solver, solver_settings)
 
 
 # Output results
 # If Step 1 is successful, proceed to Step 2
-if status == pywraplp.Solver.OPTIMAL:
-    print('Step 1: Optimal solution for average distance found.')
+if solve_result.has_solution:
+    print(f'Step 1 (average distance): {solve_result.solution_text()}.')
     end_time = datetime.datetime.now()
     print("End Time: ", end_time)
     print("Total Time: ", end_time - start_time)
+    print("Warm start: ", warm_start)
+    print("Demand weighting: ", demand_weighting)
     # Collect CDN centers from Step 1
     selected_cdns = [i for i in G.nodes() if x[i].solution_value() == 1]
 
     # Initialize the solver for Step 2
-    solver_step2 = pywraplp.Solver.CreateSolver('CBC')
+    solver_step2 = create_solver(solver_settings)
 
     # Variables for Step 2
     y_step2 = {}
@@ -123,19 +133,20 @@ if status == pywraplp.Solver.OPTIMAL:
     # Constraints to ensure z is greater than or equal to every possible distance
     for i in selected_cdns:
         for j in G.nodes():
-            solver_step2.Add(z_step2 >= precomputed_distances[str(i)].get(str(j), float('inf')) * y_step2[i, j])
+            solver_step2.Add(z_step2 >= float(precomputed_distances[node_index[i], node_index[j]]) * y_step2[i, j])
 
     # Objective Function for Step 2: Minimize z
     solver_step2.Minimize(z_step2)
 
     # Solve the problem for Step 2
-    status_step2 = solver_step2.Solve()
+    solve_result_step2 = solve(solver_step2, solver_settings)
 
     # Check and output results for Step 2
-    if status_step2 == pywraplp.Solver.OPTIMAL:
+    if solve_result_step2.has_solution:
+        print(f'Step 2 (maximum distance): {solve_result_step2.solution_text()}.')
         print(f"Step 2: Objective value (maximum distance) = {z_step2.solution_value()}")
     else:
-        print('Step 2: Solver ran to completion but did not find an optimal solution.')
+        print(f'Step 2: Solver did not find a solution ({solve_result_step2.status_name}).')
 
 
     print(f"Objective value = {solver.Objective().Value()}")
@@ -158,7 +169,7 @@ if status == pywraplp.Solver.OPTIMAL:
     for i, data in G.nodes(data=True):
         for j, data_j in G.nodes(data=True):
             if y[i, j].solution_value() == 1:
-                distance = precomputed_distances[str(i)].get(str(j), float('inf'))
+                distance = float(precomputed_distances[node_index[i], node_index[j]])
                 shortest_distances[j] = distance
 
     # Then, add all served nodes with blue markers with tooltips
@@ -172,7 +183,7 @@ if status == pywraplp.Solver.OPTIMAL:
                 fill=True,
                 fill_color='blue',
                 fill_opacity=0.7,
-                tooltip=f"Node: {data['label']}, Shortest Distance to CDN: {distance} km"
+                tooltip=f"Node: {data['label']}, Shortest Distance to CDN: {distance} {unit}"
             ).add_to(m)
 
     # Then, add CDN centers and nodes they serve with red markers
@@ -189,15 +200,15 @@ if status == pywraplp.Solver.OPTIMAL:
 
         for j, data_j in G.nodes(data=True):
             if y[i, j].solution_value() == 1:
-                path = nx.shortest_path(G, source=i, target=j, weight='weight')
+                path = reconstruct_path(predecessors, node_index[i], node_index[j], matrix_nodes)
                 coordinates = [(G.nodes[node]['Latitude'], G.nodes[node]['Longitude']) for node in path]
-                distance = precomputed_distances[str(i)].get(str(j), float('inf'))  # Update here
-                print(f"N {j} is served by {i}, : {round(distance, 0)} km")
+                distance = float(precomputed_distances[node_index[i], node_index[j]])  # Update here
+                print(f"N {j} is served by {i}, : {round(distance, 0)} {unit}")
                 folium.PolyLine(coordinates, color=color_map.get(i, 'black'), weight=2.5).add_to(m)
 
 
 else:
-    print('Step 1: Solver ran to completion but did not find an optimal solution.')
+    print(f'Step 1: Solver did not find a solution ({solve_result.status_name}).')
 
 
 file_path = "MainFolder/Map/map.html"
@@ -0,0 +1,84 @@
+import os
+import csv
+import datetime
+from Distance_Cache import cached_shortest_paths
+from Graph_Cache import load_graph
+from Latency_Metrics import metric_units
+from Pareto_Front import pareto_front
+from Solver_Backend import SolverSettings
+
+
+
+
+# CDN Limit Constraint
+N = 10  # Max number of CDN centers
+
+
+
+# Read the GML file
+
+# condensed_west_europe_Cleaned
+file_path = "MainFolder/Datasets/condensed_west_europe_Cleaned.gml"
+
+# interconnect_Cleaned
+# file_path = "MainFolder/Datasets/interconnect_Cleaned.gml"
+
+# Metric to optimize: "distance_km" (shortest haversine km) or a latency-model metric
+# ("latency_ms", "propagation_ms", "hops" or "route_km", see Latency_Metrics.py)
+metric = "distance_km"
+unit = metric_units[metric]
+
+# Number of max-distance levels on the front (from the optimal k-center radius to unbounded) and of worker
+# processes solving them in parallel (None: one per CPU; capped so every worker solves a run of at least 3
+# neighbouring levels, each warm-started from the one before)
+num_levels = 12
+num_workers = None
+
+# Solver backend and limits for every level (see Solver_Backend.py); the solver logs of parallel workers
+# would interleave, so only the per-level summaries are printed
+solver_settings = SolverSettings('CBC', time_limit_seconds=None, relative_gap=None, threads=1, stream_log=False)
+
+
+# Trace the average-vs-maximum distance trade-off with the epsilon-constraint method instead of the
+# lexicographic two-step of Optimization06.py: every level bounds the maximum distance and minimizes the
+# average, and the non-dominated points form the front (see Pareto_Front.py)
+if __name__ == "__main__":
+    G = load_graph(file_path).graph
+    precomputed_distances, predecessors, matrix_nodes, node_index = cached_shortest_paths(file_path, metric=metric)
+
+    start_time = datetime.datetime.now()
+    print("Start Time: ", start_time)
+
+    front, points = pareto_front(precomputed_distances, matrix_nodes, N, solver_settings, num_levels=num_levels,
+                                 num_workers=num_workers)
+
+    end_time = datetime.datetime.now()
+    print("End Time: ", end_time)
+    print("Total Time: ", end_time - start_time)
+
+    file_suffix = f"{len(G.nodes())}_Nodes_{N}_CDNs_{os.path.basename(file_path).replace('.gml', '')}"
+    text_file_name = f"MainFolder/Map/pareto_{file_suffix}.txt"
+    csv_file_name = f"MainFolder/Map/pareto_{file_suffix}.csv"
+
+    with open(text_file_name, 'w') as text_file:
+        text_file.write(f"Start Time: {start_time}\n")
+        text_file.write(f"End Time: {end_time}\n")
+        text_file.write(f"Total Time: {end_time - start_time}\n")
+        text_file.write(f"Number of CDNs: {N}\n")
+        text_file.write(f"Levels solved: {len(points)}, non-dominated points: {len(front)}\n")
+
+        for point in front:
+            centers = [G.nodes[matrix_nodes[k]]['label'] for k in point['centers']]
+            text_line = (f"Maximum Distance = {round(point['max_distance'], 1)} {unit}, "
+                         f"Average Distance = {round(point['average'], 1)} {unit}, CDN centers: {centers}")
+            print(text_line)
+            text_file.write(text_line + "\n")
+
+    with open(csv_file_name, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["max_distance", "average", "epsilon", "status", "seconds", "centers"])
+        for point in front:
+            writer.writerow([point['max_distance'], point['average'], point['epsilon'], point['status'],
+                             f"{point['seconds']:.3f}", " ".join(str(matrix_nodes[k]) for k in point['centers'])])
+
+    print(f"Pareto front written to {text_file_name} and {csv_file_name}")
@@ -0,0 +1,61 @@
+import csv
+import datetime
+from Experiment_Runner import run_experiments
+from Solver_Backend import SolverSettings
+
+
+
+
+# Experiment grid: every graph is solved for every CDN count with every method
+graphs = [
+    "MainFolder/Datasets/italy_network.gml",
+    "MainFolder/Datasets/condensed_west_europe_Cleaned.gml",
+    "MainFolder/Datasets/interconnect_Cleaned.gml",
+]
+counts = [2, 5, 10]
+
+# Methods: "milp_p_median", "milp_k_center", "brute_force", "grasp_k_center" and "grasp_p_median"
+# (see Experiment_Runner.py)
+methods = ["milp_p_median", "milp_k_center", "brute_force", "grasp_k_center", "grasp_p_median"]
+
+# Metric to optimize: "distance_km" (shortest haversine km) or a latency-model metric
+# ("latency_ms", "propagation_ms", "hops" or "route_km", see Latency_Metrics.py)
+metric = "distance_km"
+
+# Per-cell time limit, retries of failed cells and worker processes (None: one per CPU)
+time_limit_seconds = 600
+retries = 1
+num_workers = None
+
+# Solver backend for the MILP cells; the solver logs of parallel workers would interleave, so only the
+# summaries are printed
+solver_settings = SolverSettings('CBC', time_limit_seconds=None, relative_gap=None, threads=1, stream_log=False)
+
+# Completion log: one JSON record per finished cell, appended as the cells finish. Run the script again with
+# the same log to resume an interrupted sweep; delete the log to start over
+completion_log_path = "MainFolder/Map/experiments_log.jsonl"
+csv_file_name = "MainFolder/Map/experiments.csv"
+
+
+if __name__ == "__main__":
+    start_time = datetime.datetime.now()
+    print("Start Time: ", start_time)
+
+    records = run_experiments(graphs, counts, methods, completion_log_path, solver_settings, metric=metric,
+                              time_limit_seconds=time_limit_seconds, retries=retries, num_workers=num_workers)
+
+    end_time = datetime.datetime.now()
+    print("End Time: ", end_time)
+    print("Total Time: ", end_time - start_time)
+
+    columns = ["graph", "metric", "N", "method", "status", "total", "average", "max_distance", "bound", "seconds",
+               "attempts", "centers"]
+    with open(csv_file_name, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for record in records:
+            row = [record.get(column) for column in columns]
+            row[-1] = " ".join(str(center) for center in record.get('centers', []))
+            writer.writerow(row)
+
+    print(f"{len(records)} cells written to {csv_file_name}")
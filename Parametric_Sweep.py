@@ -0,0 +1,79 @@
+import csv
+import time
+import numpy as np
+from MILP_Builder import build_placement_model, dense_distances
+from Placement_Heuristics import improve_centers, heuristic_p_median, placement_objective
+from Presolve import presolve_assignments
+from Solver_Backend import solve
+
+
+# Function to extend a placement to N centers by greedy addition, then move every center to its cluster's medoid
+# Used to turn the optimum for N - 1 into a warm start for N
+def extend_placement(distances, centers, N):
+    centers = list(centers)
+    nearest = distances[centers].min(axis=0) if centers else np.full(len(distances), np.inf)
+    while len(centers) < min(N, len(distances)):
+        totals = np.minimum(nearest[None, :], distances).sum(axis=1)
+        totals[centers] = np.inf
+        candidate = int(np.argmin(totals))
+        centers.append(candidate)
+        nearest = np.minimum(nearest, distances[candidate])
+    return improve_centers(distances, centers, lambda costs: costs.sum(axis=1))
+
+
+# Function to solve the p-median model for every CDN count in `counts` with one model
+# The model is built once over every reachable pair; each point only changes the right-hand side of the
+# CDN-limit row and is hinted with the previous optimum extended by one center (or the greedy placement,
+# whichever is better). With `presolve`, the hint's objective also tightens that N's presolve, whose pruned
+# assignments are fixed to 0 through their bounds
+# Returns one dict per N: N, objective, average, bound, gap, status, seconds, centers (node ids)
+def sweep_cdn_counts(distances, nodes, counts, solver_settings, presolve=True, log=print):
+    distances = dense_distances(distances, len(nodes))
+    counts = sorted(set(int(N) for N in counts))
+    n = len(nodes)
+
+    model = build_placement_model(distances, nodes, counts[-1], objective="p_median",
+                                  solver_name=solver_settings.name)
+    log(model.report())
+
+    curve = []
+    previous_centers = []
+    for N in counts:
+        model.set_cdn_limit(N)
+        hint = extend_placement(distances, previous_centers, N)
+        hint_objective = placement_objective(distances, hint)
+        greedy_centers, greedy_objective = heuristic_p_median(distances, N)
+        if greedy_objective < hint_objective:
+            hint, hint_objective = greedy_centers, greedy_objective
+        model.set_hint(distances, hint)
+
+        if presolve:
+            mask, presolve_report = presolve_assignments(distances, N, "p_median", known_objective=hint_objective)
+            model.set_assignment_mask(mask)
+            log(f"N = {N}: {presolve_report}")
+
+        start = time.perf_counter()
+        result = solve(model.solver, solver_settings)
+        seconds = time.perf_counter() - start
+
+        point = {'N': N, 'objective': result.objective, 'bound': result.bound, 'gap': result.gap,
+                 'status': result.status_name, 'seconds': seconds, 'centers': []}
+        if result.has_solution:
+            previous_centers = [k for k in range(n) if model.x.variables[k].solution_value() > 0.5]
+            point['centers'] = [nodes[k] for k in previous_centers]
+        point['average'] = None if result.objective is None else result.objective / n
+        curve.append(point)
+        log(f"N = {N}: total {point['objective']}, average {point['average']}, {point['status']}, "
+            f"{seconds:.3f} s")
+
+    return curve
+
+
+# Function to write the cost-vs-N curve to a CSV file (one row per CDN count)
+def write_sweep_curve(curve, csv_file_name):
+    with open(csv_file_name, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["N", "objective", "average", "bound", "gap", "status", "seconds", "centers"])
+        for point in curve:
+            writer.writerow([point['N'], point['objective'], point['average'], point['bound'], point['gap'],
+                             point['status'], f"{point['seconds']:.3f}", " ".join(str(c) for c in point['centers'])])
@@ -0,0 +1,133 @@
+import os
+import numpy as np
+from multiprocessing import Pool, shared_memory
+from K_Center_Exact import exact_k_center
+from Lagrangian_P_Median import lagrangian_p_median
+from MILP_Builder import build_placement_model, dense_distances
+from Placement_Heuristics import heuristic_p_median, placement_objective
+from Presolve import presolve_assignments
+from Solver_Backend import solve
+
+
+# Function to bound the maximum distance by `epsilon`: pairs farther apart become unreachable (inf), so the
+# p-median of the bounded matrix is the best average placement whose maximum distance stays within epsilon
+def epsilon_distances(distances, epsilon):
+    return np.where(distances <= epsilon, distances, np.inf)
+
+
+# Function to pick the max-distance levels of the front: the optimal k-center radius (the tightest feasible
+# bound), evenly spaced distinct distances up to the maximum of a near-optimal p-median placement, and inf
+# (the unconstrained p-median, the other end of the front)
+def pareto_levels(distances, N, num_levels=12):
+    tightest, _, _ = exact_k_center(distances, N, log=lambda message: None)
+    loosest = float(distances[lagrangian_p_median(distances, N, iterations=100)['centers']].min(axis=0).max())
+
+    radii = np.unique(distances[(distances >= tightest) & (distances <= loosest)])
+    picks = np.unique(np.linspace(0, len(radii) - 1, max(1, num_levels - 1)).round().astype(np.int64))
+    return radii[picks].tolist() + [float('inf')]
+
+
+# Function to solve the average-distance placement for one max-distance level
+# `hint_centers` (e.g. the solution of the next tighter level, which stays feasible) seeds the solver when it
+# beats the greedy placement. Returns the point as a dict: epsilon, average, max_distance, bound, gap,
+# status, seconds, centers (rows); average and max_distance are None when the solver found no placement
+def solve_level(distances, nodes, N, epsilon, solver_settings, hint_centers=None, presolve=True):
+    n = len(nodes)
+    bounded = epsilon_distances(distances, epsilon)
+    seed_centers, seed_objective = heuristic_p_median(bounded, N)
+    if hint_centers is not None and placement_objective(bounded, hint_centers) < seed_objective:
+        seed_centers, seed_objective = hint_centers, placement_objective(bounded, hint_centers)
+
+    assignment_mask = None
+    if presolve:
+        known_objective = seed_objective if np.isfinite(seed_objective) else None
+        assignment_mask, _ = presolve_assignments(bounded, N, "p_median", known_objective=known_objective)
+
+    model = build_placement_model(bounded, nodes, N, objective="p_median", average=True,
+                                  assignment_mask=assignment_mask, solver_name=solver_settings.name)
+    if np.isfinite(seed_objective):
+        model.set_hint(bounded, seed_centers)
+    result = solve(model.solver, solver_settings)
+
+    point = {'epsilon': epsilon, 'average': None, 'max_distance': None, 'bound': result.bound, 'gap': result.gap,
+             'status': result.status_name, 'seconds': result.seconds, 'centers': []}
+    if result.has_solution:
+        centers = [k for k in range(n) if model.x.variables[k].solution_value() > 0.5]
+        nearest = distances[centers].min(axis=0)
+        point.update(average=float(nearest.mean()), max_distance=float(nearest.max()), centers=centers)
+    return point
+
+
+# Worker state, set once per process by _init_worker
+_worker_shm = None
+_worker_distances = None
+_worker_problem = None
+
+
+# Function to attach a worker process to the shared distance matrix
+def _init_worker(shm_name, shape, nodes, N, solver_settings, presolve):
+    global _worker_shm, _worker_distances, _worker_problem
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_distances = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+    _worker_problem = (nodes, N, solver_settings, presolve)
+
+
+# Function to solve a run of neighbouring levels inside a worker, from the tightest to the loosest, each one
+# warm-started from the placement of the level before it
+def _solve_levels(levels):
+    nodes, N, solver_settings, presolve = _worker_problem
+    points = []
+    hint_centers = None
+    for epsilon in levels:
+        point = solve_level(_worker_distances, nodes, N, epsilon, solver_settings, hint_centers, presolve)
+        hint_centers = point['centers'] or hint_centers
+        points.append(point)
+    return points
+
+
+# Function to keep the non-dominated points: no other point has both a lower-or-equal average and a
+# lower-or-equal maximum distance (with one of them strictly lower). Returns them by increasing maximum
+def non_dominated(points):
+    solved = sorted((point for point in points if point['average'] is not None),
+                    key=lambda point: (point['max_distance'], point['average']))
+    front = []
+    for point in solved:
+        if not front or point['average'] < front[-1]['average']:
+            front.append(point)
+    return front
+
+
+# Function to trace the average-vs-maximum distance Pareto front with the epsilon-constraint method
+# Each level bounds the maximum distance and minimizes the average (see solve_level). The levels are split
+# into runs of at least `min_run_length` neighbours (so every level but the first of a run is warm-started),
+# solved in parallel worker processes that read the distance matrix from one shared-memory block
+# Returns (non-dominated front, every solved point), both as lists of point dicts
+def pareto_front(distances, nodes, N, solver_settings, num_levels=12, num_workers=None, presolve=True,
+                 min_run_length=3, log=print):
+    distances = dense_distances(distances, len(nodes))
+    levels = pareto_levels(distances, N, num_levels)
+    num_workers = max(1, min(num_workers or os.cpu_count(), len(levels) // min_run_length))
+    log(f"Solving {len(levels)} max-distance levels from {levels[0]:.6g} to {levels[-2]:.6g} and unbounded "
+        f"with {num_workers} workers")
+
+    runs = [run.tolist() for run in np.array_split(np.array(levels), num_workers)]
+    shm = shared_memory.SharedMemory(create=True, size=max(1, distances.nbytes))
+    try:
+        shared = np.ndarray(distances.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = distances
+
+        points = []
+        with Pool(len(runs), initializer=_init_worker,
+                  initargs=(shm.name, distances.shape, nodes, N, solver_settings, presolve)) as pool:
+            for run_points in pool.imap_unordered(_solve_levels, runs):
+                points.extend(run_points)
+                for point in run_points:
+                    log(f"Max distance <= {point['epsilon']:.6g}: average {point['average']}, "
+                        f"maximum {point['max_distance']}, {point['status']}, {point['seconds']:.2f} s")
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    points.sort(key=lambda point: point['epsilon'])
+    return non_dominated(points), points
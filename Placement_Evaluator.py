@@ -0,0 +1,44 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+
+# Function to assign every node to its nearest center with a single multi-source Dijkstra
+# All centers seed the same search, so one O(E log V) pass replaces a lookup per (node, center) pair and
+# needs no all-pairs table. Returns row arrays (nearest center, distance, predecessor); nodes no center
+# reaches get center -1, distance inf and predecessor -1
+def nearest_centers(indptr, indices, weights, centers):
+    n = len(indptr) - 1
+    # With min_only, SciPy also returns the seed each node was reached from
+    adjacency = csr_matrix((weights, indices, indptr), shape=(n, n))
+    distances, predecessors, sources = csgraph_dijkstra(adjacency, directed=True,
+                                                        indices=np.asarray(centers, dtype=np.int32),
+                                                        min_only=True, return_predecessors=True)
+    predecessors = predecessors.astype(np.int32)
+    predecessors[predecessors < 0] = -1
+    sources = sources.astype(np.int32)
+    sources[sources < 0] = -1
+    return sources, distances, predecessors
+
+
+# Function to score a placement: total and maximum distance from every node to its nearest center
+# Both are inf when some node cannot reach any center
+def evaluate_placement(indptr, indices, weights, centers):
+    _, distances, _ = nearest_centers(indptr, indices, weights, centers)
+    return float(distances.sum()), float(distances.max(initial=0))
+
+
+# Function to rebuild the path from a node's nearest center to the node from the multi-source predecessors
+# Returns the rows from the center to the node ([] if no center reaches it), or node ids if `nodes` is given
+def path_from_nearest_center(nearest, predecessors, node, nodes=None):
+    if nearest[node] < 0:
+        return []
+
+    path = [node]
+    while predecessors[path[-1]] >= 0:
+        path.append(int(predecessors[path[-1]]))
+    path.reverse()
+
+    if nodes is not None:
+        return [nodes[k] for k in path]
+    return path
@@ -0,0 +1,129 @@
+import time
+import numpy as np
+from MILP_Builder import dense_distances
+
+
+# Function to calculate each node's distance to its nearest center, row k belongs to centers[k]
+def nearest_center_distances(distances, centers):
+    return distances[np.asarray(centers)].min(axis=0)
+
+
+# Function to score every candidate as the next center, given each node's current nearest-center distance
+# Rows are read in blocks of `block_size`, so the temporary stays block_size x n however large the table is
+def candidate_scores(distances, nearest, score, block_size=1024):
+    return np.concatenate([score(np.minimum(nearest[None, :], distances[start:start + block_size]))
+                           for start in range(0, len(distances), block_size)])
+
+
+# Function to move every center to the best node for the nodes it currently serves, until nothing improves
+# `score` turns the distances from every candidate to a cluster's members into one cost per candidate
+def improve_centers(distances, centers, score, max_rounds=20):
+    centers = list(centers)
+    for _ in range(max_rounds):
+        assignment = np.argmin(distances[np.asarray(centers)], axis=0)
+        moved = False
+        for k in range(len(centers)):
+            members = np.nonzero(assignment == k)[0]
+            if len(members) == 0:
+                continue
+            costs = score(distances[:, members])
+            best = int(np.argmin(costs))
+            if costs[best] < costs[centers[k]] and best not in centers:
+                centers[k] = best
+                moved = True
+        if not moved:
+            break
+    return centers
+
+
+# Function to find a quick k-center solution: farthest-first traversal from the 1-center, then each center
+# moved to the 1-center of its cluster. Returns (centers as rows, maximum distance)
+def heuristic_k_center(distances, N):
+    centers = [int(np.argmin(distances.max(axis=1)))]
+    nearest = distances[centers[0]].copy()
+    while len(centers) < min(N, len(distances)):
+        candidate = int(np.argmax(nearest))
+        if nearest[candidate] == 0:
+            break
+        centers.append(candidate)
+        nearest = np.minimum(nearest, distances[candidate])
+
+    # Reassignment can undo a move for the maximum, so keep whichever solution is better
+    improved = improve_centers(distances, centers, lambda costs: costs.max(axis=1))
+    return min((centers, float(nearest.max())),
+               (improved, float(nearest_center_distances(distances, improved).max())), key=lambda item: item[1])
+
+
+# Function to find a quick p-median solution: greedy addition of the center that lowers the total most,
+# then each center moved to the medoid of its cluster. Returns (centers as rows, total distance)
+def heuristic_p_median(distances, N):
+    centers = []
+    nearest = np.full(distances.shape[1], np.inf)
+    while len(centers) < min(N, len(distances)):
+        totals = np.minimum(nearest[None, :], distances).sum(axis=1)
+        totals[centers] = np.inf
+        candidate = int(np.argmin(totals))
+        centers.append(candidate)
+        nearest = np.minimum(nearest, distances[candidate])
+
+    centers = improve_centers(distances, centers, lambda costs: costs.sum(axis=1))
+    return centers, float(nearest_center_distances(distances, centers).sum())
+
+
+# Function to score a placement: total ("p_median") or maximum ("k_center") distance to the nearest center
+def placement_objective(distances, centers, objective="p_median"):
+    nearest = nearest_center_distances(distances, centers)
+    return float(nearest.max() if objective == "k_center" else nearest.sum())
+
+
+# Function to run a GRASP search (used by Methahuristics.py and the MILP warm starts): every iteration builds a
+# placement by picking each next center at random from the alpha share of candidates that would give the best
+# objective (restricted candidate list), then improves it with center moves. Stops after `early_stopping_rounds`
+# iterations without improvement, or once `time_limit_seconds` have passed (the iteration under way is finished
+# first). `distances` must be a dense table: every construction step reads all of its rows
+# Returns (centers as rows, objective)
+def grasp_placement(distances, N, objective="p_median", alpha=0.2, iterations=100, early_stopping_rounds=10,
+                    seed=None, time_limit_seconds=None):
+    start = time.perf_counter()
+    distances = dense_distances(distances, distances.shape[0])
+    rng = np.random.default_rng(seed)
+    n = len(distances)
+    score = (lambda costs: costs.max(axis=1)) if objective == "k_center" else (lambda costs: costs.sum(axis=1))
+
+    best_centers, best_objective = None, float('inf')
+    rounds_without_improvement = 0
+    for _ in range(iterations):
+        centers = []
+        nearest = np.full(distances.shape[1], np.inf)
+        while len(centers) < min(N, n):
+            values = candidate_scores(distances, nearest, score)
+            values[centers] = np.inf
+            candidates = np.argsort(values, kind='stable')[:max(1, int(alpha * (n - len(centers))))]
+            candidate = int(rng.choice(candidates))
+            centers.append(candidate)
+            nearest = np.minimum(nearest, distances[candidate])
+
+        centers = improve_centers(distances, centers, score)
+        value = placement_objective(distances, centers, objective)
+        if value < best_objective:
+            best_centers, best_objective = centers, value
+            rounds_without_improvement = 0
+        else:
+            rounds_without_improvement += 1
+            if rounds_without_improvement >= early_stopping_rounds:
+                break
+        if time_limit_seconds is not None and time.perf_counter() - start > time_limit_seconds:
+            break
+
+    return best_centers, best_objective
+
+
+# Function to get a seed placement for warm-starting a MILP: "greedy" (the quick heuristics above) or "grasp"
+# Returns (centers as rows, objective)
+def seed_placement(distances, N, objective="p_median", method="greedy", seed=None):
+    distances = dense_distances(distances, distances.shape[0])
+    if method == "grasp":
+        return grasp_placement(distances, N, objective, seed=seed)
+    if method == "greedy":
+        return heuristic_k_center(distances, N) if objective == "k_center" else heuristic_p_median(distances, N)
+    raise ValueError(f"Unknown seed method: {method}")
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from Geo_Utils import haversine_matrix, node_coordinates
+from MILP_Builder import dense_distances
+
+
+# Enriched dataset written by Geonames_From_allCountries_Huge_dataset.py
+population_csv_path = "MainFolder/Datasets/Final_Corrected_Enriched_dataset_with_population_imputed.csv"
+
+
+# Function to join a population column of the enriched CSV onto graph nodes
+# The CSV rows were exported from the graph's nodes and keep their Latitude / Longitude, so every node takes
+# the value of the nearest row (compared in blocks of `block_size` nodes); nodes with no row within `max_km`
+# get the median of the matched values. Returns the populations in node order (row k belongs to nodes[k])
+def node_populations(G, nodes, csv_path=population_csv_path, column='Closest_Population_Imputed', max_km=1.0,
+                     block_size=1024):
+    table = pd.read_csv(csv_path, usecols=['Latitude', 'Longitude', column]).dropna()
+    row_latitudes = table['Latitude'].to_numpy(dtype=np.float64)
+    row_longitudes = table['Longitude'].to_numpy(dtype=np.float64)
+    row_values = table[column].to_numpy(dtype=np.float64)
+
+    latitudes, longitudes = node_coordinates(G, nodes)
+    populations = np.full(len(nodes), np.nan)
+    for start in range(0, len(nodes), block_size):
+        block = slice(start, start + block_size)
+        distances = haversine_matrix(latitudes[block], longitudes[block], row_latitudes, row_longitudes)
+        nearest = np.argmin(distances, axis=1)
+        matched = distances[np.arange(len(nearest)), nearest] <= max_km
+        populations[block] = np.where(matched, row_values[nearest], np.nan)
+
+    unmatched = np.isnan(populations)
+    if unmatched.all():
+        raise ValueError(f"No node of the graph is within {max_km} km of a row of {csv_path}.")
+    if unmatched.any():
+        print(f"{int(unmatched.sum())} of {len(nodes)} nodes have no row in {csv_path}; using the median population")
+        populations[unmatched] = np.median(populations[~unmatched])
+    return populations
+
+
+# Function to turn populations into demand weights with mean 1, so a weighted total divided by the number of
+# nodes is the population-weighted average distance
+def demand_weights(populations):
+    populations = np.asarray(populations, dtype=np.float64)
+    return populations / populations.mean()
+
+
+# Function to weight the distance matrix by demand: column j (served node j) is scaled by weights[j] in one
+# broadcast multiply, so every solver and heuristic that reads the matrix optimizes the weighted objective
+# with no per-pair work. Any distance source is read into a dense matrix first
+def weighted_distances(distances, weights):
+    return dense_distances(distances, distances.shape[0]) * np.asarray(weights, dtype=np.float64)[None, :]
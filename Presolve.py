@@ -0,0 +1,43 @@
+import numpy as np
+from MILP_Builder import dense_distances
+from Lagrangian_P_Median import lagrangian_p_median
+from Placement_Heuristics import heuristic_k_center, heuristic_p_median
+
+
+# Function to find the assignment variables y[i, j] that can never be part of an optimal solution
+# Uses the objective of a quick heuristic as an upper bound U:
+#   "k_center" - y[i, j] with d[i, j] > U would push the maximum above U
+#   "p_median" - y[i, j] whose reduced-cost bound from the Lagrangian dual (see Lagrangian_P_Median.py)
+#                exceeds U cannot beat the best placement
+# `known_objective` (the objective of any known placement, e.g. a warm start) tightens U when it is lower
+# Returns (mask of the kept pairs, report line); the diagonal is always kept
+def presolve_assignments(distances, N, objective="p_median", tolerance=1e-6, known_objective=None):
+    distances = dense_distances(distances, distances.shape[0])
+    finite = np.isfinite(distances)
+
+    if objective == "k_center":
+        _, upper_bound = heuristic_k_center(distances, N)
+        bounds = distances
+        bound_text = ""
+    else:
+        _, upper_bound = heuristic_p_median(distances, N)
+        # The dual needs a finite target; a disconnected topology keeps every reachable pair
+        if np.isfinite(upper_bound):
+            dual = lagrangian_p_median(distances, N, iterations=100, track_pair_bounds=True)
+            upper_bound, bounds = dual['objective'], dual['pair_bounds']
+            bound_text = f", lower bound {dual['lower_bound']:.6g}"
+        else:
+            bounds = distances
+            bound_text = ""
+
+    if known_objective is not None:
+        upper_bound = min(upper_bound, known_objective)
+
+    mask = finite & (bounds <= upper_bound * (1 + tolerance) + tolerance)
+    np.fill_diagonal(mask, True)
+
+    kept = int(mask.sum())
+    total = int(finite.sum())
+    report = (f"Presolve ({objective}): heuristic bound {upper_bound:.6g}{bound_text}, kept {kept} of {total} "
+              f"assignment variables ({1 - kept / max(total, 1):.1%} pruned)")
+    return mask, report
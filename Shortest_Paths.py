@@ -0,0 +1,211 @@
+import os
+import heapq
+import numpy as np
+from multiprocessing import Pool, shared_memory
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+from Graph_Cache import load_graph
+
+
+# Function to turn a weighted NetworkX graph into per-row adjacency lists of (neighbor index, weight)
+# Row k belongs to nodes[k]; plain lists pickle cheaply to worker processes
+def graph_to_adjacency(G, nodes):
+    node_index = {node: k for k, node in enumerate(nodes)}
+    adjacency = [[] for _ in nodes]
+    for node in nodes:
+        row = adjacency[node_index[node]]
+        for neighbor, data in G[node].items():
+            row.append((node_index[neighbor], data['weight']))
+    return adjacency
+
+
+# Function to calculate shortest distances from one source row using Dijkstra's algorithm
+# Writes the result straight into `row` (already filled with inf) and, if given, `predecessor_row` (filled with -1)
+def dijkstra_row(adjacency, source, row, predecessor_row=None):
+    row[source] = 0
+    distances = {source: 0}
+    queue = [(0, source)]
+
+    while queue:
+        current_distance, current_node = heapq.heappop(queue)
+
+        if current_distance > distances[current_node]:
+            continue
+
+        for neighbor, weight in adjacency[current_node]:
+            distance = current_distance + weight
+
+            if distance < distances.get(neighbor, float('inf')):
+                distances[neighbor] = distance
+                if predecessor_row is not None:
+                    predecessor_row[neighbor] = current_node
+                heapq.heappush(queue, (distance, neighbor))
+
+    for node, distance in distances.items():
+        row[node] = distance
+
+
+# Worker state, set once per process by _init_worker
+_worker_adjacency = None
+_worker_shm = None
+_worker_matrix = None
+
+
+# Function to attach a worker process to the shared output matrix
+def _init_worker(shm_name, shape, dtype, adjacency):
+    global _worker_adjacency, _worker_shm, _worker_matrix
+    _worker_adjacency = adjacency
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_matrix = np.ndarray(shape, dtype=dtype, buffer=_worker_shm.buf)
+
+
+# Function to solve one shard of sources inside a worker; rows go straight to shared memory
+def _solve_sources(sources):
+    for source in sources:
+        dijkstra_row(_worker_adjacency, source, _worker_matrix[source])
+    return len(sources)
+
+
+# Function to compute the all-pairs distance matrix with the sources sharded across a process pool
+# Workers write their rows into one shared-memory matrix, so no rows are pickled back
+def parallel_all_pairs_dijkstra(G, nodes, num_workers=None, dtype=np.float32, chunk_size=16):
+    num_workers = num_workers or os.cpu_count()
+    adjacency = graph_to_adjacency(G, nodes)
+    n = len(nodes)
+    shape = (n, n)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * n * np.dtype(dtype).itemsize))
+    try:
+        matrix = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        matrix.fill(np.inf)
+
+        shards = [range(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+        done = 0
+        report_every = max(1, n // 20)
+        next_report = report_every
+
+        with Pool(num_workers, initializer=_init_worker,
+                  initargs=(shm.name, shape, np.dtype(dtype), adjacency)) as pool:
+            for count in pool.imap_unordered(_solve_sources, shards):
+                done += count
+                if done >= next_report or done == n:
+                    print(f"Processed {done}/{n} sources with {num_workers} workers.")
+                    next_report = done + report_every
+
+        result = matrix.copy()
+        del matrix
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return result
+
+
+# Function to turn a weighted NetworkX graph into CSR adjacency arrays (indptr, indices, weights)
+# Both directions of every undirected edge are stored; row k belongs to nodes[k]
+def graph_to_csr(G, nodes, weight='weight'):
+    node_index = {node: k for k, node in enumerate(nodes)}
+    n = len(nodes)
+
+    edges = list(G.edges(data=weight))
+    rows = np.fromiter((node_index[i] for i, j, w in edges), dtype=np.int32, count=len(edges))
+    cols = np.fromiter((node_index[j] for i, j, w in edges), dtype=np.int32, count=len(edges))
+    data = np.fromiter((w for i, j, w in edges), dtype=np.float64, count=len(edges))
+    if not G.is_directed():
+        rows, cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+        data = np.concatenate([data, data])
+
+    adjacency = csr_matrix((data, (rows, cols)), shape=(n, n))
+    return adjacency.indptr, adjacency.indices, adjacency.data
+
+
+# Function to read a GML file once and return its CSR adjacency plus the node order
+# `add_edge_weights` is the weighting function applied to the NetworkX graph (haversine today)
+def load_graph_csr(file_path, add_edge_weights):
+    G = load_graph(file_path).graph
+    add_edge_weights(G)
+    nodes = list(G.nodes())
+    indptr, indices, weights = graph_to_csr(G, nodes)
+    return indptr, indices, weights, nodes
+
+
+# Function to compute distance and predecessor matrices with SciPy's C-backed Dijkstra in one call
+# Unreachable pairs are inf; missing predecessors (source itself, unreachable nodes) are -1
+def csgraph_shortest_paths(indptr, indices, weights, sources=None):
+    n = len(indptr) - 1
+    adjacency = csr_matrix((weights, indices, indptr), shape=(n, n))
+    distances, predecessors = csgraph_dijkstra(adjacency, directed=True, indices=sources,
+                                               return_predecessors=True)
+    predecessors = predecessors.astype(np.int32)
+    predecessors[predecessors < 0] = -1
+    return distances, predecessors
+
+
+# Function to compute distance and predecessor matrices with the pure-Python Dijkstra
+# Slow, but kept as the reference backend to check the C-backed results against
+def reference_shortest_paths(G, nodes):
+    adjacency = graph_to_adjacency(G, nodes)
+    n = len(nodes)
+    distances = np.full((n, n), np.inf)
+    predecessors = np.full((n, n), -1, dtype=np.int32)
+    for source in range(n):
+        dijkstra_row(adjacency, source, distances[source], predecessors[source])
+    return distances, predecessors
+
+
+# Function to compare two distance matrices; returns the largest absolute difference between them
+# Pairs that are unreachable in both matrices count as equal
+def max_backend_difference(distances, reference_distances):
+    distances = np.asarray(distances, dtype=np.float64)
+    reference_distances = np.asarray(reference_distances, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        difference = np.abs(distances - reference_distances)
+    difference[np.isinf(distances) & np.isinf(reference_distances)] = 0
+    return float(difference.max(initial=0))
+
+
+# Function to rebuild one shortest path from a predecessor matrix
+# Returns the rows on the path from source to target ([] if unreachable), or node ids if `nodes` is given
+def reconstruct_path(predecessors, source, target, nodes=None):
+    row = predecessors[source]
+    if source != target and row[target] < 0:
+        return []
+
+    path = [target]
+    current = target
+    while current != source:
+        current = int(row[current])
+        path.append(current)
+    path.reverse()
+
+    if nodes is not None:
+        return [nodes[k] for k in path]
+    return path
+
+
+# Function to rebuild the shortest paths from one source to a batch of targets
+# All targets are walked back together, one vectorized step per hop of the longest path
+def reconstruct_paths(predecessors, source, targets, nodes=None):
+    row = np.asarray(predecessors[source])
+    targets = np.asarray(targets, dtype=np.int64)
+    reachable = (targets == source) | (row[targets] >= 0)
+
+    current = targets.copy()
+    steps = [current]
+    active = reachable & (current != source)
+    while active.any():
+        current = np.where(active, row[current], current)
+        steps.append(current)
+        active &= current != source
+
+    steps = np.stack(steps)
+    lengths = np.argmax(steps == source, axis=0) + 1
+
+    paths = []
+    for k in range(len(targets)):
+        if not reachable[k]:
+            paths.append([])
+            continue
+        path = steps[:lengths[k], k][::-1].tolist()
+        paths.append([nodes[v] for v in path] if nodes is not None else path)
+    return paths
@@ -0,0 +1,188 @@
+import os
+import sys
+import datetime
+import threading
+import time
+from ortools.linear_solver import pywraplp
+
+
+# Readable names of the pywraplp result codes
+status_names = {
+    pywraplp.Solver.OPTIMAL: "optimal",
+    pywraplp.Solver.FEASIBLE: "feasible (limit reached)",
+    pywraplp.Solver.INFEASIBLE: "infeasible",
+    pywraplp.Solver.UNBOUNDED: "unbounded",
+    pywraplp.Solver.ABNORMAL: "abnormal",
+    pywraplp.Solver.MODEL_INVALID: "model invalid",
+    pywraplp.Solver.NOT_SOLVED: "not solved (limit reached without a solution)",
+}
+
+
+# Solver choice and limits shared by every Optimization script
+#   name               - OR-Tools backend ('CBC', 'SCIP', ...)
+#   time_limit_seconds - stop after this many seconds and keep the best solution found (None: no limit)
+#   relative_gap       - stop once (incumbent - bound) / incumbent falls below this (None: solver default)
+#   threads            - number of solver threads (None: solver default; ignored by single-threaded backends)
+#   log_file           - timestamped copy of the solver progress log (None: console only)
+#   stream_log         - print the solver's incumbent / bound log with timestamps while it runs
+#   heartbeat_seconds  - print an "elapsed" line when the solver has been silent this long
+class SolverSettings:
+    def __init__(self, name='CBC', time_limit_seconds=None, relative_gap=None, threads=None, log_file=None,
+                 stream_log=True, heartbeat_seconds=30):
+        self.name = name
+        self.time_limit_seconds = time_limit_seconds
+        self.relative_gap = relative_gap
+        self.threads = threads
+        self.log_file = log_file
+        self.stream_log = stream_log
+        self.heartbeat_seconds = heartbeat_seconds
+
+    def describe(self):
+        return (f"{self.name}, time limit {self.time_limit_seconds} s, relative gap {self.relative_gap}, "
+                f"threads {self.threads}")
+
+
+# Relative gap up to which an OPTIMAL status counts as proven optimal; pywraplp also reports OPTIMAL when the
+# search stopped at the requested relative_gap, so the gap decides
+optimality_tolerance = 1e-6
+
+
+# Outcome of one solve: status, incumbent objective, best bound, relative gap and wall time
+class SolveResult:
+    def __init__(self, status, objective, bound, seconds):
+        self.status = status
+        self.objective = objective
+        self.bound = bound
+        self.seconds = seconds
+
+    @property
+    def status_name(self):
+        return status_names.get(self.status, str(self.status))
+
+    # True when the solver holds a usable solution, including the best one found before a limit was hit
+    @property
+    def has_solution(self):
+        return self.status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE)
+
+    # True only when optimality is proven: OPTIMAL status and a gap within optimality_tolerance
+    @property
+    def optimal(self):
+        return self.status == pywraplp.Solver.OPTIMAL and self.gap is not None and self.gap <= optimality_tolerance
+
+    @property
+    def gap(self):
+        if self.objective is None or self.bound is None:
+            return None
+        return abs(self.objective - self.bound) / max(abs(self.objective), 1e-9)
+
+    # Function to describe the solution found, always with its gap, for the console and the results files
+    def solution_text(self):
+        if self.optimal:
+            return f"Optimal solution found (gap {self.gap:.3%})"
+        if self.status == pywraplp.Solver.OPTIMAL:
+            return f"Solution within gap {self.gap:.3%} of optimal (relative gap limit reached)"
+        return f"Best solution found before the limit (gap {self.gap:.3%})"
+
+    def summary(self):
+        if not self.has_solution:
+            return f"Solver status: {self.status_name} after {self.seconds:.2f} s"
+        return (f"Solver status: {self.status_name} after {self.seconds:.2f} s, objective {self.objective:.6g}, "
+                f"bound {self.bound:.6g}, gap {self.gap:.3%}")
+
+
+# Function to create a pywraplp solver for the settings' backend
+def create_solver(settings):
+    solver = pywraplp.Solver.CreateSolver(settings.name)
+    if solver is None:
+        raise ValueError(f"OR-Tools has no '{settings.name}' backend in this build.")
+    return solver
+
+
+# Function to apply the time limit and thread count of the settings to a solver
+def configure_solver(solver, settings):
+    if settings.time_limit_seconds is not None:
+        solver.SetTimeLimit(int(settings.time_limit_seconds * 1000))
+    if settings.threads is not None and not solver.SetNumThreads(int(settings.threads)):
+        print(f"The {settings.name} backend ignores the thread count; solving with its default")
+
+
+# Context manager that copies the solver's native log (written to file descriptor 1) to the console and the
+# log file, one timestamped line at a time, while a heartbeat line marks long silent stretches
+class SolverLogStream:
+    def __init__(self, settings):
+        self.settings = settings
+        self.start = time.perf_counter()
+        self.last_line = self.start
+        self.done = threading.Event()
+        self.log = open(settings.log_file, 'a', encoding='utf-8') if settings.log_file else None
+
+    def write(self, line):
+        now = time.perf_counter()
+        self.last_line = now
+        stamped = f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S.%f}"[:-3] + f" [+{now - self.start:8.2f} s] {line}\n"
+        os.write(self.console, stamped.encode('utf-8', errors='replace'))
+        if self.log is not None:
+            self.log.write(stamped)
+            self.log.flush()
+
+    def read_lines(self):
+        with os.fdopen(self.read_end, 'rb') as pipe:
+            for raw in pipe:
+                self.write(raw.decode('utf-8', errors='replace').rstrip())
+
+    def heartbeat(self):
+        while not self.done.wait(1.0):
+            if time.perf_counter() - self.last_line >= self.settings.heartbeat_seconds:
+                self.write(f"... still solving ({time.perf_counter() - self.start:.0f} s elapsed)")
+
+    def __enter__(self):
+        sys.stdout.flush()
+        self.console = os.dup(1)
+        self.read_end, write_end = os.pipe()
+        os.dup2(write_end, 1)
+        os.close(write_end)
+        self.reader = threading.Thread(target=self.read_lines, daemon=True)
+        self.beater = threading.Thread(target=self.heartbeat, daemon=True)
+        self.reader.start()
+        self.beater.start()
+        self.write(f"Solving with {self.settings.describe()}")
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.stdout.flush()
+        os.dup2(self.console, 1)  # Closes the last write end of the pipe, which ends the reader
+        self.done.set()
+        self.reader.join()
+        self.beater.join()
+        os.close(self.console)
+        if self.log is not None:
+            self.log.close()
+        return False
+
+
+# Function to solve a configured model and report the outcome
+# The incumbent and bound are streamed with timestamps while the solver runs (see SolverLogStream). When a
+# limit stops the search, the status is FEASIBLE and the solver keeps the best solution found, so callers
+# should branch on `result.has_solution` rather than on OPTIMAL alone
+def solve(solver, settings):
+    configure_solver(solver, settings)
+    parameters = pywraplp.MPSolverParameters()
+    if settings.relative_gap is not None:
+        parameters.SetDoubleParam(pywraplp.MPSolverParameters.RELATIVE_MIP_GAP, float(settings.relative_gap))
+
+    start = time.perf_counter()
+    if settings.stream_log:
+        solver.EnableOutput()
+        with SolverLogStream(settings):
+            status = solver.Solve(parameters)
+    else:
+        status = solver.Solve(parameters)
+    seconds = time.perf_counter() - start
+
+    objective = bound = None
+    if status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        objective = solver.Objective().Value()
+        bound = solver.Objective().BestBound()
+    result = SolveResult(status, objective, bound, seconds)
+    print(result.summary())
+    return result
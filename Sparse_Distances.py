@@ -0,0 +1,133 @@
+import heapq
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+
+
+# Function to run Dijkstra from one source over CSR arrays and stop early
+# Stops once `k` nodes are settled (the source itself included) or the next node is farther than `radius`
+# Returns the settled nodes and their distances, nearest first
+def truncated_dijkstra_row(indptr, indices, weights, source, k=None, radius=None):
+    radius = float('inf') if radius is None else radius
+    k = len(indptr) - 1 if k is None else k
+
+    settled_nodes = []
+    settled_distances = []
+    distances = {source: 0.0}
+    settled = set()
+    queue = [(0.0, source)]
+
+    while queue and len(settled_nodes) < k:
+        current_distance, current_node = heapq.heappop(queue)
+
+        if current_node in settled:
+            continue
+        if current_distance > radius:
+            break
+
+        settled.add(current_node)
+        settled_nodes.append(current_node)
+        settled_distances.append(current_distance)
+
+        for position in range(indptr[current_node], indptr[current_node + 1]):
+            neighbor = indices[position]
+            distance = current_distance + weights[position]
+
+            if distance < distances.get(neighbor, float('inf')):
+                distances[neighbor] = distance
+                heapq.heappush(queue, (distance, neighbor))
+
+    return settled_nodes, settled_distances
+
+
+# Function to build a sparse n x n distance table that keeps, per node, only its k nearest nodes
+# and/or the nodes within `radius`. Radius-only tables use SciPy's C-backed Dijkstra with `limit`,
+# in blocks of `block_size` source rows; k-nearest tables use the early-terminating Dijkstra above
+def sparse_distance_table(indptr, indices, weights, k=None, radius=None, block_size=256, dtype=np.float32):
+    if k is None and radius is None:
+        raise ValueError("A sparse distance table needs k, radius or both.")
+
+    n = len(indptr) - 1
+    row_columns = []
+    row_distances = []
+
+    if k is None:
+        adjacency = csr_matrix((weights, indices, indptr), shape=(n, n))
+        for start in range(0, n, block_size):
+            sources = np.arange(start, min(start + block_size, n))
+            block = csgraph_dijkstra(adjacency, directed=True, indices=sources, limit=radius)
+            for row in block:
+                columns = np.nonzero(np.isfinite(row))[0]
+                row_columns.append(columns)
+                row_distances.append(row[columns])
+    else:
+        indptr_list, indices_list, weights_list = indptr.tolist(), indices.tolist(), weights.tolist()
+        for source in range(n):
+            nodes, distances = truncated_dijkstra_row(indptr_list, indices_list, weights_list, source, k, radius)
+            order = np.argsort(nodes)
+            row_columns.append(np.asarray(nodes, dtype=np.int64)[order])
+            row_distances.append(np.asarray(distances, dtype=np.float64)[order])
+
+    table_indptr = np.zeros(n + 1, dtype=np.int64)
+    table_indptr[1:] = np.cumsum([len(columns) for columns in row_columns])
+    table_indices = np.concatenate(row_columns).astype(np.int32) if n else np.zeros(0, dtype=np.int32)
+    table_data = np.concatenate(row_distances).astype(dtype) if n else np.zeros(0, dtype=dtype)
+
+    # Column indices are sorted per row and the source's own 0 is stored explicitly
+    return csr_matrix((table_data, table_indices, table_indptr), shape=(n, n))
+
+
+# Function to calculate the lower bound on every missing distance of each row
+# Nodes that are not stored are at least as far as the farthest stored one, or beyond the radius
+# when the row was cut by the radius rather than by k
+def row_bounds(table, k=None, radius=None):
+    counts = np.diff(table.indptr)
+    bounds = np.zeros(table.shape[0])
+    non_empty = counts > 0
+    bounds[non_empty] = np.maximum.reduceat(table.data, table.indptr[:-1][non_empty]).astype(np.float64)
+    if radius is not None:
+        cut_by_radius = counts < k if k is not None else np.ones(len(counts), dtype=bool)
+        bounds[cut_by_radius] = radius
+    return bounds
+
+
+# Function to look up distances for (source, target) row pairs in a sparse distance table
+# Pairs outside the stored set are answered by `fallback`:
+#   "inf"   - treat the pair as too far to matter (placement models then never use it)
+#   "bound" - the row's lower bound from row_bounds()
+#   "exact" - run Dijkstra on demand from the missing sources (needs the graph's CSR arrays)
+def lookup_distances(table, sources, targets, fallback="inf", k=None, radius=None, graph_csr=None):
+    sources = np.atleast_1d(np.asarray(sources, dtype=np.int64))
+    targets = np.atleast_1d(np.asarray(targets, dtype=np.int64))
+    n = table.shape[1]
+
+    # (row, column) pairs are globally sorted in a CSR table with sorted indices
+    rows = np.repeat(np.arange(table.shape[0], dtype=np.int64), np.diff(table.indptr))
+    stored_keys = rows * n + table.indices
+    query_keys = sources * n + targets
+
+    result = np.full(len(query_keys), np.inf)
+    found = np.zeros(len(query_keys), dtype=bool)
+    if len(stored_keys):
+        positions = np.minimum(np.searchsorted(stored_keys, query_keys), len(stored_keys) - 1)
+        found = stored_keys[positions] == query_keys
+        result[found] = table.data[positions[found]]
+
+    missing = ~found
+    if not missing.any() or fallback == "inf":
+        return result
+
+    if fallback == "bound":
+        result[missing] = row_bounds(table, k, radius)[sources[missing]]
+    elif fallback == "exact":
+        if graph_csr is None:
+            raise ValueError("The 'exact' fallback needs the graph's (indptr, indices, weights).")
+        indptr, indices, weights = graph_csr
+        adjacency = csr_matrix((weights, indices, indptr), shape=(len(indptr) - 1, len(indptr) - 1))
+        missing_sources, inverse = np.unique(sources[missing], return_inverse=True)
+        exact_rows = csgraph_dijkstra(adjacency, directed=True, indices=missing_sources)
+        result[missing] = exact_rows[inverse, targets[missing]]
+    else:
+        raise ValueError(f"Unknown fallback: {fallback}")
+
+    return result
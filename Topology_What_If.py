@@ -0,0 +1,60 @@
+import os
+import datetime
+import numpy as np
+from Distance_Cache import cached_shortest_paths
+from Distance_Matrix import save_distance_matrix, save_predecessor_matrix
+from Dynamic_APSP import apply_changes
+from Geo_Utils import add_edge_weights_to_graph
+from Graph_Cache import load_graph
+
+
+# Function to calculate the average distance over all reachable pairs
+def average_distance(matrix):
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return matrix[np.isfinite(matrix)].mean()
+
+
+
+# Read the GML file
+file_path = "MainFolder/Datasets/interconnect_Cleaned.gml"  # condensed_west_europe_Cleaned or interconnect_Cleaned
+
+# Change set to evaluate (see Dynamic_APSP.py for the supported changes; weights are in km)
+changes = [
+    ("remove_edge", 0, 1),
+    # ("add_edge", 0, 5, 120.0),
+    # ("set_weight", 2, 3, 300.0),
+    # ("remove_node", 4),
+]
+
+G = load_graph(file_path).graph
+add_edge_weights_to_graph(G)
+
+# Start from the cached tables of the unchanged topology
+precomputed_distances, predecessors, matrix_nodes, node_index = cached_shortest_paths(file_path)
+
+start_time = datetime.datetime.now()
+print("Start Time: ", start_time)
+
+# Update only the rows affected by the change set
+distances, predecessors, nodes, recomputed_rows = apply_changes(G, matrix_nodes, precomputed_distances,
+                                                                predecessors, changes)
+
+end_time = datetime.datetime.now()
+print("End Time: ", end_time)
+print("Total Time: ", end_time - start_time)
+print(f"Recomputed rows: {len(recomputed_rows)} of {len(matrix_nodes)}")
+
+# Compare the average reachable distance before and after the change set
+print(f"Average Distance before = {average_distance(precomputed_distances)}")
+print(f"Average Distance after = {average_distance(distances)}")
+print(f"Unreachable pairs after = {int(np.isinf(distances).sum())}")
+
+# Store the what-if tables next to the cached ones (they no longer match the GML, so they are not cached)
+what_if_folder_path = "MainFolder/Datasets/ShortestDistances/what_if"
+if not os.path.exists(what_if_folder_path):
+    os.makedirs(what_if_folder_path)
+
+file_suffix = os.path.basename(file_path).replace('.gml', '')
+save_distance_matrix(os.path.join(what_if_folder_path, f"all_shortest_distances_{file_suffix}.npy"), distances, nodes)
+save_predecessor_matrix(os.path.join(what_if_folder_path, f"all_shortest_predecessors_{file_suffix}.npy"),
+                        predecessors, nodes)
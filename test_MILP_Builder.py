@@ -0,0 +1,58 @@
+import itertools
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import shortest_path
+from MILP_Builder import build_placement_model
+from Presolve import presolve_assignments
+
+
+# Function to build the shortest-path distances of a random connected graph with `n` nodes
+def random_distances(n, seed):
+    rng = np.random.default_rng(seed)
+    weights = np.where(rng.random((n, n)) < 0.3, rng.uniform(10, 500, (n, n)), 0)
+    weights[np.arange(n - 1), np.arange(1, n)] = rng.uniform(10, 500, n - 1)  # A path keeps the graph connected
+    weights = np.triu(weights, k=1)
+    return shortest_path(weights + weights.T, directed=False)
+
+
+# Function to find the optimum by enumerating every placement of 1 to N centers
+def brute_force_optimum(distances, N, objective):
+    best = float('inf')
+    for size in range(1, N + 1):
+        for centers in itertools.combinations(range(len(distances)), size):
+            nearest = distances[list(centers)].min(axis=0)
+            best = min(best, nearest.max() if objective == "k_center" else nearest.sum())
+    return best
+
+
+# Function to solve a built model and return its objective value
+def solve_model(model):
+    assert model.solver.Solve() == model.solver.OPTIMAL
+    return model.solver.Objective().Value()
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("objective", ["p_median", "k_center"])
+@pytest.mark.parametrize("presolve", [False, True])
+@pytest.mark.parametrize("no_mutual_service", [False, True])
+def test_model_matches_brute_force(seed, objective, presolve, no_mutual_service):
+    distances = random_distances(12, seed)
+    N = 3
+    assignment_mask = presolve_assignments(distances, N, objective)[0] if presolve else None
+    model = build_placement_model(distances, list(range(12)), N, objective=objective,
+                                  no_mutual_service=no_mutual_service, assignment_mask=assignment_mask)
+    assert solve_model(model) == pytest.approx(brute_force_optimum(distances, N, objective))
+
+
+# With only y[0, 1] in the mask, the mutual-service rows must still stop the open center 1 from being served by 0
+def test_no_mutual_service_with_one_sided_pair():
+    distances = random_distances(3, 0)
+    assignment_mask = np.zeros((3, 3), dtype=bool)
+    assignment_mask[0, 1] = True
+    for no_mutual_service, status in [(False, "OPTIMAL"), (True, "INFEASIBLE")]:
+        model = build_placement_model(distances, list(range(3)), 3, no_mutual_service=no_mutual_service,
+                                      assignment_mask=assignment_mask)
+        model.x[0].SetLb(1)
+        model.x[1].SetLb(1)
+        model.y[0, 1].SetLb(1)
+        assert model.solver.Solve() == getattr(model.solver, status)